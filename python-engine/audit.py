@@ -1,48 +1,532 @@
+import fcntl
+import gzip
 import json
 import os
-from typing import Dict, Any, Optional, List
+import shutil
+import hashlib
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Optional, List, Iterator, Tuple
 from farmsense.core.engine import Recommendation
+from farmsense.core.tracing import traced
+from farmsense.core.memory import container_bytes
+from farmsense.core.explanations import render_explainability, render_log
+
+def inputs_hash(raw_inputs: Dict[str, Any]) -> str:
+    """Content address of a raw_inputs dict (canonical JSON, so key order does not matter)."""
+    canonical = json.dumps(raw_inputs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _day(value: Optional[Any]) -> Optional[date]:
+    if value is None or (isinstance(value, date) and not isinstance(value, datetime)):
+        return value
+    return value.date()
 
 class AuditLogger:
-    def __init__(self, log_dir: str = "/home/ubuntu/farmsense/logs"):
+    """
+    Audit entries are appended as JSON lines to segments partitioned by issue date and domain:
+    partitions/<YYYY-MM-DD>/<domain>.jsonl. apply_retention() closes segments of days before
+    yesterday into .jsonl.gz, moves old days to a cold tier and can expire the coldest. Updates
+    (emergency confirmations) and releases append a newer line for the same audit ID; the
+    latest line wins. Audit IDs start with their issue date, so a lookup opens one day.
+
+    Raw inputs are stored once per content hash under inputs/<hash[:2]>/<hash>.json and
+    reference counted in an append-only inputs/refs.log; entries carry only the hash.
+    Per-record <id>.json / <id>_inputs.json files written before partitioning are still
+    read in place.
+    """
+    # Per-domain IDs inside a batch entry are "<batch_id>.<domain>"
+    BATCH_SEPARATOR = "."
+    INPUTS_DIR = "inputs"
+    REFS_FILE = "refs.log"
+    REFS_LOCK = "refs.lock"
+    PARTITIONS_DIR = "partitions"
+    COLD_DIR = "cold"
+    SEGMENT = ".jsonl"
+    CLOSED_SEGMENT = ".jsonl.gz"
+    # A close claimed longer ago than this is assumed to have crashed and is retried
+    STALE_CLOSE_SECONDS = 3600
+
+    def __init__(self, log_dir: str = "/home/ubuntu/farmsense/logs", cold_dir: Optional[str] = None):
         self.log_dir = log_dir
-        os.makedirs(self.log_dir, exist_ok=True)
+        self.inputs_dir = os.path.join(log_dir, self.INPUTS_DIR)
+        self.partitions_dir = os.path.join(log_dir, self.PARTITIONS_DIR)
+        self.cold_dir = cold_dir or os.path.join(log_dir, self.COLD_DIR)
+        os.makedirs(self.inputs_dir, exist_ok=True)
+        os.makedirs(self.partitions_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._refcounts: Optional[Counter] = None
+        # (day, domain) -> segment that writes append to, for days closing leaves open
+        self._append_targets: Dict[Tuple[date, str], str] = {}
 
-    def log_recommendation(self, recommendation: Recommendation):
-        log_path = os.path.join(self.log_dir, f"{recommendation.audit_log_id}.json")
-        with open(log_path, "w") as f:
-            json.dump(recommendation.to_dict(), f, indent=4)
-        
-        # Also save raw inputs for reconstruction
-        input_path = os.path.join(self.log_dir, f"{recommendation.audit_log_id}_inputs.json")
-        with open(input_path, "w") as f:
-            json.dump({
-                "domain": recommendation.domain,
-                "raw_inputs": recommendation.raw_inputs,
-                "issued_at": recommendation.issued_at.isoformat()
-            }, f, indent=4)
+    @classmethod
+    def batch_member_id(cls, batch_id: str, domain: str) -> str:
+        return f"{batch_id}{cls.BATCH_SEPARATOR}{domain}"
 
-    def get_log(self, audit_id: str) -> Optional[Dict[str, Any]]:
-        log_path = os.path.join(self.log_dir, f"{audit_id}.json")
-        if os.path.exists(log_path):
-            with open(log_path, "r") as f:
+    @classmethod
+    def _split_id(cls, audit_id: str) -> Tuple[str, Optional[str]]:
+        batch_id, _, domain = audit_id.partition(cls.BATCH_SEPARATOR)
+        return batch_id, domain or None
+
+    @staticmethod
+    def partition_date(audit_id: str) -> Optional[date]:
+        """Issue date encoded in an audit ID ("YYYYMMDD-<uuid>"); None for IDs from before partitioning."""
+        prefix, _, rest = audit_id.partition("-")
+        if len(prefix) != 8 or not prefix.isdigit() or not rest:
+            return None
+        try:
+            return datetime.strptime(prefix, "%Y%m%d").date()
+        except ValueError:
+            return None
+
+    def _read(self, filename: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.log_dir, filename)
+        if os.path.exists(path):
+            with open(path, "r") as f:
                 return json.load(f)
         return None
 
-    def get_inputs(self, audit_id: str) -> Optional[Dict[str, Any]]:
-        input_path = os.path.join(self.log_dir, f"{audit_id}_inputs.json")
-        if os.path.exists(input_path):
-            with open(input_path, "r") as f:
-                return json.load(f)
+    # Content-addressed raw inputs
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.inputs_dir, digest[:2], f"{digest}.json")
+
+    def refcounts(self) -> Counter:
+        """Live references per inputs hash, replayed from refs.log on first use (this process's view)."""
+        with self._lock:
+            if self._refcounts is None:
+                counts: Counter = Counter()
+                path = os.path.join(self.inputs_dir, self.REFS_FILE)
+                if os.path.exists(path):
+                    with open(path, "r") as f:
+                        for line in f:
+                            digest, _, delta = line.partition(" ")
+                            if delta.strip():
+                                counts[digest] += int(delta)
+                self._refcounts = counts
+            return self._refcounts
+
+    @contextmanager
+    def _refs_lock(self, exclusive: bool = False) -> Iterator[None]:
+        """
+        Cross-process lock on refs.log and the blobs: workers adding or dropping references
+        share it, purge_unreferenced() takes it exclusively.
+        """
+        with open(os.path.join(self.inputs_dir, self.REFS_LOCK), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _append_refs(self, deltas: Counter):
+        """
+        Apply reference deltas to refs.log, and in memory if the counts are loaded (otherwise
+        the next refcounts() replays them); callers hold the lock and the shared refs lock.
+        """
+        if self._refcounts is not None:
+            self._refcounts.update(deltas)
+        with open(os.path.join(self.inputs_dir, self.REFS_FILE), "a") as f:
+            f.write("".join(f"{digest} {delta:+d}\n" for digest, delta in deltas.items() if delta))
+
+    @traced("audit.store_inputs")
+    def _retain(self, raw_inputs: List[Dict[str, Any]]) -> List[str]:
+        """Store and reference inputs in one step, so a concurrent purge never sees them unreferenced."""
+        with self._lock, self._refs_lock():
+            hashes = [self.store_inputs(inputs) for inputs in raw_inputs]
+            self._append_refs(Counter(hashes))
+        return hashes
+
+    def memory_usage(self) -> Dict[str, int]:
+        """The in-memory reference index (empty until refcounts() or a purge loads it)."""
+        with self._lock:
+            counts = self._refcounts
+            return {"entries": len(counts) if counts is not None else 0,
+                    "bytes": container_bytes(counts) if counts is not None else 0}
+
+    def shrink(self, target_bytes: int) -> int:
+        """Drop the reference index; refs.log stays authoritative and is replayed when next needed."""
+        with self._lock:
+            if self._refcounts is None or self.memory_usage()["bytes"] <= target_bytes:
+                return 0
+            dropped, self._refcounts = len(self._refcounts), None
+            return dropped
+
+    def _release_refs(self, hashes: List[str]):
+        with self._lock, self._refs_lock():
+            self._append_refs(Counter({digest: -count for digest, count in Counter(hashes).items()}))
+
+    def store_inputs(self, raw_inputs: Dict[str, Any]) -> str:
+        """Write a raw_inputs blob unless its content is already stored; returns its hash."""
+        digest = inputs_hash(raw_inputs)
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(raw_inputs, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        return digest
+
+    def load_inputs(self, digest: str) -> Optional[Dict[str, Any]]:
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    # Partitions
+
+    def _day_dir(self, root: str, day: date) -> str:
+        return os.path.join(root, day.isoformat())
+
+    def _segments(self, day: date, domain: Optional[str] = None, include_cold: bool = True) -> List[str]:
+        """Existing segment files of one day (optionally one domain), hot before cold."""
+        paths = []
+        for root in ([self.partitions_dir, self.cold_dir] if include_cold else [self.partitions_dir]):
+            day_dir = self._day_dir(root, day)
+            if not os.path.isdir(day_dir):
+                continue
+            for filename in sorted(os.listdir(day_dir)):
+                name = filename[:-len(self.CLOSED_SEGMENT)] if filename.endswith(self.CLOSED_SEGMENT) else \
+                    filename[:-len(self.SEGMENT)] if filename.endswith(self.SEGMENT) else None
+                if name is not None and (domain is None or name == domain.lower()):
+                    paths.append(os.path.join(day_dir, filename))
+        return paths
+
+    def _days(self, root: str, start: Optional[date] = None, end: Optional[date] = None) -> List[date]:
+        if not os.path.isdir(root):
+            return []
+        days = []
+        for name in os.listdir(root):
+            try:
+                day = date.fromisoformat(name)
+            except ValueError:
+                continue
+            if (start is None or day >= start) and (end is None or day <= end):
+                days.append(day)
+        return sorted(days)
+
+    def partitions(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   include_cold: bool = True) -> List[date]:
+        """Days with audit data overlapping [start, end]."""
+        days = set(self._days(self.partitions_dir, _day(start), _day(end)))
+        if include_cold:
+            days.update(self._days(self.cold_dir, _day(start), _day(end)))
+        return sorted(days)
+
+    def _append_target(self, day: date, domain: str) -> str:
+        """
+        Segment that writes for (day, domain) go to; callers hold the lock. Only yesterday and
+        today are remembered: close_partitions() leaves them open by default, so another
+        worker cannot close them underneath; older (late) writes look the segment up each time.
+        """
+        recent = day >= date.today() - timedelta(days=1)
+        path = self._append_targets.get((day, domain)) if recent else None
+        if path is not None:
+            return path
+        closed = [p for p in self._segments(day, domain) if p.endswith(self.CLOSED_SEGMENT)]
+        if closed:
+            # Late write into a closed (possibly cold) day: add a gzip member
+            path = closed[0]
+        else:
+            day_dir = self._day_dir(self.partitions_dir, day)
+            os.makedirs(day_dir, exist_ok=True)
+            path = os.path.join(day_dir, domain + self.SEGMENT)
+        if recent:
+            for key in [key for key in self._append_targets if key[0] < date.today() - timedelta(days=1)]:
+                del self._append_targets[key]
+            self._append_targets[(day, domain)] = path
+        return path
+
+    def _append(self, day: date, lines: Dict[str, List[Dict[str, Any]]]):
+        """Append lines grouped by domain, one write per domain segment."""
+        with self._lock:
+            for domain, domain_lines in lines.items():
+                payload = "".join(json.dumps(line, separators=(",", ":")) + "\n" for line in domain_lines)
+                path = self._append_target(day, domain.lower())
+                with (gzip.open(path, "at") if path.endswith(self.CLOSED_SEGMENT) else open(path, "a")) as f:
+                    f.write(payload)
+
+    @classmethod
+    def _open_segment(cls, path: str):
+        return gzip.open(path, "rt") if path.endswith(cls.CLOSED_SEGMENT) else open(path, "r")
+
+    def _read_segment(self, path: str, needle: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Latest line per audit ID in a segment; released IDs are dropped. `needle` skips unrelated lines."""
+        entries: Dict[str, Dict[str, Any]] = {}
+        with self._open_segment(path) as f:
+            for line in f:
+                if needle is not None and needle not in line:
+                    continue
+                entry = json.loads(line)
+                if entry.get("released"):
+                    entries.pop(entry["audit_id"], None)
+                else:
+                    entries[entry["audit_id"]] = entry
+        return entries
+
+    def _find(self, audit_id: str) -> Optional[Dict[str, Any]]:
+        day = self.partition_date(audit_id)
+        if day is None:
+            return None
+        _, domain = self._split_id(audit_id)
+        for path in self._segments(day, domain):
+            entry = self._read_segment(path, audit_id).get(audit_id)
+            if entry is not None:
+                return entry
         return None
 
+    def close_partitions(self, before: Optional[date] = None) -> int:
+        """
+        Compress open segments of days before `before` (default yesterday, so late writes
+        for yesterday still append in place); returns segments closed. Each segment is
+        claimed with an exclusively created temp file, so workers closing concurrently
+        never compress the same segment twice.
+        """
+        before = before or date.today() - timedelta(days=1)
+        closed = 0
+        for day in self._days(self.partitions_dir, end=before - timedelta(days=1)):
+            for path in self._segments(day, include_cold=False):
+                if path.endswith(self.SEGMENT) and self._close_segment(path):
+                    closed += 1
+        return closed
+
+    def _close_segment(self, path: str) -> bool:
+        target = path[:-len(self.SEGMENT)] + self.CLOSED_SEGMENT
+        claim = target + ".tmp"
+        try:
+            dst = open(claim, "xb")
+        except FileExistsError:
+            if time.time() - os.path.getmtime(claim) < self.STALE_CLOSE_SECONDS:
+                return False
+            os.remove(claim)
+            return self._close_segment(path)
+        with dst:
+            if os.path.exists(target):
+                # Keep the members already there; the segment becomes one more gzip member
+                with open(target, "rb") as existing:
+                    shutil.copyfileobj(existing, dst)
+            with self._lock:
+                if os.path.exists(path):
+                    with open(path, "rb") as src, gzip.open(dst, "ab") as member:
+                        shutil.copyfileobj(src, member)
+                    os.replace(claim, target)
+                    os.remove(path)
+                    self._append_targets.clear()
+                    return True
+        # Another worker closed it first
+        os.remove(claim)
+        return False
+
+    def apply_retention(self, hot_days: int = 30, cold_days: Optional[int] = None, today: Optional[date] = None) -> Dict[str, int]:
+        """
+        Close segments of days before yesterday, move days older than `hot_days` to the cold tier and, with
+        `cold_days`, expire cold days older than that: their entries are deleted and their
+        input references released (run purge_unreferenced() to reclaim the blobs).
+        """
+        today = today or date.today()
+        result = {"closed": self.close_partitions(before=today - timedelta(days=1)), "moved": 0, "expired": 0}
+        with self._lock:
+            self._append_targets.clear()
+            for day in self._days(self.partitions_dir, end=today - timedelta(days=hot_days + 1)):
+                source = self._day_dir(self.partitions_dir, day)
+                target = self._day_dir(self.cold_dir, day)
+                os.makedirs(target, exist_ok=True)
+                for filename in os.listdir(source):
+                    cold_path = os.path.join(target, filename)
+                    if os.path.exists(cold_path):
+                        # Merge into an existing cold segment as extra gzip members
+                        with open(os.path.join(source, filename), "rb") as src, open(cold_path, "ab") as dst:
+                            shutil.copyfileobj(src, dst)
+                        os.remove(os.path.join(source, filename))
+                    else:
+                        os.replace(os.path.join(source, filename), cold_path)
+                os.rmdir(source)
+                result["moved"] += 1
+
+            if cold_days is not None:
+                for day in self._days(self.cold_dir, end=today - timedelta(days=cold_days + 1)):
+                    hashes = [entry["inputs_hash"] for path in self._segments(day)
+                              for entry in self._read_segment(path).values() if entry.get("inputs_hash")]
+                    shutil.rmtree(self._day_dir(self.cold_dir, day))
+                    self._release_refs(hashes)
+                    result["expired"] += 1
+        return result
+
+    # Writing
+
+    @traced("audit.log_recommendation")
+    def log_recommendation(self, recommendation: Recommendation):
+        digest, = self._retain([recommendation.raw_inputs])
+        self._append(recommendation.issued_at.date(), {recommendation.domain: [{
+            "audit_id": recommendation.audit_log_id,
+            "domain": recommendation.domain,
+            "issued_at": recommendation.issued_at.isoformat(),
+            "inputs_hash": digest,
+            "log": recommendation.to_dict(render=False)
+        }]})
+
+    @traced("audit.log_batch")
+    def log_batch(self, batch_id: str, issued_at: datetime, recommendations: Dict[str, Recommendation]):
+        """One line per member recommendation, each in its domain's partition, sharing the batch ID."""
+        hashes = self._retain([rec.raw_inputs for rec in recommendations.values()])
+        lines: Dict[str, List[Dict[str, Any]]] = {}
+        for (domain, rec), digest in zip(recommendations.items(), hashes):
+            lines.setdefault(domain, []).append({
+                "audit_id": self.batch_member_id(batch_id, domain),
+                "batch_id": batch_id,
+                "domain": rec.domain,
+                "issued_at": issued_at.isoformat(),
+                "inputs_hash": digest,
+                "log": rec.to_dict(render=False)
+            })
+        self._append(issued_at.date(), lines)
+
+    def update_log(self, audit_id: str, log: Dict[str, Any]):
+        entry = self._find(audit_id)
+        if entry is not None:
+            self._append(self.partition_date(audit_id), {entry["domain"]: [{**entry, "log": log}]})
+            return
+        with open(os.path.join(self.log_dir, f"{audit_id}.json"), "w") as f:
+            json.dump(log, f, indent=4)
+
+    # Reading
+
+    def get_log(self, audit_id: str) -> Optional[Dict[str, Any]]:
+        if self.partition_date(audit_id) is not None:
+            entry = self._find(audit_id)
+            return entry["log"] if entry else None
+        return self._read(f"{audit_id}.json")
+
+    def get_inputs(self, audit_id: str) -> Optional[Dict[str, Any]]:
+        if self.partition_date(audit_id) is not None:
+            entry = self._find(audit_id)
+            if entry is None:
+                return None
+            return {"domain": entry["domain"], "raw_inputs": self.load_inputs(entry["inputs_hash"]),
+                    "issued_at": entry["issued_at"]}
+        return self._read(f"{audit_id}_inputs.json")
+
+    def iter_entries(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     domain: Optional[str] = None, include_cold: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Partitioned entries issued in [start, end), opening only the segments of overlapping
+        days (and only `domain`'s segment within each).
+        """
+        last_day = _day(end - timedelta(microseconds=1)) if isinstance(end, datetime) else _day(end)
+        for day in self.partitions(start, last_day, include_cold):
+            for path in self._segments(day, domain, include_cold):
+                for entry in self._read_segment(path).values():
+                    issued_at = datetime.fromisoformat(entry["issued_at"])
+                    if (start is None or issued_at >= start) and (end is None or issued_at < end):
+                        yield entry
+
+    def _legacy_files(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with os.scandir(self.log_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    try:
+                        with open(entry.path, "r") as f:
+                            yield entry.name, json.load(f)
+                    except (OSError, ValueError):
+                        continue
+
+    def iter_logs(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  domain: Optional[str] = None, include_cold: bool = True) -> Iterator[Dict[str, Any]]:
+        """Recommendation logs issued in [start, end), optionally for one domain."""
+        for entry in self.iter_entries(start, end, domain, include_cold):
+            yield entry["log"]
+        for filename, entry in self._legacy_files():
+            if filename.endswith("_inputs.json"):
+                continue
+            issued_at = datetime.fromisoformat(entry["issued_at"])
+            if ((domain is None or entry.get("domain", "").lower() == domain.lower())
+                    and (start is None or issued_at >= start) and (end is None or issued_at < end)):
+                yield entry
+
+    def iter_inputs(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    cache_size: int = 4096) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        (domain, raw_inputs) for every audited evaluation in [start, end), streaming one entry
+        at a time. Recently seen blobs are kept in a small cache since deduplicated inputs
+        recur; the yielded dicts may be shared and must not be mutated.
+        """
+        blobs: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        def load(digest: Optional[str]) -> Optional[Dict[str, Any]]:
+            if digest is None:
+                return None
+            if digest not in blobs:
+                if len(blobs) >= cache_size:
+                    blobs.clear()
+                blobs[digest] = self.load_inputs(digest)
+            return blobs[digest]
+
+        for entry in self.iter_entries(start, end):
+            raw_inputs = load(entry.get("inputs_hash"))
+            if raw_inputs is not None:
+                yield entry["domain"], raw_inputs
+
+        for filename, data in self._legacy_files():
+            if not filename.endswith("_inputs.json"):
+                continue
+            issued_at = datetime.fromisoformat(data["issued_at"])
+            if (start is not None and issued_at < start) or (end is not None and issued_at >= end):
+                continue
+            yield data["domain"], data["raw_inputs"]
+
     def get_all_logs(self) -> List[Dict[str, Any]]:
-        logs = []
-        for filename in os.listdir(self.log_dir):
-            if filename.endswith(".json") and not filename.endswith("_inputs.json"):
-                with open(os.path.join(self.log_dir, filename), "r") as f:
-                    logs.append(json.load(f))
-        return logs
+        return list(self.iter_logs())
+
+    # Retention of individual entries
+
+    def release(self, audit_id: str) -> bool:
+        """
+        Delete an audit entry and drop its input references (entries from before partitioning
+        embed their inputs, so their files are simply removed). Blobs stay on disk until
+        purge_unreferenced().
+        """
+        entry = self._find(audit_id)
+        if entry is not None:
+            self._append(self.partition_date(audit_id), {entry["domain"]: [{"audit_id": audit_id, "released": True}]})
+            self._release_refs([entry["inputs_hash"]])
+            return True
+
+        removed = False
+        for filename in (f"{audit_id}.json", f"{audit_id}_inputs.json"):
+            path = os.path.join(self.log_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+                removed = True
+        return removed
+
+    def purge_unreferenced(self) -> int:
+        """
+        Delete input blobs no audit entry references and compact refs.log; returns blobs removed.
+        Other workers may keep writing: the purge holds the refs lock exclusively (flock, so the
+        log directory must be on a local filesystem) and recounts from refs.log on disk rather
+        than trusting this process's cached counts.
+        """
+        with self._lock, self._refs_lock(exclusive=True):
+            self._refcounts = None
+            counts = self.refcounts()
+            live = {digest: count for digest, count in counts.items() if count > 0}
+            removed = 0
+            for digest in [d for d, count in counts.items() if count <= 0]:
+                path = self._blob_path(digest)
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed += 1
+            refs_path = os.path.join(self.inputs_dir, self.REFS_FILE)
+            with open(refs_path + ".tmp", "w") as f:
+                f.write("".join(f"{digest} {count:+d}\n" for digest, count in live.items()))
+            os.replace(refs_path + ".tmp", refs_path)
+            self._refcounts = Counter(live)
+        return removed
 
 class Reconstructor:
     def __init__(self, platform):
@@ -57,14 +541,20 @@ class Reconstructor:
         domain = input_data["domain"]
         raw_inputs = input_data["raw_inputs"]
         
-        # Re-run the engine with the same inputs
-        reconstructed_rec = self.platform.get_recommendation(domain, raw_inputs)
+        # Re-run the engine with the same inputs (not audited again)
+        engine = self.platform.engines[domain.lower()]
+        reconstructed_rec = engine.generate_recommendation(raw_inputs)
+        reconstructed = reconstructed_rec.to_dict(render=False)
         
-        # Compare with original log
+        # Compare with original log in compact form; logs written before templating hold rendered text
         original_log = self.audit_logger.get_log(audit_id)
+        original_explain = original_log["explainability"]
+        explanation_match = (original_explain == reconstructed["explainability"]
+                             or render_explainability(original_explain) == render_explainability(reconstructed["explainability"]))
         
         return {
-            "original": original_log,
-            "reconstructed": reconstructed_rec,
-            "match": reconstructed_rec["base_recommendation"] == original_log["base_recommendation"]
+            "original": render_log(original_log),
+            "reconstructed": reconstructed_rec.to_dict(),
+            "match": reconstructed["base_recommendation"] == original_log["base_recommendation"],
+            "explanation_match": explanation_match
         }
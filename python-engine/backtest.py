@@ -0,0 +1,270 @@
+"""
+Season backtests: replay the planting, irrigation and harvest engines over stored historical
+weather for many fields at once.
+
+The runner steps through the season in fixed heartbeat steps. Per-field state (soil water
+balance, growing degree days, previous readings for trends, planted / harvested status) is
+carried forward in arrays, and every step evaluates all fields with the vectorized
+evaluators. Irrigation NOW decisions are applied back into the water balance, so the replay
+is closed-loop. Nothing is audited.
+"""
+import numpy as np
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence
+from farmsense.data.ingestion import DataValidator
+from farmsense.data.thresholds import POTATO_THRESHOLDS
+from farmsense.data.water_balance import SoilWaterBalance
+from farmsense.data.gdd import GrowingDegreeDays
+from farmsense.data.weather_store import WeatherStore, to_hour, hour_to_iso
+from farmsense.domains.vectorized import evaluate_planting, evaluate_irrigation, evaluate_harvest, DECISION_LABELS, NOW
+from farmsense.core.horizon import PRECIP_WINDOW_HOURS
+
+BACKTEST_DOMAINS = ("planting", "irrigation", "harvest")
+# Timeline code for steps where a domain does not apply (before planting, after harvest).
+INACTIVE = -1
+DEFAULT_IRRIGATION_MM = 25.0
+_NEVER = np.iinfo(np.int64).max
+
+class BacktestResult:
+    """Decision timelines ([fields, steps] int8 codes per domain) and per-field season outcomes."""
+
+    def __init__(self, field_ids: List[str], start_hour: int, step_hours: int, decisions: Dict[str, np.ndarray],
+                 emergency: Dict[str, np.ndarray], planted_step: np.ndarray, harvested_step: np.ndarray,
+                 irrigation_events: np.ndarray, irrigation_mm: np.ndarray, min_awc: np.ndarray, critical_steps: np.ndarray):
+        self.field_ids = field_ids
+        self.start_hour = start_hour
+        self.step_hours = step_hours
+        self.decisions = decisions
+        self.emergency = emergency
+        self.planted_step = planted_step
+        self.harvested_step = harvested_step
+        self.irrigation_events = irrigation_events
+        self.irrigation_mm = irrigation_mm
+        self.min_awc = min_awc
+        self.critical_steps = critical_steps
+
+    @property
+    def steps(self) -> int:
+        return self.decisions[BACKTEST_DOMAINS[0]].shape[1]
+
+    def step_time(self, step: int) -> str:
+        """Time of the heartbeat that ends a step."""
+        return hour_to_iso(self.start_hour + (step + 1) * self.step_hours - 1)
+
+    def timeline(self, field_id: str, domain: str) -> List[Dict[str, Any]]:
+        """Run-length segments of one field's decisions for a domain."""
+        row = self.field_ids.index(field_id)
+        codes = self.decisions[domain][row]
+        emergency = self.emergency[domain][row]
+        change = np.flatnonzero((np.diff(codes) != 0) | (np.diff(emergency) != 0)) + 1
+        starts = np.concatenate([[0], change])
+        ends = np.concatenate([change, [codes.size]])
+        return [
+            {
+                "start_time": self.step_time(int(s)),
+                "steps": int(e - s),
+                "recommendation": "INACTIVE" if codes[s] == INACTIVE else DECISION_LABELS[int(codes[s])],
+                "emergency": bool(emergency[s]),
+            }
+            for s, e in zip(starts, ends)
+        ]
+
+    def _step_times(self, steps: np.ndarray) -> List[Optional[str]]:
+        return [None if s < 0 else self.step_time(int(s)) for s in steps]
+
+    def summary(self) -> Dict[str, Any]:
+        """KPI summary per domain across all fields."""
+        domains = {}
+        for domain in BACKTEST_DOMAINS:
+            codes = self.decisions[domain]
+            active = codes != INACTIVE
+            domains[domain] = {
+                "decision_steps": {DECISION_LABELS[c]: int((codes == c).sum()) for c in DECISION_LABELS},
+                "active_steps": int(active.sum()),
+                "emergency_steps": int(self.emergency[domain].sum()),
+                "fields_reaching_now": int((codes == NOW).any(axis=1).sum()),
+            }
+
+        planted = self.planted_step >= 0
+        harvested = self.harvested_step >= 0
+        season_days = (self.harvested_step - self.planted_step)[planted & harvested] * self.step_hours / 24
+        domains["planting"]["fields_planted"] = int(planted.sum())
+        domains["irrigation"].update({
+            "irrigation_events": int(self.irrigation_events.sum()),
+            "mean_events_per_field": round(float(self.irrigation_events.mean()), 2) if self.field_ids else 0.0,
+            "applied_mm": round(float(self.irrigation_mm.sum()), 1),
+            "hours_below_critical_awc": int(self.critical_steps.sum()) * self.step_hours,
+            "lowest_awc": round(float(np.nanmin(self.min_awc)), 2) if np.isfinite(self.min_awc).any() else None,
+        })
+        domains["harvest"].update({
+            "fields_harvested": int(harvested.sum()),
+            "median_season_days": round(float(np.median(season_days)), 1) if season_days.size else None,
+        })
+        return domains
+
+    def fields(self) -> Dict[str, Dict[str, Any]]:
+        planted_at = self._step_times(self.planted_step)
+        harvested_at = self._step_times(self.harvested_step)
+        return {
+            field_id: {
+                "planted_at": planted_at[i],
+                "harvested_at": harvested_at[i],
+                "irrigation_events": int(self.irrigation_events[i]),
+                "irrigation_mm": round(float(self.irrigation_mm[i]), 1),
+                "min_awc": round(float(self.min_awc[i]), 2) if np.isfinite(self.min_awc[i]) else None,
+            }
+            for i, field_id in enumerate(self.field_ids)
+        }
+
+    def to_dict(self, timelines: bool = False) -> Dict[str, Any]:
+        result = {
+            "start_time": hour_to_iso(self.start_hour),
+            "end_time": self.step_time(self.steps - 1),
+            "step_hours": self.step_hours,
+            "steps": self.steps,
+            "field_count": len(self.field_ids),
+            "summary": self.summary(),
+            "fields": self.fields(),
+        }
+        if timelines:
+            result["timelines"] = {
+                field_id: {domain: self.timeline(field_id, domain) for domain in BACKTEST_DOMAINS}
+                for field_id in self.field_ids
+            }
+        return result
+
+def _planted_hour(value: Any) -> int:
+    if value is None:
+        return _NEVER
+    if isinstance(value, datetime):
+        value = value.replace(tzinfo=None)
+    return to_hour(value)
+
+def run_backtest(store: WeatherStore, fields: Sequence[Dict[str, Any]], start: datetime, end: datetime,
+                 step_hours: int = 1, irrigation_mm: Optional[float] = DEFAULT_IRRIGATION_MM,
+                 thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> BacktestResult:
+    """
+    Replay [start, end) for every field. Each field is a dict with "field_id", "lat", "lon"
+    and optionally "planted_at" (otherwise it is planted at the first planting NOW), "awc"
+    (otherwise the stored soil moisture at `start`) and "taw_mm". Weather is read once per
+    grid cell; the precipitation and water-balance look-ahead use the stored hours that follow
+    (a perfect forecast), truncated at `end`. `irrigation_mm=None` disables applying
+    irrigation NOW decisions.
+    """
+    if step_hours < 1:
+        raise ValueError("step_hours must be at least 1.")
+    start_hour = to_hour(start.replace(tzinfo=None) if isinstance(start, datetime) else start)
+    end_hour = to_hour(end.replace(tzinfo=None) if isinstance(end, datetime) else end)
+    steps = (end_hour - start_hour) // step_hours
+    if steps < 1 or not fields:
+        raise ValueError("A backtest needs at least one field and one step.")
+    hours = steps * step_hours
+
+    field_ids = [str(f["field_id"]) for f in fields]
+    if len(set(field_ids)) != len(field_ids):
+        raise ValueError("Backtest field_ids must be unique.")
+    cell_ids = [store.cell_id(f["lat"], f["lon"]) for f in fields]
+    cells, cell_of_field = np.unique(cell_ids, return_inverse=True)
+
+    # One read per grid cell: [cells, hours] columns, padded with dry hours for the look-ahead
+    horizon = int(thresholds["water_balance"]["projection_hours"])
+    first_field = {cell: i for i, cell in reversed(list(enumerate(cell_ids)))}
+    weather = {name: np.zeros((len(cells), hours + horizon)) for name in ("temp", "soil_temp", "moisture", "et0", "precip")}
+    for c, cell in enumerate(cells):
+        f = fields[first_field[cell]]
+        columns = store.read(f["lat"], f["lon"], start_hour, start_hour + hours)
+        weather["temp"][c, :hours] = columns["temperature_2m"]
+        weather["soil_temp"][c, :hours] = columns["soil_temperature_6cm"]
+        weather["moisture"][c, :hours] = columns["soil_moisture_3_to_9cm"]
+        weather["et0"][c, :hours] = np.nan_to_num(columns["et0_fao_evapotranspiration"])
+        weather["precip"][c, :hours] = np.nan_to_num(columns["precipitation"])
+    cumulative = np.concatenate([np.zeros((len(cells), 1)), np.cumsum(weather["precip"], axis=1)], axis=1)
+    window = np.arange(hours)
+    precip_forecast = cumulative[:, window + PRECIP_WINDOW_HOURS] - cumulative[:, window]
+
+    n = len(fields)
+    rows = np.arange(n)
+    water_balance = SoilWaterBalance(thresholds)
+    gdd = GrowingDegreeDays(None, thresholds)
+    measured = np.nan_to_num(weather["moisture"][cell_of_field, 0], nan=0.2) / DataValidator.FULL_AWC_VOLUMETRIC * 100
+    for i, f in enumerate(fields):
+        awc = f.get("awc")
+        water_balance.register(field_ids[i], float(measured[i] if awc is None else awc), start_hour - 1, f.get("taw_mm"))
+        gdd.register(field_ids[i], _NEVER)
+
+    kc_by_stage = water_balance.crop_coefficients(gdd.stages)
+    maturity = gdd.stages.index("MATURITY")
+    planted_hour = np.asarray([_planted_hour(f.get("planted_at")) for f in fields], dtype=np.int64)
+    scheduled = planted_hour != _NEVER
+    planted_step = np.full(n, -1, dtype=np.int64)
+    harvested_step = np.full(n, -1, dtype=np.int64)
+    # Fields planted before the window accumulate GDD from the window start
+    gdd.last_hour[:n][scheduled & (planted_hour < start_hour)] = start_hour - 1
+    planted_step[scheduled & (planted_hour < start_hour)] = 0
+
+    decisions = {domain: np.full((n, steps), INACTIVE, dtype=np.int8) for domain in BACKTEST_DOMAINS}
+    emergency = {domain: np.zeros((n, steps), dtype=bool) for domain in BACKTEST_DOMAINS}
+    irrigation_events = np.zeros(n, dtype=np.int64)
+    applied_mm = np.zeros(n)
+    min_awc = np.full(n, np.inf)
+    critical_steps = np.zeros(n, dtype=np.int64)
+    critical_awc = thresholds["irrigation"]["critical_awc"]
+    all_hours = start_hour + np.arange(hours)
+    prev_awc = water_balance.awc()
+
+    for step in range(steps):
+        a, b = step * step_hours, (step + 1) * step_hours
+        now_hour = start_hour + b - 1
+        until = np.full(n, now_hour, dtype=np.int64)
+
+        # Fields whose scheduled planting falls in this step start accumulating from it
+        sowing = scheduled & (planted_step < 0) & (planted_hour <= now_hour)
+        gdd.last_hour[:n][sowing] = np.maximum(planted_hour[sowing], start_hour) - 1
+        planted_step[sowing] = step
+
+        kc = kc_by_stage[gdd.stage_codes()]
+        water_balance.advance(rows, weather["et0"][cell_of_field, a:b], weather["precip"][cell_of_field, a:b],
+                              kc, np.ones((n, b - a), dtype=bool), until)
+        gdd.update(rows, all_hours[None, a:b], weather["temp"][cell_of_field, a:b], until)
+
+        awc = water_balance.awc()
+        soil_temp = weather["soil_temp"][cell_of_field, b - 1]
+        prev_soil_temp = weather["soil_temp"][cell_of_field, b - 2] if b >= 2 else np.full(n, np.nan)
+        planted = planted_step >= 0
+        growing = planted & (harvested_step < 0)
+
+        unplanted = ~planted & ~scheduled
+        planting = evaluate_planting({"soil_temp": soil_temp, "prev_soil_temp": prev_soil_temp}, thresholds)
+        decisions["planting"][unplanted, step] = planting.base[unplanted]
+        sown = unplanted & (planting.base == NOW)
+        gdd.last_hour[:n][sown] = now_hour
+        planted_step[sown] = step
+
+        projected = water_balance.project(rows, weather["et0"][cell_of_field, b:b + horizon],
+                                          weather["precip"][cell_of_field, b:b + horizon], kc)
+        irrigation = evaluate_irrigation({
+            "awc": awc,
+            "prev_awc": prev_awc,
+            "projected_awc": projected,
+            "depletion_rate": water_balance.depletion_rate[:n],
+            "precipitation_forecast": precip_forecast[cell_of_field, b - 1],
+        }, thresholds)
+        decisions["irrigation"][growing, step] = irrigation.base[growing]
+        emergency["irrigation"][growing, step] = irrigation.emergency[growing]
+        irrigate = growing & (irrigation.base == NOW)
+        irrigation_events += irrigate
+        if irrigation_mm:
+            water_balance.pending_irrigation_mm[:n][irrigate] += irrigation_mm
+            applied_mm[irrigate] += irrigation_mm
+        min_awc = np.where(growing, np.minimum(min_awc, awc), min_awc)
+        critical_steps += growing & (awc < critical_awc)
+
+        harvest = evaluate_harvest({"skin_set": gdd.stage_codes() == maturity, "soil_temp": soil_temp}, thresholds)
+        decisions["harvest"][growing, step] = harvest.base[growing]
+        harvested_step[growing & (harvest.base == NOW)] = step
+
+        prev_awc = awc
+
+    min_awc[np.isinf(min_awc)] = np.nan
+    return BacktestResult(field_ids, start_hour, step_hours, decisions, emergency, planted_step, harvested_step,
+                          irrigation_events, applied_mm, min_awc, critical_steps)
@@ -0,0 +1,213 @@
+import heapq
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from farmsense.core.engine import Recommendation
+from farmsense.core.memory import container_bytes
+
+CacheKey = Tuple[str, str]
+
+class ActiveRecommendationCache:
+    """
+    Still-valid recommendations keyed by (field_id, domain).
+
+    An entry is reused while its valid_until lies in the future and the normalized inputs
+    the engine reads (its raw_inputs) are unchanged. Expiry is tracked in a min-heap of
+    (valid_until, key); superseded heap items are skipped lazily when they surface, and the
+    heap is rebuilt once they outnumber the live entries.
+    `on_expire(field_id, domain, recommendation)` is called for each entry that expires.
+    """
+    HEAP_SLACK = 64
+
+    def __init__(self, on_expire: Optional[Callable[[str, str, Recommendation], None]] = None):
+        self.on_expire = on_expire
+        self.entries: Dict[CacheKey, Recommendation] = {}
+        self.expiry_heap: List[Tuple[datetime, CacheKey]] = []
+        self.by_audit_id: Dict[str, CacheKey] = {}
+        self._lock = threading.Lock()
+
+    def get(self, field_id: str, domain: str, inputs: Dict[str, Any], now: Optional[datetime] = None) -> Optional[Recommendation]:
+        """
+        Cached recommendation for this field and domain, or None on expiry or input change.
+        `inputs` is the normalized record the engine would store as raw_inputs.
+        """
+        key = (field_id, domain)
+        with self._lock:
+            self._evict_expired(now or datetime.now())
+            recommendation = self.entries.get(key)
+            if recommendation is None:
+                return None
+            if recommendation.raw_inputs != inputs:
+                self._remove(key)
+                return None
+            return recommendation
+
+    def put(self, field_id: str, domain: str, recommendation: Recommendation) -> None:
+        key = (field_id, domain)
+        with self._lock:
+            self._remove(key)
+            self.entries[key] = recommendation
+            self.by_audit_id[recommendation.audit_log_id] = key
+            heapq.heappush(self.expiry_heap, (recommendation.valid_until, key))
+            if len(self.expiry_heap) > 2 * len(self.entries) + self.HEAP_SLACK:
+                self._compact_heap()
+
+    def invalidate(self, field_id: str, domain: Optional[str] = None) -> int:
+        """Drop one domain (or every domain) for a field; returns the number of entries removed."""
+        with self._lock:
+            keys = [k for k in self.entries if k[0] == field_id and (domain is None or k[1] == domain)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def confirm(self, audit_id: str, confirmed_at: str) -> None:
+        """Mirror an emergency confirmation onto the cached recommendation, if still active."""
+        with self._lock:
+            key = self.by_audit_id.get(audit_id)
+            if key in self.entries:
+                self.entries[key].confirmed_at = confirmed_at
+
+    def due(self, horizon: timedelta, now: Optional[datetime] = None) -> Tuple[List[CacheKey], List[CacheKey]]:
+        """
+        Split active entries into (due, skippable) for the next heartbeat `horizon`. An entry
+        is skippable only if it outlives the horizon and its decision margin cannot plausibly
+        be used up on the current trends before then.
+        """
+        until = (now or datetime.now()) + horizon
+        hours = horizon.total_seconds() / 3600
+        due, skippable = [], []
+        with self._lock:
+            for key, recommendation in self.entries.items():
+                margin = recommendation.decision_margin
+                if recommendation.valid_until > until and margin is not None and margin.outlasts(hours):
+                    skippable.append(key)
+                else:
+                    due.append(key)
+        return due, skippable
+
+    def next_expiry(self) -> Optional[datetime]:
+        with self._lock:
+            return self.expiry_heap[0][0] if self.expiry_heap else None
+
+    def evict_expired(self, now: Optional[datetime] = None) -> List[CacheKey]:
+        with self._lock:
+            return self._evict_expired(now or datetime.now())
+
+    def _evict_expired(self, now: datetime) -> List[CacheKey]:
+        evicted = []
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            valid_until, key = heapq.heappop(self.expiry_heap)
+            recommendation = self.entries.get(key)
+            # Skip heap items left behind by a replaced or invalidated entry
+            if recommendation is not None and recommendation.valid_until == valid_until:
+                self._remove(key)
+                evicted.append(key)
+                if self.on_expire is not None:
+                    self.on_expire(key[0], key[1], recommendation)
+        return evicted
+
+    def _remove(self, key: CacheKey) -> None:
+        recommendation = self.entries.pop(key, None)
+        if recommendation is not None:
+            self.by_audit_id.pop(recommendation.audit_log_id, None)
+
+    def _compact_heap(self) -> None:
+        self.expiry_heap = [(rec.valid_until, key) for key, rec in self.entries.items()]
+        heapq.heapify(self.expiry_heap)
+
+    def memory_usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self.entries), "heap_items": len(self.expiry_heap),
+                    "bytes": container_bytes(self.entries) + container_bytes(self.by_audit_id) + container_bytes(self.expiry_heap)}
+
+    def shrink(self, target_bytes: int) -> int:
+        """
+        Drop the entries closest to expiry until the estimate fits `target_bytes` (no expiry
+        events: the next request for a dropped field simply re-evaluates).
+        """
+        usage = self.memory_usage()
+        with self._lock:
+            if usage["bytes"] <= target_bytes or not self.entries:
+                return 0
+            keep = int(len(self.entries) * target_bytes / usage["bytes"])
+            dropped = heapq.nsmallest(len(self.entries) - keep, self.entries, key=lambda k: self.entries[k].valid_until)
+            for key in dropped:
+                self._remove(key)
+            self._compact_heap()
+            return len(dropped)
+
+    def snapshot_state(self) -> Tuple[Dict[str, Any], List[List[Any]]]:
+        with self._lock:
+            return {}, [[field_id, domain, rec.to_state()] for (field_id, domain), rec in self.entries.items()]
+
+    def restore_state(self, arrays: Dict[str, Any], entries: List[List[Any]], now: Optional[datetime] = None) -> None:
+        """Re-add snapshotted entries that are still valid."""
+        now = now or datetime.now()
+        for field_id, domain, state in entries:
+            recommendation = Recommendation.from_state(state)
+            if recommendation.valid_until > now:
+                self.put(field_id, domain, recommendation)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+class ETagIndex:
+    """
+    Bounded LRU of input hash -> (ETag, valid_until). Lets a conditional request be answered
+    from a hash of its inputs alone, before any engine runs or anything is serialized.
+    """
+    DEFAULT_MAX_ENTRIES = 4096
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[str, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, input_hash: str, now: Optional[datetime] = None) -> Optional[str]:
+        with self._lock:
+            entry = self.entries.get(input_hash)
+            if entry is None:
+                return None
+            if entry[1] <= (now or datetime.now()):
+                del self.entries[input_hash]
+                return None
+            self.entries.move_to_end(input_hash)
+            return entry[0]
+
+    def put(self, input_hash: str, etag: str, valid_until: datetime) -> None:
+        with self._lock:
+            self.entries[input_hash] = (etag, valid_until)
+            self.entries.move_to_end(input_hash)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def memory_usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self.entries), "bytes": container_bytes(self.entries)}
+
+    def shrink(self, target_bytes: int) -> int:
+        """Drop least recently used tags until the estimate fits `target_bytes`."""
+        usage = self.memory_usage()
+        with self._lock:
+            if usage["bytes"] <= target_bytes or not self.entries:
+                return 0
+            dropped = len(self.entries) - int(len(self.entries) * target_bytes / usage["bytes"])
+            for _ in range(dropped):
+                self.entries.popitem(last=False)
+            return dropped
+
+    def snapshot_state(self) -> Tuple[Dict[str, Any], List[List[str]]]:
+        with self._lock:
+            return {}, [[input_hash, etag, valid_until.isoformat()] for input_hash, (etag, valid_until) in self.entries.items()]
+
+    def restore_state(self, arrays: Dict[str, Any], entries: List[List[str]], now: Optional[datetime] = None) -> None:
+        """Re-add unexpired tags in their least-to-most recently used order."""
+        now = now or datetime.now()
+        for input_hash, etag, valid_until in entries:
+            valid_until = datetime.fromisoformat(valid_until)
+            if valid_until > now:
+                self.put(input_hash, etag, valid_until)
+
+    def __len__(self) -> int:
+        return len(self.entries)
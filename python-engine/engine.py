@@ -2,6 +2,12 @@ from enum import Enum
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 import uuid
+from farmsense.core.explanations import compact_explainability, render_explainability
+from farmsense.core.margins import DecisionMargin
+
+def new_audit_id(issued_at: datetime) -> str:
+    """Audit IDs lead with the issue date so the audit log can locate their partition."""
+    return f"{issued_at:%Y%m%d}-{uuid.uuid4()}"
 
 class BaseRecommendation(Enum):
     NOW = "NOW"
@@ -31,9 +37,13 @@ class Recommendation:
         predicted_next: Optional[BaseRecommendation] = None,
         valid_duration_hours: int = 4,
         raw_inputs: Dict[str, Any] = None,
-        kpis: Dict[str, Any] = None
+        kpis: Dict[str, Any] = None,
+        issued_at: Optional[datetime] = None,
+        audit_log_id: Optional[str] = None,
+        decision_margin: Optional[Any] = None
     ):
-        self.issued_at = datetime.now()
+        # Fused multi-domain evaluations share one timestamp and batch audit ID
+        self.issued_at = issued_at or datetime.now()
         self.valid_until = self.issued_at + timedelta(hours=valid_duration_hours)
         self.domain = domain
         # Enforce unified base recommendation: NOW, SOON, LATER, WAIT, MONITOR
@@ -56,8 +66,9 @@ class Recommendation:
         
         self.kpis = kpis or {} # Linked KPIs (e.g., water_efficiency, stress_avoidance)
         self.predicted_next_recommendation = predicted_next.value if predicted_next else None
-        self.audit_log_id = str(uuid.uuid4())
+        self.audit_log_id = audit_log_id or new_audit_id(self.issued_at)
         self.raw_inputs = raw_inputs or {} # For reconstruction
+        self.decision_margin = decision_margin # Distance (and time) to the nearest decision boundary
 
     def confirm_emergency(self):
         if self.requires_human_confirmation:
@@ -75,7 +86,11 @@ class Recommendation:
         minutes, seconds = divmod(remainder, 60)
         return f"{hours:02}:{minutes:02}:{seconds:02}"
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, render: bool = True) -> Dict[str, Any]:
+        """
+        Client form by default. With render=False explainability stays as compact
+        [template_id, params] items, which is what the audit log stores.
+        """
         # Urgency signaling based on base recommendation
         urgency_map = {
             "NOW": "HIGH",
@@ -111,12 +126,52 @@ class Recommendation:
             "severity_overlays": self.severity_overlays,
             "requires_human_confirmation": self.requires_human_confirmation,
             "confirmed_at": self.confirmed_at,
-            "explainability": self.explainability,
+            "explainability": render_explainability(self.explainability) if render else compact_explainability(self.explainability),
             "kpis": self.kpis,
             "predicted_next_recommendation": self.predicted_next_recommendation,
+            "decision_margin": self.decision_margin.to_dict() if self.decision_margin is not None else None,
             "audit_log_id": self.audit_log_id
         }
 
+    def to_state(self) -> Dict[str, Any]:
+        """Everything needed to rebuild this object exactly (runtime snapshots), explainability in compact form."""
+        return {
+            "domain": self.domain,
+            "issued_at": self.issued_at.isoformat(),
+            "valid_until": self.valid_until.isoformat(),
+            "base_recommendation": self.base_recommendation,
+            "context_flags": self.context_flags,
+            "severity_overlays": self.severity_overlays,
+            "confirmed_at": self.confirmed_at,
+            "explainability": compact_explainability(self.explainability),
+            "kpis": self.kpis,
+            "predicted_next_recommendation": self.predicted_next_recommendation,
+            "audit_log_id": self.audit_log_id,
+            "raw_inputs": self.raw_inputs,
+            "decision_margin": self.decision_margin.to_state() if self.decision_margin is not None else None,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "Recommendation":
+        issued_at = datetime.fromisoformat(state["issued_at"])
+        valid_until = datetime.fromisoformat(state["valid_until"])
+        predicted = state["predicted_next_recommendation"]
+        rec = cls(
+            state["domain"], BaseRecommendation(state["base_recommendation"]),
+            context_flags=[ContextFlag(f) for f in state["context_flags"]],
+            severity_overlays=[SeverityOverlay(o) for o in state["severity_overlays"]],
+            explainability=state["explainability"],
+            predicted_next=BaseRecommendation(predicted) if predicted else None,
+            raw_inputs=state["raw_inputs"],
+            kpis=state["kpis"],
+            issued_at=issued_at,
+            audit_log_id=state["audit_log_id"],
+            decision_margin=DecisionMargin.from_state(state["decision_margin"]) if state["decision_margin"] is not None else None,
+        )
+        rec.valid_until = valid_until
+        rec.confirmed_at = state["confirmed_at"]
+        return rec
+
 class DomainEngine:
     def __init__(self, domain_name: str):
         self.domain_name = domain_name
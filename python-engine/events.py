@@ -0,0 +1,123 @@
+import asyncio
+import itertools
+import threading
+from typing import Dict, Any, List, Optional, Set, Tuple, Collection
+from farmsense.core.memory import container_bytes
+
+DEFAULT_BUFFER_SIZE = 256
+
+RECOMMENDATION_CHANGED = "recommendation_changed"
+EMERGENCY = "emergency"
+EXPIRED = "expired"
+OVERFLOW = "overflow"
+
+class Subscription:
+    """
+    One subscriber's bounded event buffer. When the client falls behind, the oldest event
+    is dropped and an overflow event tells it how many were lost so it can resync.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, field_id: Optional[str] = None,
+                 domains: Optional[Collection[str]] = None, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.loop = loop
+        self.field_id = field_id
+        self.domains = set(domains) if domains else None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        if self.field_id is not None and event["field_id"] != self.field_id:
+            return False
+        return self.domains is None or event["domain"] in self.domains
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """Enqueue without blocking the publisher; runs on the subscriber's event loop."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def next_event(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event, an overflow notice if events were dropped, or None on timeout."""
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return {"event": OVERFLOW, "dropped": dropped}
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class RecommendationEventBus:
+    """
+    Fan-out of per-field/domain recommendation changes to any number of subscribers.
+
+    publish() is safe to call from worker threads: each event is handed to the subscriber's
+    loop with call_soon_threadsafe, so producers never wait on slow clients. The bus keeps
+    the last decision per (field_id, domain) and only publishes when it changes.
+    """
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.subscribers: Set[Subscription] = set()
+        self.last_state: Dict[Tuple[str, str], Tuple[Any, ...]] = {}
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, field_id: Optional[str] = None, domains: Optional[Collection[str]] = None) -> Subscription:
+        """Register a subscriber on the running event loop."""
+        subscription = Subscription(asyncio.get_running_loop(), field_id, domains, self.buffer_size)
+        with self._lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self.subscribers.discard(subscription)
+
+    def publish(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            event["id"] = next(self._sequence)
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            if subscription.wants(event):
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.offer, event)
+                except RuntimeError:
+                    # Subscriber's loop has closed; it will never read again
+                    self.unsubscribe(subscription)
+        return event
+
+    def observe(self, field_id: str, domain: str, recommendation: Dict[str, Any]) -> None:
+        """Publish change and new-EMERGENCY events for a freshly issued recommendation."""
+        state = (recommendation["base_recommendation"], tuple(recommendation["severity_overlays"]),
+                 tuple(recommendation["context_flags"]))
+        with self._lock:
+            previous = self.last_state.get((field_id, domain))
+            self.last_state[(field_id, domain)] = state
+        if previous == state:
+            return
+
+        event = {"field_id": field_id, "domain": domain, "recommendation": recommendation,
+                 "previous_recommendation": previous[0] if previous else None}
+        self.publish({"event": RECOMMENDATION_CHANGED, **event})
+        if "EMERGENCY" in state[1] and (previous is None or "EMERGENCY" not in previous[1]):
+            self.publish({"event": EMERGENCY, **event})
+
+    def snapshot_state(self) -> Tuple[Dict[str, Any], List[List[Any]]]:
+        with self._lock:
+            return {}, [[field_id, domain, state[0], list(state[1]), list(state[2])]
+                        for (field_id, domain), state in self.last_state.items()]
+
+    def memory_usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self.last_state), "subscribers": len(self.subscribers),
+                    "bytes": container_bytes(self.last_state)}
+
+    def restore_state(self, arrays: Dict[str, Any], states: List[List[Any]]) -> None:
+        """Last decisions, so a restart does not re-announce unchanged recommendations."""
+        with self._lock:
+            for field_id, domain, base, overlays, flags in states:
+                self.last_state[(field_id, domain)] = (base, tuple(overlays), tuple(flags))
+
+    def expire(self, field_id: str, domain: str, audit_log_id: str) -> None:
+        with self._lock:
+            self.last_state.pop((field_id, domain), None)
+        self.publish({"event": EXPIRED, "field_id": field_id, "domain": domain, "audit_log_id": audit_log_id})
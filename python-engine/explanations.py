@@ -0,0 +1,105 @@
+"""
+Explainability as template IDs plus parameters.
+
+Engines record which sentence applies and the numbers in it; the English text is only
+formatted when a recommendation is rendered for a client or report. Audit records store
+the compact form [template_id, params], which is also what replays compare.
+"""
+from typing import Dict, Any, List, Mapping, Sequence, Union
+
+TEMPLATES: Dict[str, str] = {
+    # Planning
+    "planning.market_data_ready": "Market data is ready for final planning.",
+    "planning.trend.market_data": "Market data availability",
+    # Field prep
+    "field_prep.precip_delay": "Precipitation forecast ({precip_forecast}mm) exceeds the 5mm threshold for field work.",
+    "field_prep.dry_and_compacted": "Soil moisture ({awc}%) is low and compaction ({compaction}) is high, requiring immediate preparation.",
+    "field_prep.trend.soil": "Soil moisture and compaction trends",
+    # Planting
+    "planting.in_window": "Soil temperature ({soil_temp}°C) is within the optimal planting range ({min_soil_temp}°C to {max_soil_temp}°C).",
+    "planting.warming": "Soil temperature ({soil_temp}°C) is warming toward the minimum planting threshold ({min_soil_temp}°C).",
+    "planting.trend.soil_temp": "Soil temperature is {trend}",
+    # Irrigation
+    "irrigation.below_critical": "Available Water Content ({awc}%) has dropped below the critical threshold ({critical_awc}%).",
+    "irrigation.emergency": "Available Water Content ({awc}%) is at a dangerous level (below {emergency_awc}%).",
+    "irrigation.nearing_critical": "Available Water Content ({awc}%) is nearing the critical irrigation threshold ({critical_awc}%).",
+    "irrigation.projected_critical": "Projected Available Water Content ({projected_awc}%) falls below the critical threshold ({critical_awc}%) within the projection window.",
+    "irrigation.trend.awc": "Available Water Content is {trend}",
+    # Nutrient
+    "nutrient.below_target": "Nitrogen level ({n_level}) is below the target ({target}) for the {stage} stage.",
+    "nutrient.approaching_target": "Nitrogen level ({n_level}) is approaching the target ({target}).",
+    "nutrient.trend.nitrogen": "Nitrogen level is {trend}",
+    # Pest and weed
+    "pest_weed.pest_count": "Pest count ({pest_count}) exceeds the threshold ({pest_count_threshold}).",
+    "pest_weed.humidity": "Humidity ({humidity}%) exceeds the disease risk threshold ({humidity_threshold}%).",
+    "pest_weed.emergency": "Pest count ({pest_count}) is at an emergency level (above {emergency_pest_count}).",
+    "pest_weed.increasing": "Pest count ({pest_count}) is increasing toward the threshold ({pest_count_threshold}).",
+    "pest_weed.trend.pest_count": "Pest count is {trend}",
+    # Harvest
+    "harvest.ready": "Skin set is complete and soil temperature is optimal for harvest.",
+    "harvest.trend.maturity": "Maturity and soil temp trends",
+    # Post-harvest
+    "processing.queue_high": "Processing queue ({queue}) exceeds the high-priority threshold (50).",
+    "processing.trend.throughput": "Throughput trends",
+    "packaging.inventory_high": "Inventory level ({inventory}) exceeds the packaging threshold (1000).",
+    "packaging.trend.inventory": "Inventory accumulation rate",
+    "warehousing.too_warm": "Storage temperature ({temp}°C) exceeds the maximum safe threshold ({max_temp}°C).",
+    "warehousing.warming": "Storage temperature ({temp}°C) is increasing toward the maximum threshold ({max_temp}°C).",
+    "warehousing.trend.storage_temp": "Storage temperature is {trend}",
+    "logistics.orders_pending": "Pending orders ({orders}) exceed the immediate dispatch threshold (10).",
+    "logistics.trend.fulfillment": "Order fulfillment rate",
+}
+
+# Explainability lists that hold templated sentences.
+TEMPLATED_KEYS = ("thresholds_crossed", "thresholds_approaching", "trends_considered")
+
+class Explanation:
+    """One explainability sentence: a template ID and the values that fill it."""
+    __slots__ = ("template_id", "params")
+
+    def __init__(self, template_id: str, **params: Any):
+        if template_id not in TEMPLATES:
+            raise KeyError(f"Unknown explanation template: {template_id}")
+        self.template_id = template_id
+        self.params = params
+
+    def render(self) -> str:
+        return TEMPLATES[self.template_id].format(**self.params)
+
+    def to_compact(self) -> List[Any]:
+        return [self.template_id, self.params] if self.params else [self.template_id]
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Explanation) and self.to_compact() == other.to_compact()
+
+    def __repr__(self) -> str:
+        return f"Explanation({self.template_id!r}, {self.params!r})"
+
+Item = Union[Explanation, Sequence[Any], str]
+
+def compact(item: Item) -> Union[List[Any], str]:
+    """Compact form of an item; plain strings (audit records written before templating) pass through."""
+    if isinstance(item, Explanation):
+        return item.to_compact()
+    return item if isinstance(item, str) else list(item)
+
+def render(item: Item) -> str:
+    """Text of an Explanation, a compact [template_id, params] item or an already rendered string."""
+    if isinstance(item, Explanation):
+        return item.render()
+    if isinstance(item, str):
+        return item
+    template_id, params = (item[0], item[1]) if len(item) > 1 else (item[0], {})
+    return TEMPLATES[template_id].format(**params)
+
+def compact_explainability(explainability: Mapping[str, Any]) -> Dict[str, Any]:
+    return {key: [compact(i) for i in value] if key in TEMPLATED_KEYS else value for key, value in explainability.items()}
+
+def render_explainability(explainability: Mapping[str, Any]) -> Dict[str, Any]:
+    return {key: [render(i) for i in value] if key in TEMPLATED_KEYS else value for key, value in explainability.items()}
+
+def render_log(log: Mapping[str, Any]) -> Dict[str, Any]:
+    """A stored (compact) recommendation log with its explainability rendered as text."""
+    if not log.get("explainability"):
+        return dict(log)
+    return {**log, "explainability": render_explainability(log["explainability"])}
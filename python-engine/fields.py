@@ -0,0 +1,278 @@
+import os
+import math
+import threading
+import numpy as np
+from farmsense.core.memory import container_bytes
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+Cell = Tuple[int, int]
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Fields of a recommendation kept per field and domain for map display.
+SUMMARY_KEYS = ("base_recommendation", "severity_overlays", "context_flags", "issued_at", "valid_until", "audit_log_id")
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lat2 = np.radians(lat), np.radians(lats)
+    dlat, dlon = lat2 - lat1, np.radians(lons - lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+class FieldRegistry:
+    """
+    Every known field's coordinates and latest recommendation per domain, indexed on a
+    uniform lat/lon grid.
+
+    Grid cells are `cell_degrees` wide and centred on multiples of it, the same cells the
+    weather store keys by, so the index doubles as the weather-fetch grouping: one fetch per
+    occupied cell serves all of its fields. Viewport queries visit only the cells the box
+    overlaps and filter their rows with one vectorized comparison; nearest-neighbour queries
+    search rings of cells outward until no unvisited cell can hold a closer field.
+    Coordinates persist to a single .npz file; latest recommendations are in memory only and
+    refill at the next heartbeat.
+    """
+    def __init__(self, state_path: Optional[str] = None, cell_degrees: float = 0.1):
+        self.state_path = state_path
+        self.cell_degrees = cell_degrees
+        self.field_index: Dict[str, int] = {}
+        self.field_ids: List[str] = []
+        self.lats = np.zeros(1024)
+        self.lons = np.zeros(1024)
+        self.cells: Dict[Cell, List[int]] = {}
+        self.latest: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        if state_path and os.path.exists(state_path):
+            self.load(state_path)
+
+    def __len__(self) -> int:
+        return len(self.field_ids)
+
+    def __contains__(self, field_id: str) -> bool:
+        return field_id in self.field_index
+
+    def cell_of(self, lat: float, lon: float) -> Cell:
+        return (round(lat / self.cell_degrees), round(lon / self.cell_degrees))
+
+    def cell_center(self, cell: Cell) -> Tuple[float, float]:
+        return round(cell[0] * self.cell_degrees, 4), round(cell[1] * self.cell_degrees, 4)
+
+    def _grow(self, size: int):
+        if size > self.lats.size:
+            capacity = max(size, 2 * self.lats.size)
+            self.lats = np.resize(self.lats, capacity)
+            self.lons = np.resize(self.lons, capacity)
+
+    def _leave_cell(self, row: int):
+        """Take a row out of its cell; a cell left empty is dropped so it is no longer fetched for."""
+        cell = self.cell_of(self.lats[row], self.lons[row])
+        self.cells[cell].remove(row)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def _register(self, field_id: str, lat: float, lon: float):
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f"Invalid coordinates for field {field_id}: ({lat}, {lon}).")
+        row = self.field_index.get(field_id)
+        if row is not None:
+            self._leave_cell(row)
+        else:
+            row = len(self.field_ids)
+            self._grow(row + 1)
+            self.field_index[field_id] = row
+            self.field_ids.append(field_id)
+        self.lats[row], self.lons[row] = lat, lon
+        self.cells.setdefault(self.cell_of(lat, lon), []).append(row)
+
+    def register(self, field_id: str, lat: float, lon: float) -> Tuple[float, float]:
+        """Add or move a field; returns the centre of its weather cell."""
+        with self._lock:
+            self._register(field_id, lat, lon)
+        return self.cell_center(self.cell_of(lat, lon))
+
+    def register_many(self, field_ids: Sequence[str], lats: Sequence[float], lons: Sequence[float]):
+        with self._lock:
+            for field_id, lat, lon in zip(field_ids, lats, lons):
+                self._register(field_id, float(lat), float(lon))
+
+    def remove(self, field_id: str) -> bool:
+        """Drop a field; the last row moves into its slot so the arrays stay dense."""
+        with self._lock:
+            row = self.field_index.pop(field_id, None)
+            if row is None:
+                return False
+            self.latest.pop(field_id, None)
+            self._leave_cell(row)
+            last = len(self.field_ids) - 1
+            if row != last:
+                moved = self.field_ids[last]
+                moved_cell = self.cell_of(self.lats[last], self.lons[last])
+                rows = self.cells[moved_cell]
+                rows[rows.index(last)] = row
+                self.field_ids[row] = moved
+                self.field_index[moved] = row
+                self.lats[row], self.lons[row] = self.lats[last], self.lons[last]
+            self.field_ids.pop()
+            return True
+
+    def location(self, field_id: str) -> Optional[Tuple[float, float]]:
+        row = self.field_index.get(field_id)
+        return None if row is None else (float(self.lats[row]), float(self.lons[row]))
+
+    def weather_location(self, field_id: str) -> Optional[Tuple[float, float]]:
+        """Centre of the field's weather cell: the coordinates its weather is fetched for."""
+        row = self.field_index.get(field_id)
+        return None if row is None else self.cell_center(self.cell_of(self.lats[row], self.lons[row]))
+
+    def update_recommendation(self, field_id: str, domain: str, recommendation: Dict[str, Any]):
+        """Keep the map summary of a field's latest recommendation (ignored for unregistered fields)."""
+        if field_id not in self.field_index or "base_recommendation" not in recommendation:
+            return
+        summary = {key: recommendation.get(key) for key in SUMMARY_KEYS}
+        with self._lock:
+            self.latest.setdefault(field_id, {})[domain] = summary
+
+    def _rows_in_cells(self, rows_range: range, cols_range: range) -> np.ndarray:
+        """Rows of every field in the given cell rectangle (cells outside the grid are skipped)."""
+        if len(rows_range) * len(cols_range) > len(self.cells):
+            # Box larger than the occupied grid: walk the occupied cells instead
+            chunks = [rows for (i, j), rows in self.cells.items() if i in rows_range and j in cols_range]
+        else:
+            chunks = [self.cells[(i, j)] for i in rows_range for j in cols_range if (i, j) in self.cells]
+        return np.fromiter((row for rows in chunks for row in rows), dtype=np.int64)
+
+    def _cell_range(self, low: float, high: float) -> range:
+        return range(round(low / self.cell_degrees), round(high / self.cell_degrees) + 1)
+
+    def _entry(self, row: int, domains: Optional[Sequence[str]]) -> Dict[str, Any]:
+        field_id = self.field_ids[row]
+        latest = self.latest.get(field_id, {})
+        return {
+            "field_id": field_id,
+            "lat": float(self.lats[row]),
+            "lon": float(self.lons[row]),
+            "recommendations": latest if domains is None else {d: latest[d] for d in domains if d in latest},
+        }
+
+    def viewport(self, south: float, west: float, north: float, east: float, domains: Optional[Sequence[str]] = None,
+                 limit: Optional[int] = None) -> Dict[str, Any]:
+        """Fields inside a bounding box with their latest recommendations; west > east wraps the antimeridian."""
+        if south > north:
+            raise ValueError("south must not be greater than north.")
+        with self._lock:
+            spans = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+            rows = np.concatenate([self._rows_in_cells(self._cell_range(south, north), self._cell_range(w, e)) for w, e in spans])
+            rows = np.unique(rows)
+            lats, lons = self.lats[rows], self.lons[rows]
+            inside = (lats >= south) & (lats <= north)
+            inside &= ((lons >= west) & (lons <= east)) if west <= east else ((lons >= west) | (lons <= east))
+            rows = rows[inside]
+            total = int(rows.size)
+            if limit is not None:
+                rows = rows[:limit]
+            fields = [self._entry(int(row), domains) for row in rows]
+        return {"count": total, "fields": fields, "truncated": len(fields) < total}
+
+    def nearest(self, lat: float, lon: float, k: int = 1, max_km: Optional[float] = None,
+                domains: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """The k closest fields (great-circle distance), optionally within max_km."""
+        if k < 1:
+            raise ValueError("k must be at least 1.")
+        with self._lock:
+            if not self.field_ids:
+                return []
+            ci, cj = self.cell_of(lat, lon)
+            best = np.zeros(0)
+            best_rows = np.zeros(0, dtype=np.int64)
+            seen, ring = 0, 0
+            while True:
+                if 8 * ring > len(self.cells):
+                    # Rings now cost more than scanning every field (sparse registry or far neighbours)
+                    best_rows = np.arange(len(self.field_ids))
+                    best = haversine_km(lat, lon, self.lats[best_rows], self.lons[best_rows])
+                    order = np.argsort(best, kind="stable")[:k]
+                    best_rows, best = best_rows[order], best[order]
+                    break
+                rows = self._ring_rows(ci, cj, ring)
+                if rows.size:
+                    seen += rows.size
+                    candidates = np.concatenate([best_rows, rows])
+                    distances = np.concatenate([best, haversine_km(lat, lon, self.lats[rows], self.lons[rows])])
+                    order = np.argsort(distances, kind="stable")[:k]
+                    best_rows, best = candidates[order], distances[order]
+                reach = self._min_distance_km(lat, ring)
+                if (best.size == k and best[-1] <= reach) or (max_km is not None and reach > max_km) or seen == len(self.field_ids):
+                    break
+                ring += 1
+            keep = best <= max_km if max_km is not None else np.ones(best.size, dtype=bool)
+            return [{**self._entry(int(row), domains), "distance_km": round(float(d), 3)}
+                    for row, d in zip(best_rows[keep], best[keep])]
+
+    def _ring_rows(self, ci: int, cj: int, ring: int) -> np.ndarray:
+        """
+        Rows in the cells exactly `ring` cells from (ci, cj). Columns wrap at the antimeridian:
+        they are folded onto one turn of the grid, keeping only cells whose circular column
+        offset still puts them on this ring, and the -180° and +180° columns are the same meridian.
+        """
+        cells = [(ci + di, cj + dj) for di in (-ring, ring) for dj in range(-ring, ring + 1)]
+        cells += [(ci + di, cj + dj) for dj in (-ring, ring) for di in range(-ring + 1, ring)]
+        width = round(360 / self.cell_degrees)
+        half = width // 2
+        wrapped = set()
+        for i, j in cells or [(ci, cj)]:
+            dj = (j - cj) % width
+            if max(abs(i - ci), min(dj, width - dj)) == ring:
+                j = (j + half) % width - half
+                wrapped.add((i, j))
+                if j == -half:
+                    wrapped.add((i, half))
+        return np.fromiter((row for cell in sorted(wrapped) for row in self.cells.get(cell, ())), dtype=np.int64)
+
+    def _min_distance_km(self, lat: float, ring: int) -> float:
+        """
+        Lower bound on the great-circle distance from a point in the centre cell to any cell
+        beyond `ring` rings: at least `ring` cells in latitude or longitude, with longitude
+        measured at the most poleward latitude those cells reach.
+        """
+        degrees = ring * self.cell_degrees
+        poleward = min(90.0, abs(lat) + degrees + self.cell_degrees)
+        return 2 * EARTH_RADIUS_KM * math.asin(math.cos(math.radians(poleward)) * math.sin(math.radians(degrees) / 2))
+
+    def weather_cells(self) -> Dict[Tuple[float, float], List[str]]:
+        """Occupied weather cells (by centre) and the fields each one serves."""
+        with self._lock:
+            return {self.cell_center(cell): [self.field_ids[row] for row in rows] for cell, rows in self.cells.items()}
+
+    def snapshot_state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Latest recommendations only; coordinates persist through save()."""
+        with self._lock:
+            return {}, {"latest": {field_id: dict(latest) for field_id, latest in self.latest.items()}}
+
+    def restore_state(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        with self._lock:
+            for field_id, latest in meta["latest"].items():
+                if field_id in self.field_index:
+                    self.latest.setdefault(field_id, {}).update(latest)
+
+    def memory_usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self.field_ids),
+                    "bytes": self.lats.nbytes + self.lons.nbytes + container_bytes(self.field_index) + container_bytes(self.field_ids)
+                             + container_bytes(self.cells) + container_bytes(self.latest)}
+
+    def save(self, path: Optional[str] = None):
+        """Write coordinates atomically (temp file, then rename) so a crash never leaves a torn file."""
+        path = path or self.state_path
+        if not path:
+            raise ValueError("No state path configured for the field registry.")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._lock:
+            n = len(self.field_ids)
+            field_ids, lats, lons = np.asarray(self.field_ids, dtype=str), self.lats[:n].copy(), self.lons[:n].copy()
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, field_ids=field_ids, lats=lats, lons=lons)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        with np.load(path) as state:
+            self.register_many([str(f) for f in state["field_ids"]], state["lats"], state["lons"])
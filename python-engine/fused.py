@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Dict, Any, Optional, Sequence
+from farmsense.core.engine import Recommendation, new_audit_id
+from farmsense.core.audit import AuditLogger
+from farmsense.core.records import FieldRecord, InputRecord, InputValidationError
+
+class FusedBatch:
+    """Result of one fused evaluation: every domain's recommendation under one batch ID."""
+    __slots__ = ("batch_id", "issued_at", "recommendations")
+
+    def __init__(self, batch_id: str, issued_at: datetime, recommendations: Dict[str, Recommendation]):
+        self.batch_id = batch_id
+        self.issued_at = issued_at
+        self.recommendations = recommendations
+
+class FusedEvaluator:
+    """
+    Runs all domain engines over one field in a single pass.
+
+    Field-wide inputs are parsed once into a FieldRecord shared by every engine; per-domain
+    inputs, when given, are layered on top (identical dicts are parsed only once). The whole
+    batch is validated before any engine runs. One timestamp and one UUID are drawn per
+    batch instead of one per domain. Each domain's Recommendation (including the normalized
+    raw_inputs stored for audit) is identical to what generate_recommendation would produce.
+    """
+    def __init__(self, engines: Dict[str, Any]):
+        self.engines = engines
+
+    def parse(self, field_inputs: Optional[Dict[str, Any]] = None, domain_inputs: Optional[Dict[str, Dict[str, Any]]] = None,
+              strict: bool = False) -> Dict[str, InputRecord]:
+        """
+        Validate the whole batch up front, returning the record each domain will read.
+        Raises InputValidationError before any engine runs or anything is audited.
+        """
+        domain_inputs = domain_inputs or {}
+        unknown = set(domain_inputs) - set(self.engines)
+        if unknown:
+            raise InputValidationError(f"Unknown domains: {sorted(unknown)}.")
+        shared = FieldRecord.parse(field_inputs or {}, strict)
+        parsed = {}
+        records = {}
+        for domain in self.engines:
+            overrides = domain_inputs.get(domain)
+            if not overrides:
+                records[domain] = shared
+                continue
+            key = id(overrides)
+            if key not in parsed:
+                parsed[key] = shared.merged(overrides, strict)
+            records[domain] = parsed[key]
+        return records
+
+    def evaluate(self, field_inputs: Optional[Dict[str, Any]] = None, domain_inputs: Optional[Dict[str, Dict[str, Any]]] = None,
+                 strict: bool = False, domains: Optional[Sequence[str]] = None, records: Optional[Dict[str, InputRecord]] = None) -> FusedBatch:
+        """Evaluate `domains` (default: all) from already-parsed `records`, or parse them first."""
+        records = records or self.parse(field_inputs, domain_inputs, strict)
+        issued_at = datetime.now()
+        batch_id = new_audit_id(issued_at)
+
+        recommendations = {}
+        for domain in (domains or self.engines):
+            engine = self.engines[domain]
+            record = records[domain]
+            recommendations[domain] = engine.evaluate(
+                record,
+                raw_inputs=record.to_dict(engine.INPUTS),
+                issued_at=issued_at,
+                audit_log_id=AuditLogger.batch_member_id(batch_id, domain)
+            )
+        return FusedBatch(batch_id, issued_at, recommendations)
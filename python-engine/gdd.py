@@ -0,0 +1,190 @@
+import os
+import time
+import threading
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence
+from farmsense.data.thresholds import POTATO_THRESHOLDS
+from farmsense.data.water_balance import hour_index
+from farmsense.data.weather_store import WeatherStore
+from farmsense.core.memory import container_bytes
+
+class GrowingDegreeDays:
+    """
+    Growing-degree-day accumulator for every planted field at once, from hourly air temperature.
+
+    State is one row per field: accumulated GDD since planting and the last hour counted.
+    Each update adds only hours after that, so the cost is O(1) per new observation, and
+    updates for many fields are one vectorized sum. Accumulated GDD maps onto
+    POTATO_THRESHOLDS["growth_stages"] through the stage start table in thresholds.
+    State persists to a single .npz file between runs, written by heartbeats at most every
+    `save_interval` seconds. Request threads share one instance, so the rows are only read
+    or changed under `_lock`; file I/O happens outside it.
+    """
+    STATE_ARRAYS = ("gdd", "last_hour")
+
+    def __init__(self, state_path: Optional[str] = None, thresholds: Dict[str, Any] = POTATO_THRESHOLDS,
+                 save_interval: float = 60.0):
+        self.params = thresholds["gdd"]
+        self.stages = list(thresholds["growth_stages"])
+        self.stage_starts = np.asarray([self.params["stage_start_gdd"][s] for s in self.stages], dtype=float)
+        self.state_path = state_path
+        self.save_interval = save_interval
+        self.field_index: Dict[str, int] = {}
+        self.gdd = np.zeros(0)
+        self.last_hour = np.zeros(0, dtype=np.int64)
+        self._saved_at = time.monotonic()
+        self._lock = threading.RLock()
+        if state_path and os.path.exists(state_path):
+            self.load(state_path)
+
+    def __len__(self) -> int:
+        return len(self.field_index)
+
+    def __contains__(self, field_id: str) -> bool:
+        return field_id in self.field_index
+
+    def register(self, field_id: str, planted_at_hour: int, gdd: float = 0.0) -> int:
+        """Start accumulating for a field from its planting hour (optionally with GDD already counted)."""
+        with self._lock:
+            row = self.field_index.get(field_id)
+            if row is None:
+                row = len(self.field_index)
+                self._grow(row + 1)
+                self.field_index[field_id] = row
+            self.gdd[row] = gdd
+            self.last_hour[row] = planted_at_hour
+            return row
+
+    def _grow(self, size: int):
+        if size > self.gdd.size:
+            capacity = max(size, 2 * self.gdd.size, 64)
+            for name in self.STATE_ARRAYS:
+                setattr(self, name, np.resize(getattr(self, name), capacity))
+
+    def rows(self, field_ids: Sequence[str]) -> np.ndarray:
+        return np.asarray([self.field_index[f] for f in field_ids], dtype=np.int64)
+
+    def degree_hours(self, temps_c: np.ndarray) -> np.ndarray:
+        """Degree-hours per observation: temperature above base, capped at the upper threshold."""
+        base = self.params["base_temp_c"]
+        upper = self.params["upper_temp_c"]
+        return np.clip(np.nan_to_num(temps_c, nan=base), base, upper) - base
+
+    def observe(self, field_id: str, hour: int, temp_c: float) -> float:
+        """Add a single hourly observation; hours already counted are ignored."""
+        with self._lock:
+            row = self.field_index[field_id]
+            if hour > self.last_hour[row]:
+                self.gdd[row] += float(self.degree_hours(np.asarray(temp_c))) / 24
+                self.last_hour[row] = hour
+            return float(self.gdd[row])
+
+    def update(self, rows: np.ndarray, hours: np.ndarray, temps_c: np.ndarray, until_hour: np.ndarray):
+        """
+        Add a [fields, hours] block of hourly temperatures. Only cells after each field's last
+        counted hour and up to `until_hour` contribute, so overlapping payloads never double count.
+        """
+        new = (hours > self.last_hour[rows][:, None]) & (hours <= until_hour[:, None])
+        self.gdd[rows] += np.where(new, self.degree_hours(temps_c), 0.0).sum(axis=1) / 24
+        counted = np.where(new, hours, np.iinfo(np.int64).min).max(axis=1, initial=np.iinfo(np.int64).min)
+        self.last_hour[rows] = np.maximum(self.last_hour[rows], counted)
+
+    def stage_codes(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        gdd = self.gdd[:len(self.field_index)] if rows is None else self.gdd[rows]
+        return np.clip(np.searchsorted(self.stage_starts, gdd, side="right") - 1, 0, len(self.stages) - 1)
+
+    def stage(self, field_id: str) -> str:
+        with self._lock:
+            return self.stages[int(self.stage_codes(self.rows([field_id]))[0])]
+
+    def backfill(self, field_id: str, store: WeatherStore, lat: float, lon: float, before_hour: int) -> int:
+        """
+        Count stored hourly temperatures from the field's last counted hour up to `before_hour`
+        (the first hour of a payload), so a planting registered in the past or a long outage
+        does not silently lose degree days. Returns how many of those hours had no stored
+        temperature and were counted as zero.
+        """
+        with self._lock:
+            row = self.field_index[field_id]
+            first = int(self.last_hour[row]) + 1
+        if first >= before_hour:
+            return 0
+        temps = np.full(before_hour - first, np.nan)
+        coverage = store.coverage(lat, lon)
+        if coverage is not None:
+            a, b = max(first, coverage[0]), min(before_hour, coverage[1] + 1)
+            if a < b:
+                temps[a - first:b - first] = store.read(lat, lon, a, b, ("temperature_2m",))["temperature_2m"]
+        hours = np.arange(first, before_hour, dtype=np.int64)
+        with self._lock:
+            # update() skips hours a concurrent heartbeat has counted since `first` was read
+            self.update(np.asarray([self.field_index[field_id]]), hours[None], temps[None],
+                        np.asarray([before_hour - 1], dtype=np.int64))
+        return int(np.isnan(temps).sum())
+
+    def heartbeat(self, payloads: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Accumulate every planted field from its latest Open-Meteo payload (observed hours up to
+        the payload's current hour) and return its GDD and derived crop stage.
+        Fields without a planting registration are skipped. Saves state when `save_interval` has passed.
+        """
+        with self._lock:
+            field_ids = [f for f in payloads if f in self.field_index]
+        if not field_ids:
+            return {}
+        blocks: List[tuple] = []
+        now_hours = []
+        for field_id in field_ids:
+            payload = payloads[field_id]
+            hourly = payload.get("hourly", {})
+            hours = hour_index(hourly.get("time", []))
+            current_time = payload.get("current", {}).get("time")
+            now_hours.append(int(hour_index([current_time[:13]])[0]) if current_time else int(hours.max(initial=0)))
+            temps = np.asarray([np.nan if t is None else t for t in hourly.get("temperature_2m", [np.nan] * hours.size)], dtype=float)
+            blocks.append((hours, temps))
+
+        width = max(h.size for h, _ in blocks)
+        hours = np.full((len(blocks), width), np.iinfo(np.int64).max, dtype=np.int64)
+        temps = np.full((len(blocks), width), np.nan)
+        for i, (h, t) in enumerate(blocks):
+            hours[i, :h.size] = h
+            temps[i, :t.size] = t
+
+        with self._lock:
+            rows = self.rows(field_ids)
+            self.update(rows, hours, temps, np.asarray(now_hours, dtype=np.int64))
+            codes = self.stage_codes(rows)
+            result = {
+                field_id: {"gdd": round(float(self.gdd[rows[i]]), 1), "crop_stage": self.stages[int(codes[i])]}
+                for i, field_id in enumerate(field_ids)
+            }
+        if self.state_path and time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
+        return result
+
+    def memory_usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self.field_index),
+                    "bytes": self.gdd.nbytes + self.last_hour.nbytes + container_bytes(self.field_index)}
+
+    def save(self, path: Optional[str] = None):
+        """Write state atomically (temp file, then rename) so a crash never leaves a torn file."""
+        path = path or self.state_path
+        if not path:
+            raise ValueError("No state path configured for growing-degree-day state.")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._lock:
+            field_ids = sorted(self.field_index, key=self.field_index.get)
+            n = len(field_ids)
+            gdd, last_hour = self.gdd[:n].copy(), self.last_hour[:n].copy()
+            self._saved_at = time.monotonic()
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, field_ids=np.asarray(field_ids, dtype=str), gdd=gdd, last_hour=last_hour)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        with np.load(path) as state, self._lock:
+            self.field_index = {str(f): i for i, f in enumerate(state["field_ids"])}
+            self.gdd = state["gdd"].astype(float)
+            self.last_hour = state["last_hour"].astype(np.int64)
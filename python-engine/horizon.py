@@ -0,0 +1,116 @@
+import numpy as np
+from typing import Dict, Any, Optional, List, Tuple
+from farmsense.data.ingestion import DataValidator
+from farmsense.domains.vectorized import evaluate, decode_flags, DECISION_CODES, DECISION_LABELS, VECTOR_EVALUATORS
+
+# Same look-ahead window DataValidator uses for precipitation_forecast.
+PRECIP_WINDOW_HOURS = 6
+
+def _series(hourly: Dict[str, Any], key: str, length: int) -> np.ndarray:
+    values = hourly.get(key)
+    if values is None:
+        return np.full(length, np.nan)
+    return np.asarray([np.nan if v is None else v for v in values], dtype=float)
+
+def _previous_hour(series: np.ndarray) -> np.ndarray:
+    previous = np.empty_like(series)
+    previous[0] = np.nan
+    previous[1:] = series[:-1]
+    return previous
+
+def _start_index(times: List[str], current_time: Optional[str]) -> int:
+    """Hourly data starts at local midnight; the timeline starts at the current hour."""
+    if not current_time:
+        return 0
+    return min(int(np.searchsorted(np.asarray(times), current_time[:13], side="left")), len(times) - 1)
+
+def hourly_inputs(open_meteo_data: Dict[str, Any], manual_inputs: Optional[Dict[str, Any]] = None) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Turn an Open-Meteo hourly forecast into engine input arrays, one element per hour,
+    using the same mappings as DataValidator.validate_irrigation_inputs. Trends compare
+    each hour with the one before it. Manual inputs override as constants.
+    """
+    hourly = open_meteo_data.get("hourly", {})
+    all_times = hourly.get("time", [])
+    if not all_times:
+        raise ValueError("Open-Meteo payload has no hourly forecast.")
+    start = _start_index(all_times, open_meteo_data.get("current", {}).get("time"))
+    times = all_times[start:]
+    n = len(times)
+
+    def column(key: str) -> np.ndarray:
+        return _series(hourly, key, len(all_times))
+
+    # Previous-hour series are built before trimming so the current hour still has a trend.
+    awc = np.clip(column("soil_moisture_3_to_9cm") / DataValidator.FULL_AWC_VOLUMETRIC * 100, 0, 100).round(2)
+    soil_temp = column("soil_temperature_6cm")
+    precip = np.nan_to_num(column("precipitation"))[start:]
+
+    # Forward-looking precipitation sum over the next PRECIP_WINDOW_HOURS for every hour.
+    cumulative = np.concatenate([[0.0], np.cumsum(precip)])
+    window_end = np.minimum(np.arange(n) + PRECIP_WINDOW_HOURS, n)
+    precip_forecast = cumulative[window_end] - cumulative[:n]
+
+    inputs = {
+        "awc": awc[start:],
+        "prev_awc": _previous_hour(awc)[start:],
+        "soil_temp": soil_temp[start:],
+        "prev_soil_temp": _previous_hour(soil_temp)[start:],
+        "humidity": column("relative_humidity_2m")[start:],
+        "precipitation_forecast": precip_forecast,
+        "et": np.nan_to_num(column("et0_fao_evapotranspiration"))[start:],
+    }
+    inputs.update(manual_inputs or {})
+    return times, inputs
+
+def _segments(times: List[str], base: np.ndarray, emergency: np.ndarray, flags: np.ndarray) -> List[Dict[str, Any]]:
+    change = np.flatnonzero((np.diff(base) != 0) | (np.diff(emergency) != 0) | (np.diff(flags) != 0)) + 1
+    starts = np.concatenate([[0], change])
+    ends = np.concatenate([change, [len(base)]])
+    return [
+        {
+            "start_hour": int(s),
+            "start_time": times[s],
+            "hours": int(e - s),
+            "base_recommendation": DECISION_LABELS[int(base[s])],
+            "emergency": bool(emergency[s]),
+            "context_flags": decode_flags(int(flags[s])),
+        }
+        for s, e in zip(starts, ends)
+    ]
+
+def evaluate_horizon(open_meteo_data: Dict[str, Any], manual_inputs: Optional[Dict[str, Any]] = None, domains: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Run every domain over the whole forecast in one vectorized pass per domain and report,
+    for each, when it first changes state (base, EMERGENCY or context flags) and when it
+    first reaches NOW.
+    """
+    times, inputs = hourly_inputs(open_meteo_data, manual_inputs)
+    n = len(times)
+    timeline = {}
+    for domain in domains or list(VECTOR_EVALUATORS):
+        decision = evaluate(domain, inputs)
+        base = np.broadcast_to(decision.base, (n,))
+        emergency = np.broadcast_to(decision.emergency, (n,))
+        flags = np.broadcast_to(decision.flags, (n,))
+
+        changed = np.flatnonzero((base != base[0]) | (emergency != emergency[0]) | (flags != flags[0]))
+        now = np.flatnonzero(base == DECISION_CODES["NOW"])
+        first_change = int(changed[0]) if changed.size else None
+        first_now = int(now[0]) if now.size else None
+        timeline[domain] = {
+            "current": DECISION_LABELS[int(base[0])],
+            "first_change_hour": first_change,
+            "first_change_time": times[first_change] if first_change is not None else None,
+            "next_recommendation": DECISION_LABELS[int(base[first_change])] if first_change is not None else None,
+            "first_now_hour": first_now,
+            "first_now_time": times[first_now] if first_now is not None else None,
+            "segments": _segments(times, base, emergency, flags),
+        }
+
+    return {
+        "start_time": times[0],
+        "end_time": times[-1],
+        "hours": n,
+        "domains": timeline,
+    }
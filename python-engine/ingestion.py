@@ -1,6 +1,7 @@
 import requests
 from typing import Dict, Any, Optional
 from datetime import datetime
+from farmsense.core.tracing import traced
 
 class DataIngestor:
     """Base class for data ingestion from keyless sources."""
@@ -11,7 +12,21 @@ class OpenMeteoIngestor(DataIngestor):
     """Ingests weather and soil data from Open-Meteo (No API Key)."""
     BASE_URL = "https://api.open-meteo.com/v1/forecast"
 
-    def fetch(self, lat: float, lon: float) -> Dict[str, Any]:
+    MAX_FORECAST_DAYS = 16
+    TIMEOUT_SECONDS = 10
+
+    def __init__(self, store: Optional[Any] = None):
+        # Optional local WeatherStore serving past timestamps without a network call
+        self.store = store
+
+    @traced("open_meteo.fetch")
+    def fetch(self, lat: float, lon: float, forecast_days: int = 1, at: Optional[datetime] = None) -> Dict[str, Any]:
+        if not 1 <= forecast_days <= self.MAX_FORECAST_DAYS:
+            raise ValueError(f"forecast_days must be between 1 and {self.MAX_FORECAST_DAYS}.")
+        if at is not None:
+            if self.store is None:
+                raise ValueError("Past timestamps need a local weather store.")
+            return self.store.payload_at(lat, lon, at, forecast_days)
         params = {
             "latitude": lat,
             "longitude": lon,
@@ -24,9 +39,9 @@ class OpenMeteoIngestor(DataIngestor):
                 "soil_temperature_6cm", "soil_moisture_3_to_9cm"
             ],
             "timezone": "auto",
-            "forecast_days": 1
+            "forecast_days": forecast_days
         }
-        response = requests.get(self.BASE_URL, params=params)
+        response = requests.get(self.BASE_URL, params=params, timeout=self.TIMEOUT_SECONDS)
         response.raise_for_status()
         return response.json()
 
@@ -44,25 +59,46 @@ class FAOSTATIngestor(DataIngestor):
 
 class DataValidator:
     """Cross-validates data from multiple sources."""
+    # Volumetric soil moisture (m³/m³) treated as 100% AWC.
+    FULL_AWC_VOLUMETRIC = 0.4
+
     @staticmethod
+    @traced("data_validator.irrigation_inputs")
     def validate_irrigation_inputs(open_meteo_data: Dict[str, Any], wapor_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         current = open_meteo_data.get("current", {})
         hourly = open_meteo_data.get("hourly", {})
         
         # Mapping Open-Meteo volumetric soil moisture to AWC % (Simplified deterministic mapping)
-        vol_moisture = current.get("soil_moisture_3_to_9cm", 0.2)
-        awc_estimate = min(100, max(0, (vol_moisture / 0.4) * 100))
+        vol_moisture = _number(current.get("soil_moisture_3_to_9cm"))
+        vol_moisture = 0.2 if vol_moisture is None else vol_moisture
+        awc_estimate = min(100, max(0, (vol_moisture / DataValidator.FULL_AWC_VOLUMETRIC) * 100))
         
         # Trend calculation: compare current with 3 hours ago
-        prev_vol_moisture = hourly.get("soil_moisture_3_to_9cm", [vol_moisture])[0]
-        prev_awc = min(100, max(0, (prev_vol_moisture / 0.4) * 100))
+        prev_vol_moisture = _number(hourly.get("soil_moisture_3_to_9cm", [vol_moisture])[0])
+        prev_vol_moisture = vol_moisture if prev_vol_moisture is None else prev_vol_moisture
+        prev_awc = min(100, max(0, (prev_vol_moisture / DataValidator.FULL_AWC_VOLUMETRIC) * 100))
         
         return {
-            "awc": round(awc_estimate, 2),
-            "prev_awc": round(prev_awc, 2),
-            "soil_temp": current.get("soil_temperature_6cm"),
-            "prev_soil_temp": hourly.get("soil_temperature_6cm", [current.get("soil_temperature_6cm")])[0],
-            "humidity": current.get("relative_humidity_2m"),
-            "precipitation_forecast": sum(hourly.get("precipitation", [])[:6]),
-            "et": current.get("et0_fao_evapotranspiration", 0)
+            "awc": round(float(awc_estimate), 2),
+            "prev_awc": round(float(prev_awc), 2),
+            "soil_temp": _number(current.get("soil_temperature_6cm")),
+            "prev_soil_temp": _number(hourly.get("soil_temperature_6cm", [current.get("soil_temperature_6cm")])[0]),
+            "humidity": _number(current.get("relative_humidity_2m")),
+            "precipitation_forecast": _total(hourly.get("precipitation", [])[:6]),
+            # Open-Meteo only reports ET0 hourly; summarise the first day as daily reference ET (mm)
+            "et": round(_total(hourly.get("et0_fao_evapotranspiration", [])[:24]), 2)
         }
+
+    @staticmethod
+    def inputs_at(store: Any, lat: float, lon: float, at: datetime) -> Dict[str, Any]:
+        """Irrigation inputs as they would have been validated at a past timestamp, from the local store."""
+        return DataValidator.validate_irrigation_inputs(store.payload_at(lat, lon, at))
+
+def _number(value: Any) -> Optional[float]:
+    """Plain float from API lists or stored float32 arrays; missing (None/NaN) becomes None."""
+    if value is None or value != value:
+        return None
+    return float(value)
+
+def _total(values: Any) -> float:
+    return float(sum(v for v in values if v is not None and v == v))
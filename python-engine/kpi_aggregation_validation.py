@@ -3,14 +3,17 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
 import json
+import shutil
 
 def validate_aggregation():
     platform = FarmSensePlatform()
     
     # Clear existing logs for clean validation
-    for f in os.listdir(platform.audit_logger.log_dir):
-        os.remove(os.path.join(platform.audit_logger.log_dir, f))
+    log_dir = platform.audit_logger.log_dir
+    shutil.rmtree(log_dir)
+    platform.audit_logger = AuditLogger(log_dir)
         
     print("--- KPI Aggregation Validation ---")
     
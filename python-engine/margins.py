@@ -0,0 +1,104 @@
+from typing import Dict, Any, List, Optional, Sequence
+from farmsense.data.thresholds import POTATO_THRESHOLDS
+
+class Boundary:
+    """One decision boundary on a numeric input, with the input's current rate of change."""
+    __slots__ = ("key", "value", "threshold", "rate_per_hour")
+
+    def __init__(self, key: str, value: float, threshold: float, rate_per_hour: Optional[float] = None):
+        self.key = key
+        self.value = value
+        self.threshold = threshold
+        self.rate_per_hour = rate_per_hour
+
+    @property
+    def distance(self) -> float:
+        return abs(self.threshold - self.value)
+
+    @property
+    def hours_to_boundary(self) -> Optional[float]:
+        """Hours until the current trend reaches the threshold; None if it never will (or no trend)."""
+        if not self.rate_per_hour:
+            return None
+        hours = (self.threshold - self.value) / self.rate_per_hour
+        return hours if hours >= 0 else None
+
+    def outlasts(self, hours: float) -> bool:
+        """
+        True if this boundary cannot plausibly be crossed within `hours`: on the current trend
+        when it heads for the threshold, otherwise (no trend, a flat one or one heading away,
+        any of which can turn) at the input's maximum plausible hourly change.
+        """
+        if self.distance == 0:
+            return False
+        crossing = self.hours_to_boundary
+        if crossing is not None:
+            return crossing > hours
+        max_rate = POTATO_THRESHOLDS["margins"]["max_rate_per_hour"].get(self.key)
+        return max_rate is not None and self.distance > max_rate * hours
+
+    def to_dict(self) -> Dict[str, Any]:
+        crossing = self.hours_to_boundary
+        return {
+            "input": self.key,
+            "value": self.value,
+            "threshold": round(self.threshold, 3),
+            "margin": round(self.distance, 3),
+            "rate_per_hour": round(self.rate_per_hour, 3) if self.rate_per_hour is not None else None,
+            "hours_to_boundary": round(crossing, 2) if crossing is not None else None,
+        }
+
+class DecisionMargin:
+    """
+    How far an evaluation is from flipping: every numeric boundary the decision depends on,
+    with the nearest one singled out. Nearest means soonest to be crossed on the current
+    trend, falling back to the smallest distance relative to the threshold.
+    """
+    __slots__ = ("boundaries",)
+
+    def __init__(self, boundaries: Sequence[Boundary]):
+        self.boundaries = list(boundaries)
+
+    @property
+    def nearest(self) -> Optional[Boundary]:
+        if not self.boundaries:
+            return None
+        crossing = [b for b in self.boundaries if b.hours_to_boundary is not None]
+        if crossing:
+            return min(crossing, key=lambda b: b.hours_to_boundary)
+        return min(self.boundaries, key=lambda b: b.distance / max(abs(b.threshold), 1))
+
+    def outlasts(self, hours: float) -> bool:
+        """
+        True when no boundary can plausibly be crossed within `hours`, so re-evaluating
+        before then cannot change the decision. Decisions with no numeric boundary at all
+        (purely boolean) never outlast.
+        """
+        return bool(self.boundaries) and all(b.outlasts(hours) for b in self.boundaries)
+
+    def to_state(self) -> List[List[Any]]:
+        return [[b.key, b.value, b.threshold, b.rate_per_hour] for b in self.boundaries]
+
+    @classmethod
+    def from_state(cls, state: Sequence[Sequence[Any]]) -> "DecisionMargin":
+        return cls([Boundary(*b) for b in state])
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        nearest = self.nearest
+        if nearest is None:
+            return None
+        return {**nearest.to_dict(), "boundaries_checked": len(self.boundaries)}
+
+def trend_rate(current: float, previous: Optional[float]) -> Optional[float]:
+    """Rate per hour from a reading and its prev_* value one trend interval earlier."""
+    if previous is None:
+        return None
+    return (current - previous) / POTATO_THRESHOLDS["margins"]["trend_interval_hours"]
+
+def boundaries(key: str, value: Optional[float], thresholds: Sequence[float], rate_per_hour: Optional[float] = None) -> List[Boundary]:
+    if value is None:
+        return []
+    return [Boundary(key, value, threshold, rate_per_hour) for threshold in thresholds]
+
+def decision_margin(*groups: List[Boundary]) -> DecisionMargin:
+    return DecisionMargin([b for group in groups for b in group])
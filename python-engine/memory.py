@@ -0,0 +1,225 @@
+"""
+Memory accounting, budgets and allocation tracing for the long-running server.
+
+Components report their own size through `memory_usage() -> {"entries": int, "bytes": int}`.
+Caches whose contents can be rebuilt also implement `shrink(target_bytes) -> int`, dropping
+their least valuable entries until their estimate is under `target_bytes`, and return how
+many entries went. Byte counts are estimates: deep sizes of a sample of entries scaled to
+the container, so accounting stays cheap for caches with hundreds of thousands of entries.
+
+MemoryGuard enforces per-cache budgets and a budget for the whole process (resident set
+size). Over the process budget, shrinkable caches are halved in eviction order until RSS is
+back under it. Allocation sites come from tracemalloc, which is only started on request
+because it slows every allocation while it traces.
+"""
+import gc
+import os
+import sys
+import enum
+import types
+import threading
+import itertools
+import tracemalloc
+import numpy as np
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+SAMPLE_SIZE = 64
+
+# Shared objects that are never owned by a cache entry
+_SKIP = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, enum.Enum)
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """Bytes held by an object and everything it references (numpy arrays by their own buffer)."""
+    seen = set() if seen is None else seen
+    total, stack = 0, [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SKIP):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, bytearray, int, float, bool, np.ndarray)) or item is None:
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            if hasattr(item, "__dict__"):
+                stack.append(vars(item))
+            for cls in type(item).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    if hasattr(item, name):
+                        stack.append(getattr(item, name))
+    return total
+
+def container_bytes(container: Any, sample: int = SAMPLE_SIZE) -> int:
+    """Estimated deep size of a dict, list, set or tuple from an evenly spaced sample of its items."""
+    size = len(container)
+    if size == 0:
+        return sys.getsizeof(container)
+    items: Iterable[Any] = container.items() if isinstance(container, dict) else container
+    step = max(1, size // sample)
+    picked = list(itertools.islice(items, 0, None, step))
+    seen = {id(container)}
+    sampled = sum(deep_sizeof(item, seen) for item in picked)
+    return sys.getsizeof(container) + int(sampled * size / len(picked))
+
+def process_rss() -> Optional[int]:
+    """Current resident set size in bytes (Linux); None where it cannot be read."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class MemoryGuard:
+    """
+    Per-cache and whole-process memory budgets over the components returned by `components`
+    (name -> component, in eviction order), plus on-demand tracemalloc snapshots.
+    """
+    def __init__(self, components: Callable[[], Dict[str, Any]], budgets: Optional[Dict[str, int]] = None,
+                 rss_budget: Optional[int] = None):
+        self.components = components
+        self.budgets: Dict[str, int] = {}
+        self.rss_budget: Optional[int] = None
+        self.set_budgets(budgets or {}, rss_budget)
+        self.last_enforced: Optional[Dict[str, Any]] = None
+        self._previous_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_budgets(self, budgets: Dict[str, int], rss_budget: Optional[int] = None) -> None:
+        """Byte budgets per shrinkable cache (replacing earlier ones) and for the process RSS."""
+        components = self.components()
+        for name, budget in budgets.items():
+            if name not in components:
+                raise ValueError(f"Unknown cache: {name}")
+            if not hasattr(components[name], "shrink"):
+                raise ValueError(f"{name} cannot be evicted; only shrinkable caches take a budget.")
+            if budget < 0:
+                raise ValueError("Memory budgets must not be negative.")
+        if rss_budget is not None and rss_budget <= 0:
+            raise ValueError("The process memory budget must be positive.")
+        self.budgets = dict(budgets)
+        self.rss_budget = rss_budget
+
+    def usage(self) -> Dict[str, Any]:
+        caches = {}
+        for name, component in self.components().items():
+            caches[name] = {**component.memory_usage(), "budget": self.budgets.get(name),
+                            "shrinkable": hasattr(component, "shrink")}
+        return {
+            "rss_bytes": process_rss(),
+            "rss_budget": self.rss_budget,
+            "cache_bytes": sum(cache["bytes"] for cache in caches.values()),
+            "caches": caches,
+            "tracemalloc": self.tracing_status(),
+            "last_enforced": self.last_enforced,
+        }
+
+    def enforce(self) -> Dict[str, Any]:
+        """Evict from caches over their budget, then from every shrinkable cache while the process is over budget."""
+        with self._lock:
+            components = self.components()
+            evicted: Dict[str, int] = {}
+            for name, budget in self.budgets.items():
+                if name in components and components[name].memory_usage()["bytes"] > budget:
+                    evicted[name] = evicted.get(name, 0) + components[name].shrink(budget)
+
+            rss_before = rss = process_rss()
+            if self.rss_budget is not None and rss is not None and rss > self.rss_budget:
+                for name, component in components.items():
+                    if not hasattr(component, "shrink"):
+                        continue
+                    evicted[name] = evicted.get(name, 0) + component.shrink(component.memory_usage()["bytes"] // 2)
+                    gc.collect()
+                    # Freed blocks are reused by the allocator even when RSS does not fall right away
+                    rss = process_rss()
+                    if rss <= self.rss_budget:
+                        break
+            self.last_enforced = {"evicted": evicted, "rss_bytes_before": rss_before, "rss_bytes": rss}
+            return self.last_enforced
+
+    # Allocation tracing
+
+    def tracing_status(self) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            return {"tracing": False}
+        current, peak = tracemalloc.get_traced_memory()
+        return {"tracing": True, "frames": tracemalloc.get_traceback_limit(), "traced_bytes": current, "peak_bytes": peak}
+
+    def start_tracing(self, frames: int = 1) -> None:
+        if frames < 1:
+            raise ValueError("frames must be at least 1.")
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._previous_snapshot = None
+
+    def stop_tracing(self) -> None:
+        tracemalloc.stop()
+        self._previous_snapshot = None
+
+    def top_allocations(self, limit: int = 20, group_by: str = "lineno") -> Dict[str, Any]:
+        """
+        Largest allocation sites now, with their growth since the previous call. Starts
+        tracemalloc on first use, so the first snapshot only covers what was allocated since.
+        """
+        if group_by not in ("lineno", "filename", "traceback"):
+            raise ValueError("group_by must be lineno, filename or traceback.")
+        if limit < 1:
+            raise ValueError("limit must be at least 1.")
+        started = not tracemalloc.is_tracing()
+        self.start_tracing()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        if self._previous_snapshot is not None:
+            stats = snapshot.compare_to(self._previous_snapshot, group_by)
+        else:
+            stats = snapshot.statistics(group_by)
+        self._previous_snapshot = snapshot
+
+        top: List[Dict[str, Any]] = []
+        for stat in sorted(stats, key=lambda s: s.size, reverse=True)[:limit]:
+            frame = stat.traceback[0]
+            site = {
+                "site": f"{frame.filename}:{frame.lineno}",
+                "bytes": stat.size,
+                "count": stat.count,
+                "bytes_diff": getattr(stat, "size_diff", None),
+                "count_diff": getattr(stat, "count_diff", None),
+            }
+            if group_by == "traceback":
+                site["traceback"] = [f"{f.filename}:{f.lineno}" for f in stat.traceback]
+            top.append(site)
+        return {**self.tracing_status(), "started": started, "group_by": group_by, "top": top}
+
+    # Background enforcement
+
+    def start(self, interval: float = 60.0) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="memory-guard", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            if self.budgets or self.rss_budget is not None:
+                try:
+                    self.enforce()
+                except Exception as e:
+                    # Keep serving; the next pass retries
+                    self.last_enforced = {"error": str(e)}
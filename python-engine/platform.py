@@ -1,6 +1,10 @@
 import os
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+import json
+import base64
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Any, Collection, List, Optional, Tuple, Sequence
+import numpy as np
 from farmsense.core.engine import Recommendation
 from farmsense.domains.potato_logic import (
     PlanningEngine, FieldPrepEngine, PlantingEngine, IrrigationEngine,
@@ -9,10 +13,36 @@ from farmsense.domains.potato_logic import (
 )
 
 from farmsense.data.ingestion import OpenMeteoIngestor, DataValidator
+from farmsense.data.thresholds import thresholds_version
+from farmsense.data.water_balance import SoilWaterBalance, hour_index
+from farmsense.data.prefetch import WeatherPrefetcher
+from farmsense.data.weather_store import WeatherStore
+from farmsense.data.gdd import GrowingDegreeDays
 from farmsense.core.audit import AuditLogger
+from farmsense.core.fused import FusedEvaluator
+from farmsense.core.cache import ActiveRecommendationCache, ETagIndex
+from farmsense.core.events import RecommendationEventBus
+from farmsense.core.sweep import sweep, to_compact
+from farmsense.core.horizon import evaluate_horizon
+from farmsense.core.backtest import run_backtest, DEFAULT_IRRIGATION_MM
+from farmsense.core.replay import replay_thresholds
+from farmsense.core.rollups import KPIRollups, DEFAULT_QUANTILES
+from farmsense.core.fields import FieldRegistry
+from farmsense.core.snapshot import write_snapshot, read_snapshot, SnapshotError, PeriodicSnapshotter
+from farmsense.core.tracing import span
+from farmsense.core.memory import MemoryGuard
+from farmsense.core.raster import evaluate_raster, build_tile_pyramid, RASTER_DOMAINS
+
+def _content_hash(value: Any) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _recommendation_etag(input_hash: str, recommendation: Recommendation) -> str:
+    decision = [recommendation.base_recommendation, recommendation.severity_overlays, recommendation.context_flags]
+    return '"' + _content_hash([input_hash, decision])[:32] + '"'
 
 class FarmSensePlatform:
-    def __init__(self):
+    def __init__(self, state_dir: str = "/home/ubuntu/farmsense/state"):
         self.engines = {
             "planning": PlanningEngine(),
             "field_prep": FieldPrepEngine(),
@@ -26,33 +56,261 @@ class FarmSensePlatform:
             "warehousing": WarehousingEngine(),
             "logistics": LogisticsEngine()
         }
-        self.weather_ingestor = OpenMeteoIngestor()
+        # Hashed once rather than per conditional request; call refresh_thresholds() after editing the table
+        self.thresholds_version = thresholds_version()
+        self.weather_store = WeatherStore(os.path.join(state_dir, "weather"))
+        self.weather_ingestor = OpenMeteoIngestor(store=self.weather_store)
+        self.weather_prefetcher = WeatherPrefetcher(self.weather_ingestor)
+        self.field_registry = FieldRegistry(os.path.join(state_dir, "fields.npz"))
+        self.weather_prefetcher.sync(self.field_registry.weather_cells())
         self.audit_logger = AuditLogger()
+        self.kpi_rollups = KPIRollups(os.path.join(state_dir, "kpi_rollups.json"))
+        if self.kpi_rollups.through is not None:
+            self.kpi_rollups.catch_up(self.audit_logger.iter_logs(start=self.kpi_rollups.through))
+        self.water_balance = SoilWaterBalance()
+        self.gdd = GrowingDegreeDays(os.path.join(state_dir, "gdd.npz"))
+        self.fused_evaluator = FusedEvaluator(self.engines)
+        self.event_bus = RecommendationEventBus()
+        self.etag_index = ETagIndex()
+        self.recommendation_cache = ActiveRecommendationCache(
+            on_expire=lambda field_id, domain, rec: self.event_bus.expire(field_id, domain, rec.audit_log_id))
+
+        # Warm start: weather, active recommendations and trend state from the last runtime snapshot
+        self.snapshot_path = os.path.join(state_dir, "runtime.snap")
+        self.snapshotter = PeriodicSnapshotter(self.save_snapshot)
+        self.warm_start = self.restore_snapshot()
+        self.memory_guard = MemoryGuard(self._memory_components)
+
+    def _snapshot_components(self) -> Dict[str, Any]:
+        """In-memory state that is not persisted elsewhere (GDD, field locations and KPI rollups have their own files)."""
+        return {
+            "weather_prefetcher": self.weather_prefetcher,
+            "water_balance": self.water_balance,
+            "recommendation_cache": self.recommendation_cache,
+            "etag_index": self.etag_index,
+            "event_bus": self.event_bus,
+            "field_registry": self.field_registry,
+        }
+
+    def _memory_components(self) -> Dict[str, Any]:
+        """Everything held in memory between requests; shrinkable caches first, cheapest to lose first."""
+        return {
+            "etag_index": self.etag_index,
+            "audit_index": self.audit_logger,
+            "recommendation_cache": self.recommendation_cache,
+            "weather_prefetcher": self.weather_prefetcher,
+            "event_bus": self.event_bus,
+            "field_registry": self.field_registry,
+            "water_balance": self.water_balance,
+            "gdd": self.gdd,
+            "kpi_rollups": self.kpi_rollups,
+        }
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Process RSS, entries and estimated bytes per cache, budgets and tracemalloc status."""
+        return self.memory_guard.usage()
+
+    def memory_allocations(self, limit: int = 20, group_by: str = "lineno") -> Dict[str, Any]:
+        """Top allocation sites and their growth since the previous call (starts tracemalloc on first use)."""
+        return self.memory_guard.top_allocations(limit, group_by)
+
+    def set_memory_budgets(self, budgets: Dict[str, int], rss_budget: Optional[int] = None) -> Dict[str, Any]:
+        """Replace the byte budgets and enforce them right away."""
+        self.memory_guard.set_budgets(budgets, rss_budget)
+        return self.memory_guard.enforce()
+
+    def refresh_thresholds(self) -> str:
+        """Re-hash the live threshold table after an edit; ETags issued under the old table stop matching."""
+        self.thresholds_version = thresholds_version()
+        return self.thresholds_version
+
+    def save_snapshot(self) -> Dict[str, Any]:
+        """Crash-consistent binary snapshot of runtime state (see farmsense.core.snapshot)."""
+        # Heartbeats only save degree days every save_interval; periodic and shutdown snapshots flush the rest
+        self.gdd.save()
+        return write_snapshot(self.snapshot_path, {name: component.snapshot_state()
+                                                   for name, component in self._snapshot_components().items()})
+
+    def restore_snapshot(self) -> Dict[str, Any]:
+        """Load the last snapshot if there is one; a damaged snapshot is skipped and the platform starts cold."""
+        if not os.path.exists(self.snapshot_path):
+            return {"restored": False, "reason": "no snapshot"}
+        try:
+            states, index = read_snapshot(self.snapshot_path)
+        except (SnapshotError, OSError, ValueError) as e:
+            return {"restored": False, "reason": str(e)}
+        components = self._snapshot_components()
+        for name, (arrays, meta) in states.items():
+            if name in components:
+                components[name].restore_state(arrays, meta)
+        return {"restored": True, "created_at": index["created_at"], "components": sorted(set(states) & set(components))}
 
-    def get_recommendation_with_real_data(self, domain: str, lat: float, lon: float, manual_inputs: Dict[str, Any] = None) -> Dict[str, Any]:
+    def get_recommendation_with_real_data(self, domain: str, lat: float, lon: float, manual_inputs: Dict[str, Any] = None, field_id: Optional[str] = None,
+                                          refresh: bool = False) -> Dict[str, Any]:
+        final_inputs, field_key, weather = self.real_data_inputs(domain, lat, lon, manual_inputs, field_id)
+        result = self.get_recommendation(domain, final_inputs, field_key, refresh)
+        return {**result, "weather": weather}
+
+    def real_data_inputs(self, domain: str, lat: float, lon: float, manual_inputs: Dict[str, Any] = None,
+                         field_id: Optional[str] = None) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+        """
+        Live weather and water-balance inputs merged with manual overrides, the field key, and
+        the age of the weather payload they came from.
+        """
         domain = domain.lower()
         if domain not in self.engines:
             raise ValueError(f"Unknown domain: {domain}")
         
-        # Fetch real-world data
-        weather_data = self.weather_ingestor.fetch(lat, lon)
+        # Last-known weather (two days so the water-balance projection window is covered);
+        # only blocks on Open-Meteo when nothing usable is cached for this location.
+        # Registered fields share one fetch per weather cell.
+        weather_lat, weather_lon = (field_id and self.field_registry.weather_location(field_id)) or (lat, lon)
+        weather_data, age = self.weather_prefetcher.get(weather_lat, weather_lon, domain)
+        weather = {"age_seconds": int(age.total_seconds()), "stale": age >= self.weather_prefetcher.refresh_interval}
         validated_inputs = DataValidator.validate_irrigation_inputs(weather_data)
+
+        # Advance the field's degree days and water balance by the hours since its last heartbeat
+        field_key = field_id or f"{lat:.4f},{lon:.4f}"
+        crop_stage = (manual_inputs or {}).get("crop_stage")
+        if field_key in self.gdd:
+            with span("gdd.heartbeat"):
+                # Hours between the last counted one and this payload come from stored history
+                first_hour = hour_index(weather_data.get("hourly", {}).get("time", [])[:1])
+                if first_hour.size:
+                    missing = self.gdd.backfill(field_key, self.weather_store, weather_lat, weather_lon, int(first_hour[0]))
+                    if missing:
+                        weather["gdd_missing_hours"] = missing
+                derived = self.gdd.heartbeat({field_key: weather_data})[field_key]["crop_stage"]
+            validated_inputs["crop_stage"] = derived
+            crop_stage = crop_stage or derived
+        crop_stage = crop_stage or "VEGETATIVE"
+        # Only registered fields keep water-balance state; ad-hoc locations are modeled statelessly
+        with span("water_balance.heartbeat"):
+            if field_id is not None and field_id in self.field_registry:
+                balance = self.water_balance.heartbeat({field_key: weather_data}, {field_key: crop_stage})[field_key]
+            else:
+                balance = self.water_balance.estimate({field_key: weather_data}, {field_key: crop_stage})[field_key]
+        validated_inputs["projected_awc"] = balance["projected_awc"]
+        validated_inputs["depletion_rate"] = balance["depletion_rate"]
         
         # Merge with manual inputs (manual overrides real-world if provided)
-        final_inputs = {**validated_inputs, **(manual_inputs or {})}
-        
-        recommendation_obj = self.engines[domain].generate_recommendation(final_inputs)
-        self.audit_logger.log_recommendation(recommendation_obj)
-        return self._filter_for_operator(recommendation_obj)
+        return {**validated_inputs, **(manual_inputs or {})}, field_key, weather
+
+    def get_forecast_horizon(self, lat: float, lon: float, manual_inputs: Dict[str, Any] = None, forecast_days: int = OpenMeteoIngestor.MAX_FORECAST_DAYS) -> Dict[str, Any]:
+        """Precomputed per-domain timeline over the hourly forecast: when each domain next changes state."""
+        weather_data = self.weather_ingestor.fetch(lat, lon, forecast_days=forecast_days)
+        return evaluate_horizon(weather_data, manual_inputs)
+
+    def backtest(self, fields: Sequence[Dict[str, Any]], start: datetime, end: datetime, step_hours: int = 1,
+                 irrigation_mm: Optional[float] = DEFAULT_IRRIGATION_MM, timelines: bool = False) -> Dict[str, Any]:
+        """Replay planting, irrigation and harvest over stored historical weather. Backtests are never audited."""
+        return run_backtest(self.weather_store, fields, start, end, step_hours, irrigation_mm).to_dict(timelines)
+
+    def replay_thresholds(self, alternatives: Dict[str, Dict[str, Any]], domains: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """How many audited decisions would flip under alternative thresholds. Replays are never audited."""
+        return replay_thresholds(self.audit_logger.log_dir, alternatives, domains)
+
+    def apply_audit_retention(self, hot_days: int = 30, cold_days: Optional[int] = None) -> Dict[str, int]:
+        """Compress closed audit partitions, move old ones to the cold tier and expire the oldest."""
+        result = self.audit_logger.apply_retention(hot_days, cold_days)
+        if cold_days is not None:
+            result["purged_inputs"] = self.audit_logger.purge_unreferenced()
+        result["downsampled_kpi_buckets"] = self.kpi_rollups.downsample()
+        return result
+
+    def register_field(self, field_id: str, lat: float, lon: float) -> Dict[str, Any]:
+        """Add (or move) a field on the map; its weather is prefetched for its grid cell."""
+        cell_lat, cell_lon = self.field_registry.register(field_id, lat, lon)
+        self.field_registry.save()
+        # A moved field may leave its old cell empty; only occupied cells are prefetched
+        self.weather_prefetcher.sync(self.field_registry.weather_cells())
+        return {"status": "REGISTERED", "field_id": field_id, "lat": lat, "lon": lon, "weather_cell": [cell_lat, cell_lon]}
+
+    def _check_domains(self, domains: Optional[Sequence[str]]):
+        for domain in domains or ():
+            if domain not in self.engines:
+                raise ValueError(f"Unknown domain: {domain}")
+
+    def fields_in_viewport(self, south: float, west: float, north: float, east: float,
+                           domains: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Registered fields inside a map viewport with their latest recommendation per domain."""
+        self._check_domains(domains)
+        return self.field_registry.viewport(south, west, north, east, domains, limit)
+
+    def nearest_fields(self, lat: float, lon: float, k: int = 1, max_km: Optional[float] = None,
+                       domains: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        self._check_domains(domains)
+        return self.field_registry.nearest(lat, lon, k, max_km, domains)
+
+    def register_planting(self, field_id: str, planted_at: datetime, gdd: float = 0.0) -> Dict[str, Any]:
+        """Start deriving crop_stage for a field from growing degree days accumulated since planting."""
+        planted_hour = np.datetime64(planted_at.replace(tzinfo=None), "h").astype(np.int64)
+        self.gdd.register(field_id, int(planted_hour), gdd)
+        self.gdd.save()
+        return {"status": "REGISTERED", "field_id": field_id, "gdd": gdd, "crop_stage": self.gdd.stage(field_id)}
 
-    def get_recommendation(self, domain: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    def _with_crop_stage(self, field_id: Optional[str], inputs: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Fill in the GDD-derived crop_stage for a planted field unless the caller supplied one."""
+        if field_id is None or field_id not in self.gdd or (inputs and "crop_stage" in inputs):
+            return inputs
+        return {**(inputs or {}), "crop_stage": self.gdd.stage(field_id)}
+
+    def log_irrigation(self, field_id: str, depth_mm: float) -> Dict[str, Any]:
+        """Record an applied irrigation so the water balance refills at the next heartbeat."""
+        self.water_balance.log_irrigation(field_id, depth_mm)
+        self.recommendation_cache.invalidate(field_id, "irrigation")
+        return {"status": "LOGGED", "field_id": field_id, "depth_mm": depth_mm}
+
+    def get_recommendation(self, domain: str, inputs: Dict[str, Any], field_id: Optional[str] = None, refresh: bool = False) -> Dict[str, Any]:
+        """
+        With a field_id, a still-valid recommendation for unchanged inputs is served from the
+        active cache (no new audit entry); expiry, an input change or `refresh` re-evaluates.
+        """
+        return self.get_conditional_recommendation(domain, inputs, field_id=field_id, refresh=refresh)[1]
+
+    def get_conditional_recommendation(self, domain: str, inputs: Dict[str, Any], if_none_match: Collection[str] = (),
+                                       field_id: Optional[str] = None, refresh: bool = False) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Returns (etag, body). The ETag hashes the normalized inputs, the thresholds version and
+        the decision. If the client already holds the current ETag the body is None (HTTP 304):
+        a known input hash answers without evaluating, serializing or auditing.
+        """
         domain = domain.lower()
         if domain not in self.engines:
             raise ValueError(f"Unknown domain: {domain}")
-        
-        recommendation_obj = self.engines[domain].generate_recommendation(inputs)
-        self.audit_logger.log_recommendation(recommendation_obj)
-        return self._filter_for_operator(recommendation_obj)
+
+        engine = self.engines[domain]
+        with span("engine.parse_inputs"):
+            record = engine.parse_inputs(self._with_crop_stage(field_id, inputs))
+            normalized = record.to_dict()
+            input_hash = _content_hash([domain, normalized, self.thresholds_version])
+        if if_none_match and not refresh:
+            etag = self.etag_index.get(input_hash)
+            if etag is not None and etag in if_none_match:
+                return etag, None
+
+        recommendation_obj = None
+        if field_id is not None and not refresh:
+            with span("cache.lookup"):
+                recommendation_obj = self.recommendation_cache.get(field_id, domain, normalized)
+        fresh = recommendation_obj is None
+        if fresh:
+            with span("engine.evaluate", domain=domain):
+                recommendation_obj = engine.evaluate(record, raw_inputs=normalized)
+            self.audit_logger.log_recommendation(recommendation_obj)
+            with span("kpi_rollups.observe"):
+                self.kpi_rollups.observe([recommendation_obj])
+        etag = _recommendation_etag(input_hash, recommendation_obj)
+        self.etag_index.put(input_hash, etag, recommendation_obj.valid_until)
+
+        with span("recommendation.to_dict"):
+            result = self._filter_for_operator(recommendation_obj)
+        if fresh and field_id is not None:
+            with span("publish"):
+                self.recommendation_cache.put(field_id, domain, recommendation_obj)
+                self.event_bus.observe(field_id, domain, result)
+                self.field_registry.update_recommendation(field_id, domain, result)
+        return etag, result
 
     def _filter_for_operator(self, recommendation_obj: Recommendation) -> Dict[str, Any]:
         """Refine visibility: operators see only valid recommendations and key flags."""
@@ -72,23 +330,127 @@ class FarmSensePlatform:
         
         # In a real system, we'd update the database. Here we update the log file.
         log["confirmed_at"] = datetime.now().isoformat()
-        import json
-        log_path = os.path.join(self.audit_logger.log_dir, f"{audit_id}.json")
-        with open(log_path, "w") as f:
-            json.dump(log, f, indent=4)
+        self.audit_logger.update_log(audit_id, log)
+        self.recommendation_cache.confirm(audit_id, log["confirmed_at"])
             
         return {"status": "CONFIRMED", "confirmed_at": log["confirmed_at"], "audit_log_id": audit_id}
 
-    def get_all_recommendations(self, all_inputs: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    def get_all_recommendations(self, all_inputs: Dict[str, Dict[str, Any]], strict: bool = False, field_id: Optional[str] = None,
+                                refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        return self.get_field_recommendations(domain_inputs=all_inputs, strict=strict, field_id=field_id, refresh=refresh)
+
+    def validate_batch(self, all_inputs: Dict[str, Dict[str, Any]], strict: bool = False) -> None:
+        """Reject a malformed batch (unknown domain, wrong type, bad stage) before anything runs."""
+        self.fused_evaluator.parse(domain_inputs=all_inputs, strict=strict)
+
+    def get_field_recommendations(self, field_inputs: Optional[Dict[str, Any]] = None, domain_inputs: Optional[Dict[str, Dict[str, Any]]] = None,
+                                  strict: bool = False, field_id: Optional[str] = None, refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        All eleven domains for one field in a single fused pass: shared inputs are parsed once,
+        every recommendation shares one timestamp, and one batch audit entry is written.
+        `strict` also rejects input keys no engine reads. With a field_id, domains with an
+        active cached recommendation are served from the cache and only the rest are evaluated.
+        """
+        with span("fused.parse"):
+            records = self.fused_evaluator.parse(self._with_crop_stage(field_id, field_inputs), domain_inputs, strict)
         results = {}
-        for domain in self.engines:
-            inputs = all_inputs.get(domain, {})
-            results[domain] = self.get_recommendation(domain, inputs)
-        return results
-
-    def aggregate_kpis(self, domain: Optional[str] = None) -> Dict[str, float]:
-        """Aggregate KPIs from the audit log for a specific domain or all domains."""
-        logs = self.audit_logger.get_all_logs()
+        if field_id is not None and not refresh:
+            with span("cache.lookup"):
+                for domain, engine in self.engines.items():
+                    cached = self.recommendation_cache.get(field_id, domain, records[domain].to_dict(engine.INPUTS))
+                    if cached is not None:
+                        results[domain] = cached
+
+        stale = [domain for domain in self.engines if domain not in results]
+        if stale:
+            with span("fused.evaluate", domains=len(stale)):
+                batch = self.fused_evaluator.evaluate(domains=stale, records=records)
+            self.audit_logger.log_batch(batch.batch_id, batch.issued_at, batch.recommendations)
+            with span("kpi_rollups.observe"):
+                self.kpi_rollups.observe(batch.recommendations.values())
+            for domain, rec in batch.recommendations.items():
+                results[domain] = rec
+        with span("recommendation.to_dict"):
+            filtered = {domain: self._filter_for_operator(results[domain]) for domain in self.engines}
+        if field_id is not None and stale:
+            with span("publish"):
+                for domain in stale:
+                    self.recommendation_cache.put(field_id, domain, results[domain])
+                    self.event_bus.observe(field_id, domain, filtered[domain])
+                    self.field_registry.update_recommendation(field_id, domain, filtered[domain])
+        return filtered
+
+    def heartbeat_plan(self, horizon_hours: float = 1.0) -> Dict[str, List[Dict[str, str]]]:
+        """Which cached field/domain recommendations need re-evaluating before the next heartbeat."""
+        due, skippable = self.recommendation_cache.due(timedelta(hours=horizon_hours))
+        return {
+            "due": [{"field_id": field_id, "domain": domain} for field_id, domain in due],
+            "skip": [{"field_id": field_id, "domain": domain} for field_id, domain in skippable],
+        }
+
+    def expire_recommendations(self) -> Optional[datetime]:
+        """Evict expired cache entries (publishing expiry events); returns the next expiry time."""
+        self.recommendation_cache.evict_expired()
+        return self.recommendation_cache.next_expiry()
+
+    def sweep_decisions(self, domain: str, axes: Dict[str, Any], fixed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """What-if decision map over a Cartesian grid of inputs. Sweeps are never audited."""
+        domain = domain.lower()
+        if domain not in self.engines:
+            raise ValueError(f"Unknown domain: {domain}")
+        return to_compact(sweep(domain, axes, fixed))
+
+    def get_raster_recommendations(self, inputs: Dict[str, Any], domains: Sequence[str] = RASTER_DOMAINS, mask: Optional[Any] = None, tiles: bool = False) -> Dict[str, Any]:
+        """Sub-field decision rasters for the map view. Cell-wise results are not audited."""
+        for domain in domains:
+            if domain.lower() not in self.engines:
+                raise ValueError(f"Unknown domain: {domain}")
+        arrays = {k: np.asarray(v) if isinstance(v, list) else v for k, v in inputs.items()}
+        results = evaluate_raster(arrays, [d.lower() for d in domains], None if mask is None else np.asarray(mask))
+
+        response = {}
+        for domain, result in results.items():
+            response[domain] = {
+                "shape": list(result["base"].shape),
+                "base": result["base"].tolist(),
+                "emergency": result["emergency"].astype(np.int8).tolist(),
+                "stats": result["stats"],
+            }
+            if tiles:
+                pyramid = build_tile_pyramid(result["base"], result["emergency"])
+                response[domain]["tiles"] = {key: base64.b64encode(png).decode("ascii") for key, png in pyramid.items()}
+        return response
+
+    def kpi_series(self, start: datetime, end: datetime, domain: Optional[str] = None, kpis: Optional[Sequence[str]] = None,
+                   resolution: Optional[str] = None, max_points: Optional[int] = None) -> Dict[str, Any]:
+        """Hourly or daily KPI time series for charts, served from the rollups (no audit log scan)."""
+        if domain and domain.lower() not in self.engines:
+            raise ValueError(f"Unknown domain: {domain}")
+        return self.kpi_rollups.query(start, end, domain, kpis, resolution, max_points)
+
+    def kpi_distribution(self, start: datetime, end: datetime, domain: Optional[str] = None, kpis: Optional[Sequence[str]] = None,
+                         quantiles: Sequence[float] = DEFAULT_QUANTILES, bins: int = 10) -> Dict[str, Any]:
+        """Quantiles (p5/p50/p95 by default) and histograms per KPI from the rollup sketches."""
+        if domain and domain.lower() not in self.engines:
+            raise ValueError(f"Unknown domain: {domain}")
+        if bins < 1:
+            raise ValueError("bins must be at least 1.")
+        return self.kpi_rollups.distribution(start, end, domain, kpis, quantiles, bins)
+
+    def rebuild_kpi_rollups(self) -> int:
+        """Recompute the KPI rollups from the full audit log (first run, or after changing audit history)."""
+        self.kpi_rollups = KPIRollups(self.kpi_rollups.state_path, self.kpi_rollups.hourly_days, self.kpi_rollups.save_interval)
+        added = self.kpi_rollups.catch_up(self.audit_logger.iter_logs())
+        self.kpi_rollups.downsample()
+        self.kpi_rollups.save()
+        return added
+
+    def aggregate_kpis(self, domain: Optional[str] = None, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, float]:
+        """
+        Aggregate KPIs from the audit log for a specific domain or all domains, optionally
+        over [start, end). Only the audit partitions overlapping the range are opened.
+        """
+        logs = self.audit_logger.iter_logs(start, end, domain)
         aggregated = {}
         counts = {}
         
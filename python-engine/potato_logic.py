@@ -1,28 +1,55 @@
 from farmsense.core.engine import DomainEngine, Recommendation, BaseRecommendation, ContextFlag, SeverityOverlay
 from farmsense.data.thresholds import POTATO_THRESHOLDS
-from typing import Dict, Any, List, Optional
+from farmsense.core.records import InputRecord, compile_record
+from farmsense.core.margins import boundaries, decision_margin, trend_rate
+from farmsense.core.explanations import Explanation
+from typing import Dict, Any, List, Optional, Tuple, Type
 
 class DeterministicEngine(DomainEngine):
     """Base class for deterministic domain engines with trend awareness and KPI tracking."""
+    # Inputs the engine reads; compiled into a __slots__ record class per engine
+    INPUTS: Tuple[str, ...] = ()
+    Record: Type[InputRecord] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.Record = compile_record(f"{cls.__name__}Inputs", cls.INPUTS)
+
+    def parse_inputs(self, inputs: Dict[str, Any], strict: bool = False) -> InputRecord:
+        return self.Record.parse(inputs, strict)
+
+    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
+        record = self.parse_inputs(inputs)
+        return self.evaluate(record, raw_inputs=record.to_dict())
+
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        """
+        Apply the domain rules to a parsed record (this engine's Record or the shared
+        FieldRecord). `provenance` (raw_inputs, issued_at, audit_log_id) is passed
+        through to the Recommendation untouched.
+        """
+        raise NotImplementedError("Subclasses must implement evaluate")
     
     def calculate_trend(self, current: float, previous: Optional[float], rate_of_change: Optional[float] = None) -> str:
-        if previous is None:
-            return "STABLE"
         if rate_of_change is not None:
             if rate_of_change > 0: return "INCREASING"
             if rate_of_change < 0: return "DECREASING"
+        if previous is None:
+            return "STABLE"
         if current < previous: return "DECREASING"
         if current > previous: return "INCREASING"
         return "STABLE"
 
 class PlanningEngine(DeterministicEngine):
+    INPUTS = ("plan_finalized", "market_data_ready", "labor_available")
+
     def __init__(self):
         super().__init__("PLANNING")
 
-    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
-        plan_finalized = inputs.get("plan_finalized", False)
-        market_data_ready = inputs.get("market_data_ready", False)
-        labor_available = inputs.get("labor_available", True)
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        plan_finalized = record.plan_finalized
+        market_data_ready = record.market_data_ready
+        labor_available = record.labor_available
         
         crossed = []
         flags = []
@@ -34,7 +61,7 @@ class PlanningEngine(DeterministicEngine):
             base = BaseRecommendation.WAIT
         elif not plan_finalized and market_data_ready:
             base = BaseRecommendation.NOW
-            crossed.append("Market data is ready for final planning.")
+            crossed.append(Explanation("planning.market_data_ready"))
             kpis["operational_readiness"] = 100
             predicted_next = BaseRecommendation.WAIT
         else:
@@ -44,20 +71,23 @@ class PlanningEngine(DeterministicEngine):
             "inputs_used": ["plan_finalized", "market_data_ready", "labor_available"],
             "thresholds_crossed": crossed,
             "thresholds_approaching": [],
-            "trends_considered": ["Market data availability"],
+            "trends_considered": [Explanation("planning.trend.market_data")],
             "crop_stage": "PRE-SEASON"
         }
-        return Recommendation(self.domain_name, base, explainability=explain, raw_inputs=inputs, kpis=kpis, context_flags=flags, predicted_next=predicted_next)
+        margin = decision_margin()
+        return Recommendation(self.domain_name, base, explainability=explain, **provenance, kpis=kpis, context_flags=flags, predicted_next=predicted_next, decision_margin=margin)
 
 class FieldPrepEngine(DeterministicEngine):
+    INPUTS = ("awc", "compaction_level", "precipitation_forecast", "equipment_available")
+
     def __init__(self):
         super().__init__("FIELD_PREP")
 
-    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
-        awc = inputs.get("awc", 100)
-        compaction = inputs.get("compaction_level", 0)
-        precip_forecast = inputs.get("precipitation_forecast", 0)
-        equipment_available = inputs.get("equipment_available", True)
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        awc = record.awc
+        compaction = record.compaction_level
+        precip_forecast = record.precipitation_forecast
+        equipment_available = record.equipment_available
         
         flags = []
         crossed = []
@@ -70,12 +100,12 @@ class FieldPrepEngine(DeterministicEngine):
         elif precip_forecast > 5:
             flags.append(ContextFlag.WEATHER_DELAY)
             base = BaseRecommendation.WAIT
-            crossed.append(f"Precipitation forecast ({precip_forecast}mm) exceeds the 5mm threshold for field work.")
+            crossed.append(Explanation("field_prep.precip_delay", precip_forecast=precip_forecast))
             kpis["operational_delay_risk"] = 100 # Numeric for aggregation
             predicted_next = BaseRecommendation.SOON
         elif awc < 30 and compaction > 70:
             base = BaseRecommendation.NOW
-            crossed.append(f"Soil moisture ({awc}%) is low and compaction ({compaction}) is high, requiring immediate preparation.")
+            crossed.append(Explanation("field_prep.dry_and_compacted", awc=awc, compaction=compaction))
             kpis["stress_avoidance_potential"] = 100
             predicted_next = BaseRecommendation.WAIT
         else:
@@ -85,20 +115,27 @@ class FieldPrepEngine(DeterministicEngine):
             "inputs_used": ["awc", "compaction_level", "precipitation_forecast", "equipment_available"],
             "thresholds_crossed": crossed,
             "thresholds_approaching": [],
-            "trends_considered": ["Soil moisture and compaction trends"],
+            "trends_considered": [Explanation("field_prep.trend.soil")],
             "crop_stage": "PRE-PLANTING"
         }
-        return Recommendation(self.domain_name, base, context_flags=flags, explainability=explain, raw_inputs=inputs, kpis=kpis, predicted_next=predicted_next)
+        margin = decision_margin(
+            boundaries("awc", awc, [30]),
+            boundaries("compaction_level", compaction, [70]),
+            boundaries("precipitation_forecast", precip_forecast, [5])
+        )
+        return Recommendation(self.domain_name, base, context_flags=flags, explainability=explain, **provenance, kpis=kpis, predicted_next=predicted_next, decision_margin=margin)
 
 class PlantingEngine(DeterministicEngine):
+    INPUTS = ("soil_temp", "prev_soil_temp", "seed_ready", "labor_available")
+
     def __init__(self):
         super().__init__("PLANTING")
 
-    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
-        soil_temp = inputs.get("soil_temp", 0)
-        prev_temp = inputs.get("prev_soil_temp")
-        seed_ready = inputs.get("seed_ready", True)
-        labor_available = inputs.get("labor_available", True)
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        soil_temp = record.soil_temp
+        prev_temp = record.prev_soil_temp
+        seed_ready = record.seed_ready
+        labor_available = record.labor_available
         
         trend = self.calculate_trend(soil_temp, prev_temp)
         thresh = POTATO_THRESHOLDS["planting"]
@@ -113,12 +150,12 @@ class PlantingEngine(DeterministicEngine):
             base = BaseRecommendation.WAIT
         elif seed_ready and thresh["min_soil_temp"] <= soil_temp <= thresh["max_soil_temp"]:
             base = BaseRecommendation.NOW
-            crossed.append(f"Soil temperature ({soil_temp}°C) is within the optimal planting range ({thresh['min_soil_temp']}°C to {thresh['max_soil_temp']}°C).")
+            crossed.append(Explanation("planting.in_window", soil_temp=soil_temp, min_soil_temp=thresh["min_soil_temp"], max_soil_temp=thresh["max_soil_temp"]))
             kpis["planting_window_optimization"] = 100
             predicted_next = BaseRecommendation.WAIT
         elif seed_ready and soil_temp < thresh["min_soil_temp"] and trend == "INCREASING":
             base = BaseRecommendation.SOON
-            approaching.append(f"Soil temperature ({soil_temp}°C) is warming toward the minimum planting threshold ({thresh['min_soil_temp']}°C).")
+            approaching.append(Explanation("planting.warming", soil_temp=soil_temp, min_soil_temp=thresh["min_soil_temp"]))
             kpis["planting_window_optimization"] = 50
             predicted_next = BaseRecommendation.NOW
         elif seed_ready and soil_temp < thresh["min_soil_temp"]:
@@ -131,25 +168,34 @@ class PlantingEngine(DeterministicEngine):
             "inputs_used": ["soil_temp", "prev_soil_temp", "seed_ready", "labor_available"],
             "thresholds_crossed": crossed,
             "thresholds_approaching": approaching,
-            "trends_considered": [f"Soil temperature is {trend}"],
+            "trends_considered": [Explanation("planting.trend.soil_temp", trend=trend)],
             "crop_stage": "PLANTING"
         }
-        return Recommendation(self.domain_name, base, explainability=explain, raw_inputs=inputs, kpis=kpis, context_flags=flags, predicted_next=predicted_next)
+        margin = decision_margin(
+            boundaries("soil_temp", soil_temp, [thresh["min_soil_temp"], thresh["max_soil_temp"]], trend_rate(soil_temp, prev_temp))
+        )
+        return Recommendation(self.domain_name, base, explainability=explain, **provenance, kpis=kpis, context_flags=flags, predicted_next=predicted_next, decision_margin=margin)
 
 class IrrigationEngine(DeterministicEngine):
+    INPUTS = ("awc", "prev_awc", "precipitation_forecast", "equipment_available", "projected_awc", "depletion_rate", "crop_stage")
+
     def __init__(self):
         super().__init__("IRRIGATION")
 
-    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
-        awc = inputs.get("awc", 100)
-        prev_awc = inputs.get("prev_awc")
-        precip_forecast = inputs.get("precipitation_forecast", 0)
-        equipment_available = inputs.get("equipment_available", True)
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        awc = record.awc
+        prev_awc = record.prev_awc
+        precip_forecast = record.precipitation_forecast
+        equipment_available = record.equipment_available
+        # From the soil water-balance model, when available
+        projected_awc = record.projected_awc
+        depletion_rate = record.depletion_rate
         
         thresh = POTATO_THRESHOLDS["irrigation"]
-        stage = inputs.get("crop_stage", "VEGETATIVE")
+        stage = record.crop_stage
         
-        trend = self.calculate_trend(awc, prev_awc)
+        trend = self.calculate_trend(awc, prev_awc, -depletion_rate if depletion_rate is not None else None)
+        projected_critical = projected_awc is not None and projected_awc < thresh["critical_awc"]
         flags = []
         overlays = []
         crossed = []
@@ -161,7 +207,7 @@ class IrrigationEngine(DeterministicEngine):
             flags.append(ContextFlag.EQUIPMENT_CONSTRAINT)
             base = BaseRecommendation.WAIT
         elif awc < thresh["critical_awc"]:
-            crossed.append(f"Available Water Content ({awc}%) has dropped below the critical threshold ({thresh['critical_awc']}%).")
+            crossed.append(Explanation("irrigation.below_critical", awc=awc, critical_awc=thresh["critical_awc"]))
             kpis["stress_avoidance"] = max(0, 100 - (thresh["critical_awc"] - awc) * 5)
             if precip_forecast > thresh["weather_delay_precip"]:
                 base = BaseRecommendation.WAIT
@@ -172,38 +218,55 @@ class IrrigationEngine(DeterministicEngine):
                 base = BaseRecommendation.NOW
                 if awc < thresh["emergency_awc"]:
                     overlays.append(SeverityOverlay.EMERGENCY)
-                    crossed.append(f"Available Water Content ({awc}%) is at a dangerous level (below {thresh['emergency_awc']}%).")
+                    crossed.append(Explanation("irrigation.emergency", awc=awc, emergency_awc=thresh["emergency_awc"]))
                 predicted_next = BaseRecommendation.WAIT
         elif awc < thresh["soon_awc"]:
-            approaching.append(f"Available Water Content ({awc}%) is nearing the critical irrigation threshold ({thresh['critical_awc']}%).")
-            if trend == "DECREASING":
+            approaching.append(Explanation("irrigation.nearing_critical", awc=awc, critical_awc=thresh["critical_awc"]))
+            if trend == "DECREASING" or projected_critical:
                 base = BaseRecommendation.SOON
                 predicted_next = BaseRecommendation.NOW
             else:
                 base = BaseRecommendation.LATER
                 predicted_next = BaseRecommendation.SOON
+        elif projected_critical:
+            approaching.append(Explanation("irrigation.projected_critical", projected_awc=projected_awc, critical_awc=thresh["critical_awc"]))
+            base = BaseRecommendation.SOON
+            predicted_next = BaseRecommendation.NOW
         else:
             base = BaseRecommendation.WAIT
             
+        inputs_used = ["awc", "prev_awc", "precipitation_forecast", "equipment_available"]
+        if projected_awc is not None:
+            inputs_used.append("projected_awc")
+        if depletion_rate is not None:
+            inputs_used.append("depletion_rate")
         explain = {
-            "inputs_used": ["awc", "prev_awc", "precipitation_forecast", "equipment_available"],
+            "inputs_used": inputs_used,
             "thresholds_crossed": crossed,
             "thresholds_approaching": approaching,
-            "trends_considered": [f"Available Water Content is {trend}"],
+            "trends_considered": [Explanation("irrigation.trend.awc", trend=trend)],
             "crop_stage": stage
         }
-        return Recommendation(self.domain_name, base, context_flags=flags, severity_overlays=overlays, explainability=explain, raw_inputs=inputs, kpis=kpis, predicted_next=predicted_next)
+        awc_rate = -depletion_rate if depletion_rate is not None else trend_rate(awc, prev_awc)
+        margin = decision_margin(
+            boundaries("awc", awc, [thresh["emergency_awc"], thresh["critical_awc"], thresh["soon_awc"]], awc_rate),
+            boundaries("projected_awc", projected_awc, [thresh["critical_awc"]], awc_rate),
+            boundaries("precipitation_forecast", precip_forecast, [thresh["weather_delay_precip"]])
+        )
+        return Recommendation(self.domain_name, base, context_flags=flags, severity_overlays=overlays, explainability=explain, **provenance, kpis=kpis, predicted_next=predicted_next, decision_margin=margin)
 
 class NutrientEngine(DeterministicEngine):
+    INPUTS = ("nitrogen", "prev_nitrogen", "crop_stage", "materials_available")
+
     def __init__(self):
         super().__init__("NUTRIENT")
 
-    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
-        n_level = inputs.get("nitrogen", 100)
-        prev_n_level = inputs.get("prev_nitrogen")
-        stage = inputs.get("crop_stage", "VEGETATIVE")
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        n_level = record.nitrogen
+        prev_n_level = record.prev_nitrogen
+        stage = record.crop_stage
         target = POTATO_THRESHOLDS["nutrient"]["nitrogen_targets"].get(stage, 100)
-        materials_available = inputs.get("materials_available", True)
+        materials_available = record.materials_available
         
         trend = self.calculate_trend(n_level, prev_n_level)
         crossed = []
@@ -217,11 +280,11 @@ class NutrientEngine(DeterministicEngine):
             base = BaseRecommendation.WAIT
         elif n_level < target:
             base = BaseRecommendation.NOW
-            crossed.append(f"Nitrogen level ({n_level}) is below the target ({target}) for the {stage} stage.")
+            crossed.append(Explanation("nutrient.below_target", n_level=n_level, target=target, stage=stage))
             predicted_next = BaseRecommendation.WAIT
         elif n_level < target * 1.1:
             base = BaseRecommendation.SOON
-            approaching.append(f"Nitrogen level ({n_level}) is approaching the target ({target}).")
+            approaching.append(Explanation("nutrient.approaching_target", n_level=n_level, target=target))
             predicted_next = BaseRecommendation.NOW
         else:
             base = BaseRecommendation.WAIT
@@ -230,20 +293,25 @@ class NutrientEngine(DeterministicEngine):
             "inputs_used": ["nitrogen", "prev_nitrogen", "crop_stage", "materials_available"],
             "thresholds_crossed": crossed,
             "thresholds_approaching": approaching,
-            "trends_considered": [f"Nitrogen level is {trend}"],
+            "trends_considered": [Explanation("nutrient.trend.nitrogen", trend=trend)],
             "crop_stage": stage
         }
-        return Recommendation(self.domain_name, base, explainability=explain, raw_inputs=inputs, kpis=kpis, context_flags=flags, predicted_next=predicted_next)
+        margin = decision_margin(
+            boundaries("nitrogen", n_level, [target, target * 1.1], trend_rate(n_level, prev_n_level))
+        )
+        return Recommendation(self.domain_name, base, explainability=explain, **provenance, kpis=kpis, context_flags=flags, predicted_next=predicted_next, decision_margin=margin)
 
 class PestWeedEngine(DeterministicEngine):
+    INPUTS = ("pest_count", "prev_pest_count", "humidity", "equipment_available")
+
     def __init__(self):
         super().__init__("PEST_WEED")
 
-    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
-        pest_count = inputs.get("pest_count", 0)
-        prev_pest = inputs.get("prev_pest_count")
-        humidity = inputs.get("humidity", 0)
-        equipment_available = inputs.get("equipment_available", True)
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        pest_count = record.pest_count
+        prev_pest = record.prev_pest_count
+        humidity = record.humidity
+        equipment_available = record.equipment_available
         
         thresh = POTATO_THRESHOLDS["pest_weed"]
         
@@ -260,15 +328,15 @@ class PestWeedEngine(DeterministicEngine):
             base = BaseRecommendation.WAIT
         elif pest_count > thresh["pest_count_threshold"] or humidity > thresh["humidity_threshold"]:
             base = BaseRecommendation.NOW
-            if pest_count > thresh["pest_count_threshold"]: crossed.append(f"Pest count ({pest_count}) exceeds the threshold ({thresh['pest_count_threshold']}).")
-            if humidity > thresh["humidity_threshold"]: crossed.append(f"Humidity ({humidity}%) exceeds the disease risk threshold ({thresh['humidity_threshold']}%).")
+            if pest_count > thresh["pest_count_threshold"]: crossed.append(Explanation("pest_weed.pest_count", pest_count=pest_count, pest_count_threshold=thresh["pest_count_threshold"]))
+            if humidity > thresh["humidity_threshold"]: crossed.append(Explanation("pest_weed.humidity", humidity=humidity, humidity_threshold=thresh["humidity_threshold"]))
             if pest_count > thresh["emergency_pest_count"]:
                 overlays.append(SeverityOverlay.EMERGENCY)
-                crossed.append(f"Pest count ({pest_count}) is at an emergency level (above {thresh['emergency_pest_count']}).")
+                crossed.append(Explanation("pest_weed.emergency", pest_count=pest_count, emergency_pest_count=thresh["emergency_pest_count"]))
             predicted_next = BaseRecommendation.WAIT
         elif trend == "INCREASING":
             base = BaseRecommendation.MONITOR
-            approaching.append(f"Pest count ({pest_count}) is increasing toward the threshold ({thresh['pest_count_threshold']}).")
+            approaching.append(Explanation("pest_weed.increasing", pest_count=pest_count, pest_count_threshold=thresh["pest_count_threshold"]))
             predicted_next = BaseRecommendation.NOW
         else:
             base = BaseRecommendation.WAIT
@@ -277,20 +345,26 @@ class PestWeedEngine(DeterministicEngine):
             "inputs_used": ["pest_count", "prev_pest_count", "humidity", "equipment_available"],
             "thresholds_crossed": crossed,
             "thresholds_approaching": approaching,
-            "trends_considered": [f"Pest count is {trend}"],
+            "trends_considered": [Explanation("pest_weed.trend.pest_count", trend=trend)],
             "crop_stage": "GROWTH"
         }
-        return Recommendation(self.domain_name, base, severity_overlays=overlays, explainability=explain, raw_inputs=inputs, kpis=kpis, context_flags=flags, predicted_next=predicted_next)
+        margin = decision_margin(
+            boundaries("pest_count", pest_count, [thresh["pest_count_threshold"], thresh["emergency_pest_count"]], trend_rate(pest_count, prev_pest)),
+            boundaries("humidity", humidity, [thresh["humidity_threshold"]])
+        )
+        return Recommendation(self.domain_name, base, severity_overlays=overlays, explainability=explain, **provenance, kpis=kpis, context_flags=flags, predicted_next=predicted_next, decision_margin=margin)
 
 class HarvestEngine(DeterministicEngine):
+    INPUTS = ("skin_set", "soil_temp", "labor_available", "equipment_available")
+
     def __init__(self):
         super().__init__("HARVEST")
 
-    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
-        skin_set = inputs.get("skin_set", False)
-        soil_temp = inputs.get("soil_temp", 0)
-        labor_available = inputs.get("labor_available", True)
-        equipment_available = inputs.get("equipment_available", True)
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        skin_set = record.skin_set
+        soil_temp = record.soil_temp
+        labor_available = record.labor_available
+        equipment_available = record.equipment_available
         
         thresh = POTATO_THRESHOLDS["harvest"]
         
@@ -307,7 +381,7 @@ class HarvestEngine(DeterministicEngine):
             base = BaseRecommendation.WAIT
         elif skin_set and thresh["min_soil_temp"] <= soil_temp <= thresh["max_soil_temp"]:
             base = BaseRecommendation.NOW
-            crossed.append("Skin set is complete and soil temperature is optimal for harvest.")
+            crossed.append(Explanation("harvest.ready"))
             predicted_next = BaseRecommendation.WAIT
         elif skin_set:
             base = BaseRecommendation.MONITOR
@@ -319,18 +393,23 @@ class HarvestEngine(DeterministicEngine):
             "inputs_used": ["skin_set", "soil_temp", "labor_available", "equipment_available"],
             "thresholds_crossed": crossed,
             "thresholds_approaching": [],
-            "trends_considered": ["Maturity and soil temp trends"],
+            "trends_considered": [Explanation("harvest.trend.maturity")],
             "crop_stage": "MATURITY"
         }
-        return Recommendation(self.domain_name, base, explainability=explain, raw_inputs=inputs, kpis=kpis, context_flags=flags, predicted_next=predicted_next)
+        margin = decision_margin(
+            boundaries("soil_temp", soil_temp, [thresh["min_soil_temp"], thresh["max_soil_temp"]])
+        )
+        return Recommendation(self.domain_name, base, explainability=explain, **provenance, kpis=kpis, context_flags=flags, predicted_next=predicted_next, decision_margin=margin)
 
 class ProcessingEngine(DeterministicEngine):
+    INPUTS = ("queue_size", "capacity_available")
+
     def __init__(self):
         super().__init__("PROCESSING")
 
-    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
-        queue = inputs.get("queue_size", 0)
-        capacity_available = inputs.get("capacity_available", True)
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        queue = record.queue_size
+        capacity_available = record.capacity_available
         
         crossed = []
         flags = []
@@ -342,7 +421,7 @@ class ProcessingEngine(DeterministicEngine):
             base = BaseRecommendation.WAIT
         elif queue > 50:
             base = BaseRecommendation.NOW
-            crossed.append(f"Processing queue ({queue}) exceeds the high-priority threshold (50).")
+            crossed.append(Explanation("processing.queue_high", queue=queue))
             predicted_next = BaseRecommendation.WAIT
         elif queue > 20:
             base = BaseRecommendation.SOON
@@ -354,18 +433,21 @@ class ProcessingEngine(DeterministicEngine):
             "inputs_used": ["queue_size", "capacity_available"],
             "thresholds_crossed": crossed,
             "thresholds_approaching": [],
-            "trends_considered": ["Throughput trends"],
+            "trends_considered": [Explanation("processing.trend.throughput")],
             "crop_stage": "POST-HARVEST"
         }
-        return Recommendation(self.domain_name, base, explainability=explain, raw_inputs=inputs, kpis=kpis, context_flags=flags, predicted_next=predicted_next)
+        margin = decision_margin(boundaries("queue_size", queue, [20, 50]))
+        return Recommendation(self.domain_name, base, explainability=explain, **provenance, kpis=kpis, context_flags=flags, predicted_next=predicted_next, decision_margin=margin)
 
 class PackagingEngine(DeterministicEngine):
+    INPUTS = ("inventory_level", "materials_available")
+
     def __init__(self):
         super().__init__("PACKAGING")
 
-    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
-        inventory = inputs.get("inventory_level", 0)
-        materials_available = inputs.get("materials_available", True)
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        inventory = record.inventory_level
+        materials_available = record.materials_available
         
         crossed = []
         flags = []
@@ -377,7 +459,7 @@ class PackagingEngine(DeterministicEngine):
             base = BaseRecommendation.WAIT
         elif inventory > 1000:
             base = BaseRecommendation.NOW
-            crossed.append(f"Inventory level ({inventory}) exceeds the packaging threshold (1000).")
+            crossed.append(Explanation("packaging.inventory_high", inventory=inventory))
             predicted_next = BaseRecommendation.WAIT
         else:
             base = BaseRecommendation.WAIT
@@ -386,19 +468,22 @@ class PackagingEngine(DeterministicEngine):
             "inputs_used": ["inventory_level", "materials_available"],
             "thresholds_crossed": crossed,
             "thresholds_approaching": [],
-            "trends_considered": ["Inventory accumulation rate"],
+            "trends_considered": [Explanation("packaging.trend.inventory")],
             "crop_stage": "POST-HARVEST"
         }
-        return Recommendation(self.domain_name, base, explainability=explain, raw_inputs=inputs, kpis=kpis, context_flags=flags, predicted_next=predicted_next)
+        margin = decision_margin(boundaries("inventory_level", inventory, [1000]))
+        return Recommendation(self.domain_name, base, explainability=explain, **provenance, kpis=kpis, context_flags=flags, predicted_next=predicted_next, decision_margin=margin)
 
 class WarehousingEngine(DeterministicEngine):
+    INPUTS = ("storage_temp", "prev_storage_temp", "capacity_available")
+
     def __init__(self):
         super().__init__("WAREHOUSING")
 
-    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
-        temp = inputs.get("storage_temp", 4)
-        prev_temp = inputs.get("prev_storage_temp")
-        capacity_available = inputs.get("capacity_available", True)
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        temp = record.storage_temp
+        prev_temp = record.prev_storage_temp
+        capacity_available = record.capacity_available
         
         thresh = POTATO_THRESHOLDS["warehousing"]
         
@@ -416,11 +501,11 @@ class WarehousingEngine(DeterministicEngine):
         elif temp > thresh["max_temp"]:
             base = BaseRecommendation.NOW
             overlays.append(SeverityOverlay.EMERGENCY)
-            crossed.append(f"Storage temperature ({temp}°C) exceeds the maximum safe threshold ({thresh['max_temp']}°C).")
+            crossed.append(Explanation("warehousing.too_warm", temp=temp, max_temp=thresh["max_temp"]))
             predicted_next = BaseRecommendation.WAIT
         elif trend == "INCREASING":
             base = BaseRecommendation.MONITOR
-            approaching.append(f"Storage temperature ({temp}°C) is increasing toward the maximum threshold ({thresh['max_temp']}°C).")
+            approaching.append(Explanation("warehousing.warming", temp=temp, max_temp=thresh["max_temp"]))
             predicted_next = BaseRecommendation.NOW
         else:
             base = BaseRecommendation.WAIT
@@ -429,18 +514,23 @@ class WarehousingEngine(DeterministicEngine):
             "inputs_used": ["storage_temp", "prev_storage_temp", "capacity_available"],
             "thresholds_crossed": crossed,
             "thresholds_approaching": approaching,
-            "trends_considered": [f"Storage temperature is {trend}"],
+            "trends_considered": [Explanation("warehousing.trend.storage_temp", trend=trend)],
             "crop_stage": "STORAGE"
         }
-        return Recommendation(self.domain_name, base, severity_overlays=overlays, explainability=explain, raw_inputs=inputs, kpis=kpis, context_flags=flags, predicted_next=predicted_next)
+        margin = decision_margin(
+            boundaries("storage_temp", temp, [thresh["max_temp"]], trend_rate(temp, prev_temp))
+        )
+        return Recommendation(self.domain_name, base, severity_overlays=overlays, explainability=explain, **provenance, kpis=kpis, context_flags=flags, predicted_next=predicted_next, decision_margin=margin)
 
 class LogisticsEngine(DeterministicEngine):
+    INPUTS = ("orders_pending", "trucks_available")
+
     def __init__(self):
         super().__init__("LOGISTICS")
 
-    def generate_recommendation(self, inputs: Dict[str, Any]) -> Recommendation:
-        orders = inputs.get("orders_pending", 0)
-        trucks_available = inputs.get("trucks_available", True)
+    def evaluate(self, record: InputRecord, **provenance) -> Recommendation:
+        orders = record.orders_pending
+        trucks_available = record.trucks_available
         
         crossed = []
         flags = []
@@ -452,7 +542,7 @@ class LogisticsEngine(DeterministicEngine):
             base = BaseRecommendation.WAIT
         elif orders > 10:
             base = BaseRecommendation.NOW
-            crossed.append(f"Pending orders ({orders}) exceed the immediate dispatch threshold (10).")
+            crossed.append(Explanation("logistics.orders_pending", orders=orders))
             predicted_next = BaseRecommendation.WAIT
         elif orders > 5:
             base = BaseRecommendation.SOON
@@ -464,7 +554,8 @@ class LogisticsEngine(DeterministicEngine):
             "inputs_used": ["orders_pending", "trucks_available"],
             "thresholds_crossed": crossed,
             "thresholds_approaching": [],
-            "trends_considered": ["Order fulfillment rate"],
+            "trends_considered": [Explanation("logistics.trend.fulfillment")],
             "crop_stage": "DISTRIBUTION"
         }
-        return Recommendation(self.domain_name, base, explainability=explain, raw_inputs=inputs, kpis=kpis, context_flags=flags, predicted_next=predicted_next)
+        margin = decision_margin(boundaries("orders_pending", orders, [5, 10]))
+        return Recommendation(self.domain_name, base, explainability=explain, **provenance, kpis=kpis, context_flags=flags, predicted_next=predicted_next, decision_margin=margin)
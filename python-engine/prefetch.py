@@ -0,0 +1,310 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, Iterable, Optional, Tuple
+from farmsense.data.ingestion import OpenMeteoIngestor
+from farmsense.core.tracing import traced
+from farmsense.core.memory import container_bytes
+
+LocationKey = Tuple[float, float]
+
+# How old a weather payload may be before a domain refuses to use it.
+DEFAULT_STALENESS_LIMITS = {
+    "irrigation": timedelta(hours=3),
+    "pest_weed": timedelta(hours=6),
+    "planting": timedelta(hours=6),
+    "field_prep": timedelta(hours=6),
+    "harvest": timedelta(hours=6),
+}
+DEFAULT_STALENESS_LIMIT = timedelta(hours=12)
+
+def _hourly_column(values: Any) -> Optional[Tuple[np.ndarray, str]]:
+    """A numeric hourly series as float64 (None -> NaN) and its kind ("i" or "f"); None otherwise."""
+    if isinstance(values, np.ndarray):
+        return (values.astype(np.float64), "i" if values.dtype.kind in "iu" else "f") if values.dtype.kind in "iuf" else None
+    if not isinstance(values, list) or not all(
+            v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+        return None
+    kind = "i" if values and all(isinstance(v, int) for v in values) else "f"
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64), kind
+
+class WeatherUnavailableError(RuntimeError):
+    """No weather payload is cached for a location (or it is too old) and the upstream fetch failed."""
+
+class WeatherSnapshot:
+    __slots__ = ("payload", "fetched_at")
+
+    def __init__(self, payload: Dict[str, Any], fetched_at: datetime):
+        self.payload = payload
+        self.fetched_at = fetched_at
+
+    def age(self, now: Optional[datetime] = None) -> timedelta:
+        return (now or datetime.now()) - self.fetched_at
+
+class _Flight:
+    """One upstream fetch in progress; concurrent readers of the same location wait on it."""
+    __slots__ = ("done", "snapshot", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.snapshot: Optional[WeatherSnapshot] = None
+        self.error: Optional[Exception] = None
+
+class WeatherPrefetcher:
+    """
+    Stale-while-revalidate cache of Open-Meteo payloads for every registered field location.
+
+    A background thread refreshes each location once its payload is older than
+    `refresh_interval`, ahead of the next heartbeat. Reads return the last-known payload
+    immediately with its age; a read only blocks on the network when nothing is cached for
+    the location, or the payload is older than the requesting domain's staleness limit.
+
+    Only registered locations are prefetched. Ad-hoc coordinates are fetched on demand and
+    kept in a bounded LRU (`max_adhoc`) for up to `refresh_interval`. Concurrent fetches
+    for one location share a single upstream request.
+    """
+    RETRY_SECONDS = 60.0
+    DEFAULT_MAX_ADHOC = 256
+
+    def __init__(self, ingestor: Optional[OpenMeteoIngestor] = None, forecast_days: int = 2,
+                 refresh_interval: timedelta = timedelta(minutes=30),
+                 staleness_limits: Optional[Dict[str, timedelta]] = None, max_adhoc: int = DEFAULT_MAX_ADHOC):
+        self.ingestor = ingestor or OpenMeteoIngestor()
+        self.forecast_days = forecast_days
+        self.refresh_interval = refresh_interval
+        self.staleness_limits = {**DEFAULT_STALENESS_LIMITS, **(staleness_limits or {})}
+        self.locations: Dict[LocationKey, Tuple[float, float]] = {}
+        self.snapshots: Dict[LocationKey, WeatherSnapshot] = {}
+        self.max_adhoc = max_adhoc
+        self.adhoc: "OrderedDict[LocationKey, WeatherSnapshot]" = OrderedDict()
+        self.last_failure: Dict[LocationKey, datetime] = {}
+        self._inflight: Dict[LocationKey, _Flight] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def location_key(lat: float, lon: float) -> LocationKey:
+        return (round(lat, 4), round(lon, 4))
+
+    def register(self, lat: float, lon: float) -> LocationKey:
+        """Prefetch a location from now on (an ad-hoc payload already cached for it is kept)."""
+        key = self.location_key(lat, lon)
+        with self._lock:
+            added = key not in self.locations
+            self.locations.setdefault(key, (lat, lon))
+            if key in self.adhoc:
+                self.snapshots.setdefault(key, self.adhoc.pop(key))
+        if added:
+            # The background thread may be sleeping until the oldest payload is due
+            self._wake.set()
+        return key
+
+    def sync(self, locations: Iterable[Tuple[float, float]]) -> None:
+        """Prefetch exactly these locations; payloads of dropped ones fall back to the ad-hoc LRU."""
+        keep = {self.location_key(lat, lon): (lat, lon) for lat, lon in locations}
+        with self._lock:
+            for key in [key for key in self.locations if key not in keep]:
+                del self.locations[key]
+                self.last_failure.pop(key, None)
+                if key in self.snapshots:
+                    self._put_adhoc(key, self.snapshots.pop(key))
+        for lat, lon in keep.values():
+            self.register(lat, lon)
+
+    def _put_adhoc(self, key: LocationKey, snapshot: WeatherSnapshot) -> None:
+        self.adhoc[key] = snapshot
+        self.adhoc.move_to_end(key)
+        while len(self.adhoc) > self.max_adhoc:
+            self.adhoc.popitem(last=False)
+
+    def staleness_limit(self, domain: Optional[str]) -> timedelta:
+        return self.staleness_limits.get(domain, DEFAULT_STALENESS_LIMIT)
+
+    @traced("weather.prefetched")
+    def get(self, lat: float, lon: float, domain: Optional[str] = None) -> Tuple[Dict[str, Any], timedelta]:
+        """
+        (payload, age) for a location. Registered locations are served from cache and
+        revalidated in the background; ad-hoc ones are refetched once older than `refresh_interval`.
+        """
+        key = self.location_key(lat, lon)
+        with self._lock:
+            registered = key in self.locations
+            snapshot = self.snapshots.get(key) if registered else self.adhoc.get(key)
+            if snapshot is not None and not registered:
+                self.adhoc.move_to_end(key)
+        if snapshot is not None:
+            age = snapshot.age()
+            if registered and age >= self.refresh_interval and not self._backing_off(key):
+                self._wake.set()
+            if age <= self.staleness_limit(domain) and (registered or age < self.refresh_interval):
+                return snapshot.payload, age
+
+        # Nothing usable cached: this is the only case that waits on the network
+        try:
+            snapshot = self.refresh(key) if registered else self._fetch_adhoc(key, lat, lon)
+        except Exception as e:
+            if not registered and snapshot is not None and snapshot.age() <= self.staleness_limit(domain):
+                return snapshot.payload, snapshot.age()
+            limit = self.staleness_limit(domain)
+            raise WeatherUnavailableError(
+                f"Weather for {key} unavailable ({e}); cached data is missing or older than {limit} for {domain}.") from e
+        return snapshot.payload, snapshot.age()
+
+    def _single_flight(self, key: LocationKey, fetch: Callable[[], WeatherSnapshot]) -> WeatherSnapshot:
+        """Run `fetch` unless one is already in flight for `key`; followers share its result or error."""
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.snapshot
+        try:
+            flight.snapshot = fetch()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+        return flight.snapshot
+
+    def refresh(self, key: LocationKey) -> WeatherSnapshot:
+        lat, lon = self.locations[key]
+
+        def fetch() -> WeatherSnapshot:
+            try:
+                payload = self.ingestor.fetch(lat, lon, forecast_days=self.forecast_days)
+            except Exception:
+                with self._lock:
+                    self.last_failure[key] = datetime.now()
+                raise
+            snapshot = WeatherSnapshot(payload, datetime.now())
+            with self._lock:
+                self.snapshots[key] = snapshot
+                self.last_failure.pop(key, None)
+            return snapshot
+        return self._single_flight(key, fetch)
+
+    def _fetch_adhoc(self, key: LocationKey, lat: float, lon: float) -> WeatherSnapshot:
+        def fetch() -> WeatherSnapshot:
+            snapshot = WeatherSnapshot(self.ingestor.fetch(lat, lon, forecast_days=self.forecast_days), datetime.now())
+            with self._lock:
+                self._put_adhoc(key, snapshot)
+            return snapshot
+        return self._single_flight(key, fetch)
+
+    def _backing_off(self, key: LocationKey) -> bool:
+        failed_at = self.last_failure.get(key)
+        return failed_at is not None and (datetime.now() - failed_at).total_seconds() < self.RETRY_SECONDS
+
+    def refresh_due(self, now: Optional[datetime] = None) -> Dict[LocationKey, Optional[str]]:
+        """One prefetch pass over locations whose payload is due; returns key -> error (None if ok)."""
+        now = now or datetime.now()
+        with self._lock:
+            due = [key for key in self.locations
+                   if key not in self.snapshots or self.snapshots[key].age(now) >= self.refresh_interval]
+        results = {}
+        for key in due:
+            try:
+                self.refresh(key)
+                results[key] = None
+            except Exception as e:
+                # Keep serving the last-known payload; the next pass retries
+                results[key] = str(e)
+        return results
+
+    def next_due_in(self, now: Optional[datetime] = None) -> float:
+        """Seconds until the oldest payload needs refreshing."""
+        now = now or datetime.now()
+        with self._lock:
+            if not self.snapshots or len(self.snapshots) < len(self.locations):
+                return 0.0 if self.locations else self.refresh_interval.total_seconds()
+            oldest = min(snapshot.fetched_at for snapshot in self.snapshots.values())
+        return max((oldest + self.refresh_interval - now).total_seconds(), 0.0)
+
+    def snapshot_state(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Numeric hourly series go into one float64 array; the rest of each payload stays in metadata."""
+        columns, offset, snapshots = [], 0, []
+        with self._lock:
+            for key, s in [*self.adhoc.items(), *self.snapshots.items()]:
+                hourly, layout = {}, []
+                for name, values in s.payload.get("hourly", {}).items():
+                    column = _hourly_column(values)
+                    if column is None:
+                        hourly[name] = values
+                        continue
+                    layout.append([name, offset, len(column[0]), column[1]])
+                    columns.append(column[0])
+                    offset += len(column[0])
+                payload = {**s.payload, "hourly": hourly} if "hourly" in s.payload else s.payload
+                snapshots.append([*key, payload, s.fetched_at.isoformat(), layout])
+        return ({"hourly": np.concatenate(columns)} if columns else {}), {"snapshots": snapshots}
+
+    def memory_usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self.snapshots) + len(self.adhoc), "locations": len(self.locations),
+                    "adhoc": len(self.adhoc),
+                    "bytes": container_bytes(self.snapshots) + container_bytes(self.adhoc) + container_bytes(self.locations)}
+
+    def shrink(self, target_bytes: int) -> int:
+        """
+        Drop least recently used ad-hoc payloads until the estimate fits `target_bytes`.
+        Registered locations are kept: the prefetch pass would only fetch them again.
+        """
+        usage = self.memory_usage()
+        with self._lock:
+            if usage["bytes"] <= target_bytes or not self.adhoc:
+                return 0
+            entries = len(self.snapshots) + len(self.adhoc)
+            dropped = min(entries - int(entries * target_bytes / usage["bytes"]), len(self.adhoc))
+            for _ in range(dropped):
+                self.adhoc.popitem(last=False)
+            return dropped
+
+    def restore_state(self, arrays: Dict[str, Any], meta: Dict[str, Any]) -> None:
+        """
+        Last-known payloads keep their original fetch time, so stale ones are revalidated as usual.
+        Locations come from the field registry; payloads for anything else go to the ad-hoc LRU.
+        """
+        with self._lock:
+            for key_lat, key_lon, payload, fetched_at, layout in meta["snapshots"]:
+                key = (key_lat, key_lon)
+                for name, start, length, kind in layout:
+                    column = arrays["hourly"][start:start + length]
+                    payload["hourly"][name] = column.astype(np.int64).tolist() if kind == "i" else \
+                        [None if np.isnan(v) else v for v in column.tolist()]
+                snapshot = WeatherSnapshot(payload, datetime.fromisoformat(fetched_at))
+                if key in self.locations:
+                    self.snapshots[key] = snapshot
+                else:
+                    self._put_adhoc(key, snapshot)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="weather-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        retry = min(self.RETRY_SECONDS, self.refresh_interval.total_seconds())
+        while not self._stop.is_set():
+            failed = any(error is not None for error in self.refresh_due().values())
+            # Failed locations stay due; back off instead of retrying in a tight loop
+            self._wake.wait(retry if failed else self.next_due_in())
+            self._wake.clear()
@@ -0,0 +1,114 @@
+import struct
+import zlib
+import numpy as np
+from typing import Dict, Any, Optional, Sequence, Tuple
+from farmsense.domains.vectorized import evaluate, DECISION_LABELS
+
+RASTER_DOMAINS = ("irrigation", "nutrient", "pest_weed")
+NODATA = -1
+DEFAULT_CHUNK_ROWS = 256
+TILE_SIZE = 256
+
+# RGBA per decision code, following the display colours in Recommendation.to_dict.
+PALETTE = np.array([
+    [34, 197, 94, 160],   # WAIT     GREEN
+    [6, 182, 212, 160],   # MONITOR  CYAN
+    [59, 130, 246, 160],  # LATER    BLUE
+    [234, 179, 8, 200],   # SOON     YELLOW
+    [249, 115, 22, 220],  # NOW      ORANGE
+], dtype=np.uint8)
+EMERGENCY_RGBA = np.array([239, 68, 68, 255], dtype=np.uint8)
+NODATA_RGBA = np.array([0, 0, 0, 0], dtype=np.uint8)
+
+def _raster_shape(inputs: Dict[str, Any]) -> Tuple[int, int]:
+    shapes = {np.shape(v) for v in inputs.values() if np.ndim(v) == 2}
+    if len(shapes) != 1:
+        raise ValueError("Raster inputs must include 2-D arrays that all share one shape.")
+    return shapes.pop()
+
+def evaluate_raster(inputs: Dict[str, Any], domains: Sequence[str] = RASTER_DOMAINS, mask: Optional[np.ndarray] = None,
+                    chunk_rows: int = DEFAULT_CHUNK_ROWS, thresholds: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Apply domain engines cell-wise over a field grid.
+
+    2-D inputs are per-cell values; scalars apply to the whole field. The grid is processed
+    in bands of `chunk_rows` rows, so temporaries stay bounded by the band size and only the
+    int8 decision raster and EMERGENCY mask are held at full resolution. Cells outside
+    `mask` (e.g. beyond the pivot circle) are NODATA and excluded from statistics.
+    """
+    rows, cols = _raster_shape(inputs)
+    valid = np.ones((rows, cols), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    results = {}
+    for domain in domains:
+        base = np.full((rows, cols), NODATA, dtype=np.int8)
+        emergency = np.zeros((rows, cols), dtype=bool)
+        for start in range(0, rows, chunk_rows):
+            band = slice(start, min(start + chunk_rows, rows))
+            band_inputs = {k: (v[band] if np.ndim(v) == 2 else v) for k, v in inputs.items()}
+            decision = evaluate(domain, band_inputs, thresholds)
+            band_valid = valid[band]
+            base[band] = np.where(band_valid, np.broadcast_to(decision.base, band_valid.shape), NODATA)
+            emergency[band] = band_valid & np.broadcast_to(decision.emergency, band_valid.shape)
+        results[domain] = {"base": base, "emergency": emergency, "stats": raster_stats(base, emergency)}
+    return results
+
+def raster_stats(base: np.ndarray, emergency: np.ndarray) -> Dict[str, Any]:
+    valid = base != NODATA
+    total = int(valid.sum())
+    counts = np.bincount(base[valid].astype(np.int64), minlength=len(DECISION_LABELS))
+    return {
+        "cells": total,
+        "nodata_cells": int(base.size - total),
+        "counts": {DECISION_LABELS[code]: int(n) for code, n in enumerate(counts)},
+        "fractions": {DECISION_LABELS[code]: round(int(n) / total, 4) if total else 0.0 for code, n in enumerate(counts)},
+        "emergency_cells": int(emergency.sum()),
+        "dominant": DECISION_LABELS[int(counts.argmax())] if total else None,
+    }
+
+def downsample(base: np.ndarray, emergency: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Halve resolution keeping the most urgent decision in each 2x2 block."""
+    rows, cols = base.shape
+    pad = ((0, rows % 2), (0, cols % 2))
+    base = np.pad(base, pad, constant_values=NODATA)
+    emergency = np.pad(emergency, pad, constant_values=False)
+    r, c = base.shape[0] // 2, base.shape[1] // 2
+    return base.reshape(r, 2, c, 2).max(axis=(1, 3)), emergency.reshape(r, 2, c, 2).any(axis=(1, 3))
+
+def render_rgba(base: np.ndarray, emergency: np.ndarray) -> np.ndarray:
+    rgba = PALETTE[np.clip(base, 0, len(PALETTE) - 1)]
+    rgba[emergency] = EMERGENCY_RGBA
+    rgba[base == NODATA] = NODATA_RGBA
+    return rgba
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Minimal RGBA PNG encoder (stdlib zlib only)."""
+    height, width = rgba.shape[:2]
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    scanlines = np.concatenate([np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, width * 4)], axis=1)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+def build_tile_pyramid(base: np.ndarray, emergency: np.ndarray, tile_size: int = TILE_SIZE) -> Dict[str, bytes]:
+    """
+    Pre-render PNG tiles keyed "z/x/y". z=0 is the coarsest level (a single tile);
+    each finer level doubles resolution until the native raster is reached.
+    """
+    levels = [(base, emergency)]
+    while max(levels[-1][0].shape) > tile_size:
+        levels.append(downsample(*levels[-1]))
+
+    tiles = {}
+    for z, (level_base, level_emergency) in enumerate(reversed(levels)):
+        rows, cols = level_base.shape
+        for y in range(0, rows, tile_size):
+            for x in range(0, cols, tile_size):
+                block = (slice(y, y + tile_size), slice(x, x + tile_size))
+                tiles[f"{z}/{x // tile_size}/{y // tile_size}"] = encode_png(render_rgba(level_base[block], level_emergency[block]))
+    return tiles
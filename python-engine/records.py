@@ -0,0 +1,123 @@
+from numbers import Real
+from typing import Dict, Any, Mapping, Sequence, Tuple, Type
+from farmsense.data.thresholds import POTATO_THRESHOLDS
+
+class InputValidationError(ValueError):
+    """Raised before any engine runs when inputs have the wrong type or an unknown value."""
+
+NUMBER = "number"
+BOOLEAN = "boolean"
+STAGE = "stage"
+
+# Every input read by any domain engine: (kind, default applied when absent).
+# The engines agree on all shared defaults, so one record can feed all eleven domains.
+FIELD_SPECS: Dict[str, Tuple[str, Any]] = {
+    # Planning
+    "plan_finalized": (BOOLEAN, False),
+    "market_data_ready": (BOOLEAN, False),
+    # Soil and water
+    "awc": (NUMBER, 100),
+    "prev_awc": (NUMBER, None),
+    "projected_awc": (NUMBER, None),
+    "depletion_rate": (NUMBER, None),
+    "compaction_level": (NUMBER, 0),
+    "precipitation_forecast": (NUMBER, 0),
+    "soil_temp": (NUMBER, 0),
+    "prev_soil_temp": (NUMBER, None),
+    "humidity": (NUMBER, 0),
+    # Crop
+    "crop_stage": (STAGE, "VEGETATIVE"),
+    "seed_ready": (BOOLEAN, True),
+    "skin_set": (BOOLEAN, False),
+    "nitrogen": (NUMBER, 100),
+    "prev_nitrogen": (NUMBER, None),
+    "pest_count": (NUMBER, 0),
+    "prev_pest_count": (NUMBER, None),
+    # Post-harvest
+    "queue_size": (NUMBER, 0),
+    "inventory_level": (NUMBER, 0),
+    "storage_temp": (NUMBER, 4),
+    "prev_storage_temp": (NUMBER, None),
+    "orders_pending": (NUMBER, 0),
+    # Resources
+    "labor_available": (BOOLEAN, True),
+    "equipment_available": (BOOLEAN, True),
+    "capacity_available": (BOOLEAN, True),
+    "materials_available": (BOOLEAN, True),
+    "trucks_available": (BOOLEAN, True),
+}
+
+# Keys produced by DataValidator that no engine reads; tolerated in strict mode.
+AUXILIARY_KEYS = frozenset({"et"})
+
+_STAGES = frozenset(POTATO_THRESHOLDS["growth_stages"])
+
+def _check(key: str, kind: str, value: Any, nullable: bool) -> Any:
+    if value is None:
+        if nullable:
+            return None
+        raise InputValidationError(f"Input '{key}' must not be null.")
+    if kind == NUMBER:
+        if isinstance(value, Real) and not isinstance(value, bool):
+            return value
+        raise InputValidationError(f"Input '{key}' must be a number, got {type(value).__name__}.")
+    if kind == BOOLEAN:
+        if isinstance(value, bool):
+            return value
+        raise InputValidationError(f"Input '{key}' must be true or false, got {type(value).__name__}.")
+    if value in _STAGES:
+        return value
+    raise InputValidationError(f"Input '{key}' must be one of {sorted(_STAGES)}, got {value!r}.")
+
+class InputRecord:
+    """
+    Base for compiled input records. Subclasses carry __slots__ for exactly their fields and a
+    tuple of (key, kind, default) specs; parse() validates and fills them in one pass.
+    Missing keys take the engine default. Explicit nulls are only accepted for inputs whose
+    default is null (previous readings and model outputs).
+    """
+    __slots__ = ()
+    _specs: Tuple[Tuple[str, str, Any], ...] = ()
+
+    @classmethod
+    def parse(cls, inputs: Mapping[str, Any], strict: bool = False) -> "InputRecord":
+        if strict:
+            unknown = set(inputs) - set(FIELD_SPECS) - AUXILIARY_KEYS
+            if unknown:
+                raise InputValidationError(f"Unknown inputs: {sorted(unknown)}.")
+        record = cls.__new__(cls)
+        for key, kind, default in cls._specs:
+            if key in inputs:
+                setattr(record, key, _check(key, kind, inputs[key], default is None))
+            else:
+                setattr(record, key, default)
+        return record
+
+    def merged(self, overrides: Mapping[str, Any], strict: bool = False) -> "InputRecord":
+        """Copy of this record with (validated) domain-specific values layered on top."""
+        record = self.parse(overrides, strict)
+        for key, _, _ in self._specs:
+            if key not in overrides:
+                setattr(record, key, getattr(self, key))
+        return record
+
+    def to_dict(self, fields: Sequence[str] = None) -> Dict[str, Any]:
+        """Compact normalized form (optionally limited to `fields`) for audit storage."""
+        return {key: getattr(self, key) for key in (fields or self.__slots__)}
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()})"
+
+def compile_record(name: str, fields: Sequence[str]) -> Type[InputRecord]:
+    """Build a __slots__ record class for the given input fields."""
+    unknown = [f for f in fields if f not in FIELD_SPECS]
+    if unknown:
+        raise ValueError(f"No input spec for {unknown}.")
+    specs = tuple((f, FIELD_SPECS[f][0], FIELD_SPECS[f][1]) for f in fields)
+    return type(name, (InputRecord,), {"__slots__": tuple(fields), "_specs": specs})
+
+# The union record shared by all engines in a fused evaluation.
+FieldRecord = compile_record("FieldRecord", tuple(FIELD_SPECS))
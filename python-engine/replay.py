@@ -0,0 +1,146 @@
+"""
+Counterfactual threshold replay: how many audited decisions would flip under alternative
+threshold tables.
+
+Stored raw_inputs are streamed from the audit log once, buffered per domain into columnar
+chunks and re-evaluated with the vectorized evaluators under the baseline and every
+alternative table. Only per-domain confusion matrices are kept, so memory is bounded by the
+chunk size however many records are replayed. Nothing is written to the audit log.
+"""
+import numpy as np
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from farmsense.core.audit import AuditLogger
+from farmsense.core.records import FIELD_SPECS, BOOLEAN, STAGE, FieldRecord, InputValidationError
+from farmsense.data.thresholds import POTATO_THRESHOLDS, thresholds_version, with_overrides
+from farmsense.domains.vectorized import evaluate, VECTOR_EVALUATORS, DECISION_LABELS
+
+DEFAULT_CHUNK_SIZE = 65536
+
+def to_columns(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Columnar form of a chunk of raw_inputs. Only keys present in the chunk become columns;
+    records missing a key take the engine default (NaN for readings that default to null).
+    """
+    keys = {key for record in records for key in record if key in FIELD_SPECS}
+    columns = {}
+    for key in keys:
+        kind, default = FIELD_SPECS[key]
+        fill = np.nan if default is None else default
+        values = [record.get(key) for record in records]
+        values = [fill if v is None else v for v in values]
+        if kind == BOOLEAN:
+            columns[key] = np.asarray(values, dtype=bool)
+        elif kind == STAGE:
+            columns[key] = np.asarray(values)
+        else:
+            columns[key] = np.asarray(values, dtype=float)
+    return columns
+
+def _valid(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    valid = []
+    for record in records:
+        try:
+            FieldRecord.parse(record)
+        except InputValidationError:
+            continue
+        valid.append(record)
+    return valid
+
+class ThresholdReplay:
+    """
+    Accumulates old-vs-new decision confusion matrices per alternative and domain.
+    Rows are the decision under the baseline table, columns the decision under the
+    alternative, both indexed WAIT..NOW.
+    """
+
+    def __init__(self, alternatives: Dict[str, Dict[str, Any]], baseline: Dict[str, Any] = POTATO_THRESHOLDS,
+                 domains: Optional[Iterable[str]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if not alternatives:
+            raise ValueError("Replay needs at least one alternative threshold set.")
+        self.baseline = baseline
+        self.alternatives = {name: with_overrides(overrides, baseline) for name, overrides in alternatives.items()}
+        self.domains = None if domains is None else {d.lower() for d in domains}
+        for domain in self.domains or ():
+            if domain not in VECTOR_EVALUATORS:
+                raise ValueError(f"Unknown domain: {domain}")
+        self.chunk_size = chunk_size
+        self.buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self.shape = (len(DECISION_LABELS), len(DECISION_LABELS))
+        self.confusion: Dict[str, Dict[str, np.ndarray]] = {name: {} for name in self.alternatives}
+        self.emergency_flips: Dict[str, Dict[str, int]] = {name: {} for name in self.alternatives}
+        self.skipped = 0
+
+    def add(self, domain: str, raw_inputs: Dict[str, Any]):
+        domain = domain.lower()
+        if domain not in VECTOR_EVALUATORS or not isinstance(raw_inputs, dict):
+            self.skipped += 1
+            return
+        if self.domains is not None and domain not in self.domains:
+            return
+        buffer = self.buffers.setdefault(domain, [])
+        buffer.append(raw_inputs)
+        if len(buffer) >= self.chunk_size:
+            self.flush(domain)
+
+    def flush(self, domain: Optional[str] = None):
+        for name in [domain] if domain else list(self.buffers):
+            records = self.buffers.pop(name, [])
+            if records:
+                self._evaluate(name, records)
+
+    def _evaluate(self, domain: str, records: List[Dict[str, Any]]):
+        try:
+            columns = to_columns(records)
+        except (TypeError, ValueError):
+            # A malformed record in the chunk: fall back to validating one by one
+            valid = _valid(records)
+            self.skipped += len(records) - len(valid)
+            if not valid:
+                return
+            records, columns = valid, to_columns(valid)
+        old = evaluate(domain, columns, self.baseline)
+        size = len(DECISION_LABELS)
+        old_base = np.broadcast_to(old.base, (len(records),)).astype(np.int64)
+        old_emergency = np.broadcast_to(old.emergency, old_base.shape)
+        for name, thresholds in self.alternatives.items():
+            new = evaluate(domain, columns, thresholds)
+            new_base = np.broadcast_to(new.base, old_base.shape).astype(np.int64)
+            counts = np.bincount(old_base * size + new_base, minlength=size * size).reshape(self.shape)
+            confusion = self.confusion[name]
+            confusion[domain] = confusion.get(domain, np.zeros(self.shape, dtype=np.int64)) + counts
+            flips = int((old_emergency != np.broadcast_to(new.emergency, old_base.shape)).sum())
+            self.emergency_flips[name][domain] = self.emergency_flips[name].get(domain, 0) + flips
+
+    def run(self, records: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        for domain, raw_inputs in records:
+            self.add(domain, raw_inputs)
+        self.flush()
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        labels = [DECISION_LABELS[code] for code in sorted(DECISION_LABELS)]
+        scenarios = {}
+        for name, thresholds in self.alternatives.items():
+            domains = {}
+            for domain, matrix in sorted(self.confusion[name].items()):
+                total = int(matrix.sum())
+                flipped = total - int(np.trace(matrix))
+                domains[domain] = {
+                    "records": total,
+                    "flipped": flipped,
+                    "flip_rate": round(flipped / total, 4) if total else 0.0,
+                    "emergency_flips": self.emergency_flips[name][domain],
+                    "confusion": matrix.tolist(),
+                }
+            scenarios[name] = {"thresholds_version": thresholds_version(thresholds), "domains": domains}
+        return {
+            "baseline_thresholds_version": thresholds_version(self.baseline),
+            "labels": labels,
+            "skipped": self.skipped,
+            "scenarios": scenarios,
+        }
+
+def replay_thresholds(log_dir: str, alternatives: Dict[str, Dict[str, Any]], domains: Optional[Iterable[str]] = None,
+                      baseline: Dict[str, Any] = POTATO_THRESHOLDS, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Single streaming pass over an audit log directory; see ThresholdReplay."""
+    return ThresholdReplay(alternatives, baseline, domains, chunk_size).run(AuditLogger(log_dir).iter_inputs())
@@ -0,0 +1,299 @@
+import os
+import json
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+from farmsense.core.engine import Recommendation
+from farmsense.core.sketches import QuantileSketch, quantile_label
+from farmsense.core.memory import container_bytes
+
+# Bucket width in seconds per resolution; bucket keys are whole widths since the epoch
+# (naive local time, as recommendations are issued).
+RESOLUTIONS = {"hour": 3600, "day": 86400}
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+EPOCH = datetime(1970, 1, 1)
+
+def bucket_key(issued_at: datetime, resolution: str) -> int:
+    return int((issued_at - EPOCH).total_seconds()) // RESOLUTIONS[resolution]
+
+def bucket_start(key: int, resolution: str) -> datetime:
+    return EPOCH + timedelta(seconds=key * RESOLUTIONS[resolution])
+
+class RollupSeries:
+    """One KPI at one resolution: parallel lists ordered by bucket key, with a quantile sketch per bucket."""
+    __slots__ = ("keys", "count", "sum", "min", "max", "last", "sketch")
+
+    def __init__(self):
+        self.keys: List[int] = []
+        self.count: List[int] = []
+        self.sum: List[float] = []
+        self.min: List[float] = []
+        self.max: List[float] = []
+        self.last: List[float] = []
+        self.sketch: List[QuantileSketch] = []
+
+    def _bucket(self, key: int, value: float) -> int:
+        """Index of the bucket for `key`, inserting an empty one seeded with `value` if needed."""
+        # Recommendations arrive in time order, so the bucket is almost always the last one
+        if self.keys and self.keys[-1] == key:
+            return len(self.keys) - 1
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            self.keys.insert(i, key)
+            self.count.insert(i, 0)
+            self.sum.insert(i, 0.0)
+            self.min.insert(i, value)
+            self.max.insert(i, value)
+            self.last.insert(i, value)
+            self.sketch.insert(i, QuantileSketch())
+        return i
+
+    def add(self, key: int, value: float):
+        i = self._bucket(key, value)
+        self.count[i] += 1
+        self.sum[i] += value
+        self.min[i] = min(self.min[i], value)
+        self.max[i] = max(self.max[i], value)
+        self.last[i] = value
+        self.sketch[i].add(value)
+
+    def merge(self, other: "RollupSeries", other_is_newer: bool):
+        """Combine another worker's buckets; `last` comes from whichever side saw the later record."""
+        for k, key in enumerate(other.keys):
+            i = self._bucket(key, other.min[k])
+            fresh = self.count[i] == 0
+            self.count[i] += other.count[k]
+            self.sum[i] += other.sum[k]
+            self.min[i] = min(self.min[i], other.min[k])
+            self.max[i] = max(self.max[i], other.max[k])
+            if fresh or other_is_newer:
+                self.last[i] = other.last[k]
+            self.sketch[i].merge(other.sketch[k])
+
+    def drop_before(self, key: int) -> int:
+        i = bisect_left(self.keys, key)
+        for name in self.__slots__:
+            del getattr(self, name)[:i]
+        return i
+
+    def window(self, first: int, last: int) -> Tuple[int, int]:
+        """Index range of the buckets with first <= key < last."""
+        return bisect_left(self.keys, first), bisect_left(self.keys, last)
+
+    def to_dict(self) -> Dict[str, List[Any]]:
+        return {**{name: getattr(self, name) for name in self.__slots__}, "sketch": [s.to_dict() for s in self.sketch]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List[Any]]) -> "RollupSeries":
+        series = cls()
+        for name in cls.__slots__:
+            setattr(series, name, list(data[name]))
+        series.sketch = [QuantileSketch.from_dict(s) for s in data["sketch"]]
+        return series
+
+class KPIRollups:
+    """
+    Hourly and daily KPI rollups (count, sum, min, max, last and a quantile sketch) per
+    domain and KPI.
+
+    Every logged recommendation updates its hour and day bucket in place, so range queries
+    are two binary searches and a slice however much history is stored. Hourly buckets are
+    kept for `hourly_days`; older ones are dropped by `downsample`, leaving the daily buckets
+    that already hold the same values. State is saved to a JSON snapshot at most every
+    `save_interval` seconds along with the last issue time it includes; on restart,
+    `catch_up` folds in audit entries logged after the snapshot. Snapshots from other worker
+    processes combine with `merge`.
+    """
+    def __init__(self, state_path: Optional[str] = None, hourly_days: int = 14, save_interval: float = 60.0):
+        if hourly_days < 1:
+            raise ValueError("hourly_days must be at least 1.")
+        self.state_path = state_path
+        self.hourly_days = hourly_days
+        self.save_interval = save_interval
+        self.series: Dict[str, Dict[Tuple[str, str], RollupSeries]] = {res: {} for res in RESOLUTIONS}
+        self.through: Optional[datetime] = None
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        if state_path and os.path.exists(state_path):
+            self.load(state_path)
+
+    def _add(self, domain: str, issued_at: datetime, kpis: Dict[str, Any]):
+        for kpi, value in kpis.items():
+            if not isinstance(value, (int, float)):
+                continue
+            for res, series in self.series.items():
+                series.setdefault((domain, kpi), RollupSeries()).add(bucket_key(issued_at, res), float(value))
+        if self.through is None or issued_at > self.through:
+            self.through = issued_at
+
+    def observe(self, recommendations: Iterable[Recommendation]):
+        """Fold freshly logged recommendations (one call per request or batch) into their buckets."""
+        with self._lock:
+            for rec in recommendations:
+                self._add(rec.domain.lower(), rec.issued_at, rec.kpis)
+            due = self.state_path and time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            self.save()
+
+    def catch_up(self, logs: Iterable[Dict[str, Any]]) -> int:
+        """Add audit log records issued after the snapshot; returns how many were added."""
+        with self._lock:
+            through, added = self.through, 0
+            for log in logs:
+                issued_at = datetime.fromisoformat(log["issued_at"])
+                if not log.get("domain") or (through is not None and issued_at <= through):
+                    continue
+                self._add(log["domain"].lower(), issued_at, log.get("kpis") or {})
+                added += 1
+        return added
+
+    def downsample(self, now: Optional[datetime] = None) -> int:
+        """Drop hourly buckets older than the hourly window; returns how many were dropped."""
+        cutoff = bucket_key((now or datetime.now()) - timedelta(days=self.hourly_days), "hour")
+        with self._lock:
+            return sum(series.drop_before(cutoff) for series in self.series["hour"].values())
+
+    def resolution_for(self, start: datetime, end: datetime, now: Optional[datetime] = None) -> str:
+        """Hourly points for ranges up to a week that are still inside the hourly window, daily otherwise."""
+        hourly_from = (now or datetime.now()) - timedelta(days=self.hourly_days)
+        return "hour" if end - start <= timedelta(days=7) and start >= hourly_from else "day"
+
+    def query(self, start: datetime, end: datetime, domain: Optional[str] = None, kpis: Optional[Sequence[str]] = None,
+              resolution: Optional[str] = None, max_points: Optional[int] = None,
+              quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+        """
+        Chart-ready arrays for [start, end): per domain and KPI, parallel lists of bucket start
+        times and count/sum/mean/min/max/last plus one list per quantile (p5, p50, p95 by
+        default). Empty buckets are omitted. With `max_points`, consecutive buckets are merged
+        so no series is longer than that.
+        """
+        if end <= start:
+            raise ValueError("end must be after start.")
+        resolution = resolution or self.resolution_for(start, end)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}. Expected one of {sorted(RESOLUTIONS)}.")
+        if max_points is not None and max_points < 1:
+            raise ValueError("max_points must be at least 1.")
+        first, last = bucket_key(start, resolution), bucket_key(end - timedelta(microseconds=1), resolution) + 1
+        step = 1 if max_points is None else max(1, -(-(last - first) // max_points))
+
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (series_domain, kpi), series in sorted(self.series[resolution].items()):
+                if (domain and series_domain != domain.lower()) or (kpis and kpi not in kpis):
+                    continue
+                i, j = series.window(first, last)
+                if i == j:
+                    continue
+                result.setdefault(series_domain, {})[kpi] = _points(series, i, j, first, step, resolution, quantiles)
+        return {
+            "resolution": resolution,
+            "bucket_seconds": RESOLUTIONS[resolution] * step,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "series": result,
+        }
+
+    def merge(self, other: "KPIRollups") -> "KPIRollups":
+        """Fold in another worker's rollups (in place); returns self."""
+        with self._lock:
+            newer = other.through is not None and (self.through is None or other.through > self.through)
+            for res, series in other.series.items():
+                for key, other_series in series.items():
+                    self.series[res].setdefault(key, RollupSeries()).merge(other_series, newer)
+            if newer:
+                self.through = other.through
+        return self
+
+    def distribution(self, start: datetime, end: datetime, domain: Optional[str] = None, kpis: Optional[Sequence[str]] = None,
+                     quantiles: Sequence[float] = DEFAULT_QUANTILES, bins: int = 10) -> Dict[str, Any]:
+        """
+        Per domain and KPI over [start, end): quantiles and a histogram from the merged bucket
+        sketches, plus exact count/mean/min/max. Hourly buckets are used while the range is
+        inside the hourly window, so a recent range is not widened to whole days.
+        """
+        if end <= start:
+            raise ValueError("end must be after start.")
+        if any(not 0 <= q <= 1 for q in quantiles):
+            raise ValueError("Quantiles must be between 0 and 1.")
+        resolution = "hour" if start >= datetime.now() - timedelta(days=self.hourly_days) else "day"
+        first, last = bucket_key(start, resolution), bucket_key(end - timedelta(microseconds=1), resolution) + 1
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (series_domain, kpi), series in sorted(self.series[resolution].items()):
+                if (domain and series_domain != domain.lower()) or (kpis and kpi not in kpis):
+                    continue
+                i, j = series.window(first, last)
+                if i == j:
+                    continue
+                sketch = QuantileSketch()
+                for k in range(i, j):
+                    sketch.merge(series.sketch[k])
+                result.setdefault(series_domain, {})[kpi] = {
+                    "count": sketch.count,
+                    "mean": round(sketch.sum / sketch.count, 2),
+                    "min": sketch.min,
+                    "max": sketch.max,
+                    **sketch.quantiles(quantiles),
+                    "histogram": sketch.histogram(bins),
+                }
+        return {"resolution": resolution, "start": start.isoformat(), "end": end.isoformat(), "kpis": result}
+
+    def memory_usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": sum(len(s.keys) for series in self.series.values() for s in series.values()),
+                    "bytes": sum(container_bytes(series) for series in self.series.values())}
+
+    def save(self, path: Optional[str] = None):
+        """Write state atomically (temp file, then rename) so a crash never leaves a torn file."""
+        path = path or self.state_path
+        if not path:
+            raise ValueError("No state path configured for KPI rollups.")
+        with self._lock:
+            state = {
+                "through": self.through.isoformat() if self.through else None,
+                "series": {res: [[domain, kpi, s.to_dict()] for (domain, kpi), s in series.items()]
+                           for res, series in self.series.items()},
+            }
+            self._saved_at = time.monotonic()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        with open(path, "r") as f:
+            state = json.load(f)
+        self.through = datetime.fromisoformat(state["through"]) if state.get("through") else None
+        self.series = {res: {(domain, kpi): RollupSeries.from_dict(data) for domain, kpi, data in state["series"].get(res, [])}
+                       for res in RESOLUTIONS}
+
+def _points(series: RollupSeries, i: int, j: int, first: int, step: int, resolution: str,
+            quantiles: Sequence[float]) -> Dict[str, List[Any]]:
+    """Buckets i..j of a series, merged `step` at a time (aligned to the range start)."""
+    out: Dict[str, List[Any]] = {"timestamps": [], "count": [], "sum": [], "mean": [], "min": [], "max": [], "last": []}
+    out.update({quantile_label(q): [] for q in quantiles})
+    k = i
+    while k < j:
+        group = first + (series.keys[k] - first) // step * step
+        end = k + 1
+        while end < j and series.keys[end] < group + step:
+            end += 1
+        count, total = sum(series.count[k:end]), sum(series.sum[k:end])
+        out["timestamps"].append(bucket_start(group, resolution).isoformat())
+        out["count"].append(count)
+        out["sum"].append(round(total, 2))
+        out["mean"].append(round(total / count, 2))
+        out["min"].append(min(series.min[k:end]))
+        out["max"].append(max(series.max[k:end]))
+        out["last"].append(series.last[end - 1])
+        sketch = QuantileSketch()
+        for b in range(k, end):
+            sketch.merge(series.sketch[b])
+        for label, value in sketch.quantiles(quantiles).items():
+            out[label].append(value)
+        k = end
+    return out
@@ -1,36 +1,388 @@
-from fastapi import FastAPI, HTTPException
+import os
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel
 from typing import Dict, Any, Optional, List
 from farmsense.core.platform import FarmSensePlatform
+from farmsense.data.prefetch import WeatherUnavailableError
+from farmsense.core.streaming import aiter_lines, to_ndjson_line, to_sse_event, GzipStream, SSE_KEEPALIVE
+from farmsense.core.tracing import Tracer, TRACE_HEADER
 
-app = FastAPI(title="FarmSense Platform API")
 platform = FarmSensePlatform()
 
+MB = 1024 * 1024
+
+tracer = Tracer(sample_rate=float(os.environ.get("FARMSENSE_TRACE_SAMPLE_RATE", "0")),
+                max_bytes=int(float(os.environ.get("FARMSENSE_TRACE_MAX_MB", "64")) * MB))
+
+def _memory_budgets_from_env() -> Dict[str, int]:
+    """FARMSENSE_CACHE_BUDGETS_MB="recommendation_cache=256,etag_index=16"."""
+    budgets = {}
+    for item in os.environ.get("FARMSENSE_CACHE_BUDGETS_MB", "").split(","):
+        name, _, mb = item.partition("=")
+        if name.strip():
+            budgets[name.strip()] = int(float(mb) * MB)
+    return budgets
+
+_rss_budget_mb = os.environ.get("FARMSENSE_MEMORY_BUDGET_MB")
+platform.memory_guard.set_budgets(_memory_budgets_from_env(), int(float(_rss_budget_mb) * MB) if _rss_budget_mb else None)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep weather for registered field locations warm between heartbeats
+    platform.weather_prefetcher.start()
+    # Periodic warm-start snapshots, plus a final one on shutdown
+    platform.snapshotter.start()
+    # Evict from caches before the process outgrows its memory budget
+    platform.memory_guard.start(interval=float(os.environ.get("FARMSENSE_MEMORY_CHECK_SECONDS", "60")))
+    yield
+    platform.memory_guard.stop(timeout=5)
+    platform.weather_prefetcher.stop(timeout=5)
+    platform.snapshotter.stop(timeout=5)
+    tracer.close(timeout=5)
+
+app = FastAPI(title="FarmSense Platform API", lifespan=lifespan)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Sampled (or X-FarmSense-Trace: 1) requests run under a trace summarised in Server-Timing.
+    Streamed responses (batch NDJSON, SSE) are timed to their headers only: the body is
+    produced after the trace has ended.
+    """
+    if not tracer.should_trace(request.headers.get(TRACE_HEADER)):
+        return await call_next(request)
+    with tracer.trace(f"{request.method} {request.url.path}") as trace:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = trace.server_timing()
+    response.headers[TRACE_HEADER] = trace.trace_id
+    return response
+
 class DomainInput(BaseModel):
     domain: str
     inputs: Optional[Dict[str, Any]] = None
     lat: Optional[float] = None
     lon: Optional[float] = None
+    field_id: Optional[str] = None
+    refresh: bool = False
+
+class IrrigationEvent(BaseModel):
+    field_id: str
+    depth_mm: float
+
+class FieldLocation(BaseModel):
+    field_id: str
+    lat: float
+    lon: float
+
+class PlantingEvent(BaseModel):
+    field_id: str
+    planted_at: datetime
+    gdd: float = 0.0
 
 class BatchInput(BaseModel):
     all_inputs: Dict[str, Dict[str, Any]]
+    field_id: Optional[str] = None
+    refresh: bool = False
+
+class HorizonInput(BaseModel):
+    lat: float
+    lon: float
+    inputs: Optional[Dict[str, Any]] = None
+    forecast_days: int = 16
+
+class RasterInput(BaseModel):
+    inputs: Dict[str, Any]
+    domains: Optional[List[str]] = None
+    mask: Optional[List[List[bool]]] = None
+    tiles: bool = False
+
+class BacktestField(BaseModel):
+    field_id: str
+    lat: float
+    lon: float
+    planted_at: Optional[datetime] = None
+    awc: Optional[float] = None
+    taw_mm: Optional[float] = None
+
+class BacktestInput(BaseModel):
+    fields: List[BacktestField]
+    start: datetime
+    end: datetime
+    step_hours: int = 1
+    irrigation_mm: Optional[float] = 25.0
+    timelines: bool = False
+
+class ReplayInput(BaseModel):
+    alternatives: Dict[str, Dict[str, Any]]
+    domains: Optional[List[str]] = None
+
+class MemoryBudgets(BaseModel):
+    cache_budgets_mb: Dict[str, float] = {}
+    rss_budget_mb: Optional[float] = None
+
+class SweepInput(BaseModel):
+    domain: str
+    axes: Dict[str, Any]
+    fixed: Optional[Dict[str, Any]] = None
 
 @app.get("/")
 def read_root():
     return {"message": "FarmSense Deterministic Farming Operations Platform API"}
 
+def _parse_if_none_match(header: Optional[str]) -> List[str]:
+    """Entity tags from an If-None-Match header; weak tags compare by their opaque value."""
+    if not header:
+        return []
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
 @app.post("/recommendation")
-def get_recommendation(data: DomainInput):
+def get_recommendation(data: DomainInput, request: Request, response: Response):
     try:
+        inputs, field_id, weather = data.inputs or {}, data.field_id, None
         if data.lat is not None and data.lon is not None:
-            return platform.get_recommendation_with_real_data(data.domain, data.lat, data.lon, data.inputs)
-        return platform.get_recommendation(data.domain, data.inputs or {})
+            inputs, field_id, weather = platform.real_data_inputs(data.domain, data.lat, data.lon, data.inputs, data.field_id)
+        etag, body = platform.get_conditional_recommendation(
+            data.domain, inputs, _parse_if_none_match(request.headers.get("if-none-match")), field_id, data.refresh)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except WeatherUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if body is None:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return body if weather is None else {**body, "weather": weather}
 
 @app.post("/recommendations/batch")
-def get_batch_recommendations(data: BatchInput):
-    return platform.get_all_recommendations(data.all_inputs)
+def get_batch_recommendations(data: BatchInput, strict: bool = False):
+    try:
+        return platform.get_all_recommendations(data.all_inputs, strict, data.field_id, data.refresh)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator consumes the request stream itself.
+    Starlette's default disconnect listener would compete for the same receive channel,
+    so a client disconnect surfaces from request.stream() instead.
+    """
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except (OSError, ClientDisconnect):
+            return
+
+async def _stream_field_lines(line: bytes, strict: bool = False):
+    try:
+        field = json.loads(line)
+        field_id = field.get("field_id")
+        all_inputs = field.get("all_inputs", {})
+        if not isinstance(all_inputs, dict):
+            raise ValueError("all_inputs must be an object keyed by domain.")
+        platform.validate_batch(all_inputs, strict)
+    except (ValueError, AttributeError) as e:
+        yield to_ndjson_line({"error": f"Malformed batch line: {e}"})
+        return
+
+    cache_key = str(field_id) if field_id is not None else None
+    for domain in platform.engines:
+        try:
+            rec = await run_in_threadpool(platform.get_recommendation, domain, all_inputs.get(domain) or {}, cache_key)
+            yield to_ndjson_line({"field_id": field_id, "domain": domain, "recommendation": rec})
+        except ValueError as e:
+            yield to_ndjson_line({"field_id": field_id, "domain": domain, "error": str(e)})
+
+@app.post("/recommendations/batch/stream")
+async def stream_batch_recommendations(request: Request, gzip: bool = False, strict: bool = False):
+    """
+    Streaming batch: the body is NDJSON, one {"field_id": ..., "all_inputs": {...}} per line.
+    Each field/domain recommendation is written back as its own NDJSON line as soon as it is
+    computed, so memory stays flat regardless of how many fields are submitted.
+    """
+    async def generate():
+        encoder = GzipStream() if gzip else None
+        try:
+            async for line in aiter_lines(request.stream()):
+                if encoder is None:
+                    async for out in _stream_field_lines(line, strict):
+                        yield out
+                else:
+                    field_chunk = b"".join([out async for out in _stream_field_lines(line, strict)])
+                    yield encoder.compress(field_chunk) + encoder.flush()
+        except ValueError as e:
+            # The 200 headers are already sent: end the body with an error line instead
+            error = to_ndjson_line({"error": str(e)})
+            yield error if encoder is None else encoder.compress(error) + encoder.flush()
+        if encoder is not None:
+            yield encoder.close()
+
+    headers = {"Content-Encoding": "gzip"} if gzip else {}
+    return DuplexStreamingResponse(generate(), media_type="application/x-ndjson", headers=headers)
+
+SSE_KEEPALIVE_SECONDS = 15.0
+
+@app.get("/events")
+async def stream_events(field_id: Optional[str] = None, domains: Optional[str] = None):
+    """
+    Server-sent events for recommendation changes, new EMERGENCY overlays and expirations,
+    optionally filtered to one field and a comma-separated list of domains. Each client
+    has a bounded buffer; if it falls behind, the oldest events are dropped and an
+    overflow event reports how many.
+    """
+    subscription = platform.event_bus.subscribe(field_id, domains.split(",") if domains else None)
+
+    async def generate():
+        try:
+            while True:
+                # Wake for the next cached expiry so expiration events go out on time
+                next_expiry = platform.expire_recommendations()
+                timeout = SSE_KEEPALIVE_SECONDS
+                if next_expiry is not None:
+                    timeout = min(timeout, max((next_expiry - datetime.now()).total_seconds(), 0.0) + 0.01)
+                event = await subscription.next_event(timeout)
+                if event is None:
+                    yield SSE_KEEPALIVE
+                else:
+                    yield to_sse_event(event, event["event"], event.get("id"))
+        finally:
+            platform.event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(generate(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/heartbeat_plan")
+def heartbeat_plan(horizon_hours: float = 1.0):
+    if horizon_hours <= 0:
+        raise HTTPException(status_code=400, detail="horizon_hours must be positive.")
+    return platform.heartbeat_plan(horizon_hours)
+
+@app.post("/horizon")
+def get_forecast_horizon(data: HorizonInput):
+    try:
+        return platform.get_forecast_horizon(data.lat, data.lon, data.inputs, data.forecast_days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/raster")
+def get_raster_recommendations(data: RasterInput):
+    try:
+        if data.domains:
+            return platform.get_raster_recommendations(data.inputs, data.domains, data.mask, data.tiles)
+        return platform.get_raster_recommendations(data.inputs, mask=data.mask, tiles=data.tiles)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/sweep")
+def sweep_decisions(data: SweepInput):
+    try:
+        return platform.sweep_decisions(data.domain, data.axes, data.fixed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/backtest")
+def backtest(data: BacktestInput):
+    try:
+        return platform.backtest([f.model_dump() for f in data.fields], data.start, data.end,
+                                 data.step_hours, data.irrigation_mm, data.timelines)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/replay")
+def replay_thresholds(data: ReplayInput):
+    try:
+        return platform.replay_thresholds(data.alternatives, data.domains)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+@app.get("/kpis/series")
+def kpi_series(start: datetime, end: datetime, domain: Optional[str] = None, kpis: Optional[str] = None,
+               resolution: Optional[str] = None, max_points: Optional[int] = None):
+    """Chart-ready KPI rollups; `kpis` is a comma-separated list of KPI names."""
+    try:
+        return platform.kpi_series(start, end, domain, _split(kpis), resolution, max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/kpis/distribution")
+def kpi_distribution(start: datetime, end: datetime, domain: Optional[str] = None, kpis: Optional[str] = None,
+                     quantiles: str = "0.05,0.5,0.95", bins: int = 10):
+    try:
+        return platform.kpi_distribution(start, end, domain, _split(kpis), [float(q) for q in _split(quantiles) or ()], bins)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/fields")
+def register_field(field: FieldLocation):
+    try:
+        return platform.register_field(field.field_id, field.lat, field.lon)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/fields/viewport")
+def fields_in_viewport(south: float, west: float, north: float, east: float, domains: Optional[str] = None,
+                       limit: Optional[int] = None):
+    """Fields inside a bounding box; `domains` is a comma-separated filter."""
+    try:
+        return platform.fields_in_viewport(south, west, north, east, _split(domains), limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/fields/nearest")
+def nearest_fields(lat: float, lon: float, k: int = 1, max_km: Optional[float] = None, domains: Optional[str] = None):
+    try:
+        return platform.nearest_fields(lat, lon, k, max_km, _split(domains))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/admin/snapshot")
+def save_snapshot():
+    return platform.save_snapshot()
+
+@app.get("/admin/memory")
+def memory_report():
+    """Process RSS, entries and estimated bytes per cache, budgets and the last eviction pass."""
+    return platform.memory_report()
+
+@app.post("/admin/memory/allocations")
+def memory_allocations(limit: int = 20, group_by: str = "lineno"):
+    """tracemalloc snapshot: top allocation sites and growth since the previous snapshot."""
+    try:
+        return platform.memory_allocations(limit, group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/admin/memory/allocations")
+def stop_memory_tracing():
+    platform.memory_guard.stop_tracing()
+    return platform.memory_guard.tracing_status()
+
+@app.put("/admin/memory/budgets")
+def set_memory_budgets(budgets: MemoryBudgets):
+    """Replace the cache and process budgets (MB) and evict down to them now."""
+    try:
+        return platform.set_memory_budgets({name: int(mb * MB) for name, mb in budgets.cache_budgets_mb.items()},
+                                           int(budgets.rss_budget_mb * MB) if budgets.rss_budget_mb is not None else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/plantings")
+def register_planting(event: PlantingEvent):
+    return platform.register_planting(event.field_id, event.planted_at, event.gdd)
+
+@app.post("/irrigation_events")
+def log_irrigation(event: IrrigationEvent):
+    try:
+        return platform.log_irrigation(event.field_id, event.depth_mm)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/confirm_emergency/{audit_id}")
 def confirm_emergency(audit_id: str):
@@ -0,0 +1,141 @@
+import math
+from typing import Dict, Any, List, Optional, Sequence
+
+def quantile_label(q: float) -> str:
+    """0.05 -> "p5", 0.5 -> "p50", 0.999 -> "p99.9"."""
+    return f"p{round(q * 100, 6):g}"
+
+class QuantileSketch:
+    """
+    Mergeable streaming quantile sketch with relative-error guarantees (DDSketch).
+
+    Values fall into logarithmic bins whose width is a fixed fraction of the value, so any
+    quantile is returned within `relative_accuracy` of the true value. Merging two sketches
+    with the same accuracy adds bin counts, which makes the result identical to sketching the
+    combined stream: per-bucket, per-worker and per-partition sketches can be combined in any
+    order. At most `max_bins` bins are kept (the lowest collapse first), so memory and query
+    time are bounded however many values are added.
+    """
+    MIN_VALUE = 1e-9  # magnitudes below this count as zero
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 512):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1.")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, weight: int = 1):
+        if value > self.MIN_VALUE:
+            key = self._key(value)
+            self.positive[key] = self.positive.get(key, 0) + weight
+        elif value < -self.MIN_VALUE:
+            key = self._key(-value)
+            self.negative[key] = self.negative.get(key, 0) + weight
+        else:
+            self.zero += weight
+        self.count += weight
+        self.sum += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self._collapse()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold another sketch into this one (in place); returns self."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged.")
+        for bins, other_bins in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_bins.items():
+                bins[key] = bins.get(key, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._collapse()
+        return self
+
+    def _collapse(self):
+        """Fold the lowest positive (or smallest-magnitude negative) bins together until within max_bins."""
+        excess = len(self.positive) + len(self.negative) - self.max_bins
+        if excess <= 0:
+            return
+        bins = self.positive if len(self.positive) > excess else self.negative
+        keys = sorted(bins)[:excess + 1]
+        bins[keys[-1]] += sum(bins.pop(key) for key in keys[:-1])
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), within the relative accuracy; None when empty."""
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1.")
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._value(key), self.min)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+    def quantiles(self, qs: Sequence[float]) -> Dict[str, Optional[float]]:
+        values = {quantile_label(q): self.quantile(q) for q in qs}
+        return {label: None if value is None else round(value, 2) for label, value in values.items()}
+
+    def histogram(self, bins: int = 10) -> Dict[str, List[Any]]:
+        """Equal-width histogram over [min, max] from the sketch bins (each bin counted at its representative value)."""
+        if self.count == 0:
+            return {"edges": [], "counts": []}
+        low, high = self.min, self.max
+        width = (high - low) / bins or 1.0
+        counts = [0] * bins
+        points = [(-self._value(k), c) for k, c in self.negative.items()] + [(0.0, self.zero)] + \
+                 [(self._value(k), c) for k, c in self.positive.items()]
+        for value, count in points:
+            if count:
+                counts[min(bins - 1, max(0, int((min(max(value, low), high) - low) / width)))] += count
+        return {"edges": [round(low + i * width, 4) for i in range(bins + 1)], "counts": counts}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_bins": self.max_bins,
+            "positive": sorted(self.positive.items()),
+            "negative": sorted(self.negative.items()),
+            "zero": self.zero,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], data["max_bins"])
+        sketch.positive = {int(k): c for k, c in data["positive"]}
+        sketch.negative = {int(k): c for k, c in data["negative"]}
+        sketch.zero, sketch.count, sketch.sum = data["zero"], data["count"], data["sum"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
@@ -0,0 +1,172 @@
+"""
+Warm-start snapshots of in-memory runtime state.
+
+A snapshot is one file: an 8-byte magic, a fixed header (index length, metadata length,
+CRC-32 of everything after the header), a JSON index, zlib-compressed JSON metadata and
+then raw little-endian array data, each array aligned to 64 bytes. On load the file is
+memory-mapped copy-on-write, so arrays are views into the page cache that components may
+modify without touching the file, and nothing is parsed beyond the index and metadata.
+
+Writes go to a temporary file that is fsynced and renamed over the previous snapshot (and
+the directory fsynced), so a crash leaves either the old or the new snapshot, never a torn
+one; a corrupt or unreadable file is reported and the caller starts cold.
+
+Components take part through two methods:
+    snapshot_state() -> (arrays: Dict[str, np.ndarray], meta: JSON-serializable)
+    restore_state(arrays, meta)
+Each component is captured under its own lock, so the snapshot is consistent per
+component rather than across them; everything restored is state that the next heartbeat
+would rebuild anyway.
+
+Bulk numeric state travels as arrays: the water balance columns and the hourly series of
+cached weather payloads. The recommendation cache, ETag index, event bus and the field
+registry's latest recommendations stay in metadata on purpose: each entry is a small mixed
+record (identifiers, decisions, overlays, one or two timestamps) bounded by fields x domains,
+and splitting it into columns would not make restoring it cheaper.
+"""
+import os
+import json
+import zlib
+import struct
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional, Tuple
+
+MAGIC = b"FSNAP\x00\x01\x00"
+HEADER = struct.Struct("<QQI")  # index length, metadata length, CRC-32 of the rest
+ALIGNMENT = 64
+
+ComponentState = Tuple[Dict[str, np.ndarray], Any]
+
+class SnapshotError(RuntimeError):
+    """A snapshot file is missing its magic, truncated or fails its checksum."""
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot snapshot value of type {type(value).__name__}.")
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def write_snapshot(path: str, components: Dict[str, ComponentState]) -> Dict[str, Any]:
+    """Write component states atomically; returns the file size and per-component array bytes."""
+    arrays, layout, offset = [], {}, 0
+    for name, (component_arrays, _) in components.items():
+        layout[name] = {}
+        for key, array in component_arrays.items():
+            array = np.ascontiguousarray(array)
+            dtype = array.dtype.newbyteorder("<") if array.dtype.byteorder == ">" else array.dtype
+            offset = _aligned(offset)
+            layout[name][key] = {"dtype": dtype.str, "shape": list(array.shape), "offset": offset}
+            arrays.append((offset, array.astype(dtype, copy=False)))
+            offset += array.nbytes
+    meta = zlib.compress(json.dumps({name: m for name, (_, m) in components.items()},
+                                    separators=(",", ":"), default=_jsonable).encode("utf-8"), 6)
+    index = json.dumps({"version": 1, "created_at": datetime.now().isoformat(), "arrays": layout},
+                       separators=(",", ":")).encode("utf-8")
+
+    # Array offsets are relative to the data section, which starts aligned after the metadata
+    data_start = _aligned(len(MAGIC) + HEADER.size + len(index) + len(meta))
+    body = bytearray(data_start - len(MAGIC) - HEADER.size + offset)
+    prefix = index + meta
+    body[:len(prefix)] = prefix
+    base = data_start - len(MAGIC) - HEADER.size
+    for start, array in arrays:
+        body[base + start:base + start + array.nbytes] = array.tobytes()
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(len(index), len(meta), zlib.crc32(body)))
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(os.path.dirname(path) or ".")
+    return {"path": path, "bytes": len(MAGIC) + HEADER.size + len(body),
+            "array_bytes": {name: sum(a.nbytes for a in c[0].values()) for name, c in components.items()}}
+
+def _fsync_dir(directory: str):
+    """Make the rename durable (not supported on every platform)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def read_snapshot(path: str, verify: bool = True) -> Tuple[Dict[str, ComponentState], Dict[str, Any]]:
+    """(component name -> (arrays, meta), index) with arrays as copy-on-write memmap views."""
+    size = os.path.getsize(path)
+    if size < len(MAGIC) + HEADER.size:
+        raise SnapshotError(f"Snapshot {path} is truncated.")
+    mapped = np.memmap(path, dtype=np.uint8, mode="c")
+    if bytes(mapped[:len(MAGIC)]) != MAGIC:
+        raise SnapshotError(f"{path} is not a runtime snapshot.")
+    index_len, meta_len, crc = HEADER.unpack(bytes(mapped[len(MAGIC):len(MAGIC) + HEADER.size]))
+    body_start = len(MAGIC) + HEADER.size
+    if body_start + index_len + meta_len > size:
+        raise SnapshotError(f"Snapshot {path} is truncated.")
+    if verify and zlib.crc32(mapped[body_start:]) != crc:
+        raise SnapshotError(f"Snapshot {path} fails its checksum.")
+    index = json.loads(bytes(mapped[body_start:body_start + index_len]))
+    meta = json.loads(zlib.decompress(bytes(mapped[body_start + index_len:body_start + index_len + meta_len])))
+    data_start = _aligned(body_start + index_len + meta_len)
+
+    components = {}
+    for name, component_meta in meta.items():
+        arrays = {}
+        for key, spec in index["arrays"].get(name, {}).items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            start = data_start + spec["offset"]
+            arrays[key] = mapped[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+        components[name] = (arrays, component_meta)
+    return components, index
+
+class PeriodicSnapshotter:
+    """Background thread calling `save` every `interval` seconds (and once more on stop)."""
+    def __init__(self, save: Callable[[], Any], interval: float = 300.0):
+        self.save = save
+        self.interval = interval
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="runtime-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None, final: bool = True) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if final:
+            self._save()
+
+    def _save(self) -> None:
+        try:
+            self.save()
+            self.last_error = None
+        except Exception as e:
+            # Keep the previous snapshot; the next pass retries
+            self.last_error = str(e)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._save()
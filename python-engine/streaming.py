@@ -0,0 +1,55 @@
+import json
+import zlib
+from typing import Dict, Any, Optional, AsyncIterable, AsyncIterator
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+MAX_LINE_BYTES = 1024 * 1024
+SSE_KEEPALIVE = b": keepalive\n\n"
+
+def to_ndjson_line(record: Dict[str, Any]) -> bytes:
+    """Serialize one record as a single newline-terminated JSON line."""
+    return json.dumps(record, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+
+def to_sse_event(data: Dict[str, Any], event: Optional[str] = None, event_id: Optional[int] = None) -> bytes:
+    """Format one server-sent event; data is a single compact JSON line."""
+    head = (f"id: {event_id}\n" if event_id is not None else "") + (f"event: {event}\n" if event else "")
+    return (head + "data: " + json.dumps(data, separators=(",", ":"), default=str) + "\n\n").encode("utf-8")
+
+async def aiter_lines(chunks: AsyncIterable[bytes], max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[bytes]:
+    """Split an incoming byte stream into lines without buffering the whole body."""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer.extend(chunk)
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                break
+            if newline > max_line_bytes:
+                raise ValueError(f"NDJSON line exceeds {max_line_bytes} bytes.")
+            line = bytes(buffer[:newline]).strip()
+            del buffer[:newline + 1]
+            if line:
+                yield line
+        if len(buffer) > max_line_bytes:
+            raise ValueError(f"NDJSON line exceeds {max_line_bytes} bytes.")
+    line = bytes(buffer).strip()
+    if line:
+        yield line
+
+class GzipStream:
+    """Incremental gzip encoder for chunked responses."""
+    def __init__(self, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """
+        Emit everything buffered so far so the client can decode it immediately.
+        Callers flush once per field rather than per line, which would defeat compression.
+        """
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def close(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
@@ -0,0 +1,97 @@
+import numpy as np
+from typing import Dict, Any, Optional, Sequence, Union
+from farmsense.domains.vectorized import evaluate, DECISION_LABELS, FLAG_BITS
+
+MAX_SWEEP_POINTS = 5_000_000
+
+AxisSpec = Union[Sequence[Any], Dict[str, float]]
+
+def axis_length(spec: AxisSpec) -> int:
+    """
+    Number of values an axis spec yields, checked without allocating it. An axis is either
+    an explicit list of values or a {"start", "stop", "num"} or {"start", "stop", "step"}
+    range, e.g. {"start": 0, "stop": 100, "num": 101} for AWC 0-100 in 1% steps.
+    """
+    if isinstance(spec, dict):
+        if "start" not in spec or "stop" not in spec:
+            raise ValueError("Range axes need both start and stop.")
+        try:
+            start, stop = float(spec["start"]), float(spec["stop"])
+            if "num" in spec:
+                num = spec["num"]
+                if isinstance(num, bool) or int(num) != num or num < 1:
+                    raise ValueError("num must be a positive integer.")
+                return int(num)
+            step = float(spec.get("step", 1))
+        except (TypeError, OverflowError):
+            raise ValueError("Range axis start, stop, num and step must be numbers.")
+        if step == 0 or not np.isfinite([start, stop, step]).all():
+            raise ValueError("Range axes need finite start and stop and a non-zero step.")
+        return max(0, int(np.ceil((stop - start) / step)))
+    values = np.asarray(spec)
+    if values.ndim != 1 or values.size == 0:
+        raise ValueError("Sweep axes must be non-empty one-dimensional lists.")
+    return values.size
+
+def axis_values(spec: AxisSpec) -> np.ndarray:
+    """Values of an axis spec (see axis_length)."""
+    if isinstance(spec, dict):
+        if "num" in spec:
+            return np.linspace(spec["start"], spec["stop"], int(spec["num"]))
+        values = np.arange(spec["start"], spec["stop"], spec.get("step", 1))
+        if values.size == 0:
+            raise ValueError("Range axis is empty.")
+        return values
+    return np.asarray(spec)
+
+def sweep(domain: str, axes: Dict[str, AxisSpec], fixed: Optional[Dict[str, Any]] = None, thresholds: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Evaluate a domain over the Cartesian product of the given input axes.
+
+    Each axis is reshaped to broadcast along its own dimension (open-mesh, like np.ix_),
+    so the grid is never materialized per input; only the decision arrays are full size.
+    Trend can be swept directly via "<input>_trend" axes (-1, 0, 1). Nothing is audited.
+    """
+    if not axes:
+        raise ValueError("A sweep needs at least one axis.")
+    names = list(axes)
+    shape = tuple(axis_length(axes[name]) for name in names)
+    # Python ints, so a huge axis cannot overflow the product
+    points = 1
+    for length in shape:
+        points *= length
+    if points > MAX_SWEEP_POINTS:
+        raise ValueError(f"Sweep grid {shape} exceeds {MAX_SWEEP_POINTS} points.")
+    values = [axis_values(axes[name]) for name in names]
+    shape = tuple(len(v) for v in values)
+
+    grid_inputs = dict(fixed or {})
+    for dim, (name, axis) in enumerate(zip(names, values)):
+        view_shape = [1] * len(shape)
+        view_shape[dim] = len(axis)
+        grid_inputs[name] = axis.reshape(view_shape)
+
+    decision = evaluate(domain, grid_inputs, thresholds)
+    # Inputs not on any axis leave the decision constant along that dimension.
+    base = np.broadcast_to(decision.base, shape)
+    emergency = np.broadcast_to(decision.emergency, shape)
+    flags = np.broadcast_to(decision.flags, shape)
+
+    return {
+        "domain": decision.domain,
+        "axes": {name: axis.tolist() for name, axis in zip(names, values)},
+        "shape": list(shape),
+        "decision_codes": DECISION_LABELS,
+        "flag_bits": FLAG_BITS,
+        "base": base,
+        "emergency": emergency,
+        "flags": flags,
+    }
+
+def to_compact(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten the arrays (row-major, matching "shape") into JSON-friendly integer lists."""
+    compact = dict(result)
+    compact["base"] = result["base"].astype(np.int8).ravel().tolist()
+    compact["emergency"] = result["emergency"].astype(np.int8).ravel().tolist()
+    compact["flags"] = result["flags"].astype(np.uint8).ravel().tolist()
+    return compact
@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import tempfile
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+
+def blob_count(logger):
+    return sum(len(files) for root, _, files in os.walk(logger.inputs_dir) if root != logger.inputs_dir)
+
+def test_audit_dedup():
+    platform = FarmSensePlatform(state_dir=tempfile.mkdtemp())
+    logger = platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+
+    print("--- Audit Input Dedup Test ---")
+
+    # Ten heartbeats on a stable field, then one change
+    inputs = {"awc": 58, "prev_awc": 60, "precipitation_forecast": 0, "crop_stage": "TUBER_BULKING"}
+    ids = [platform.get_recommendation("irrigation", inputs)["audit_log_id"] for _ in range(10)]
+    changed = platform.get_recommendation("irrigation", {**inputs, "awc": 55})["audit_log_id"]
+    print(f"1. 11 evaluations stored {blob_count(logger)} input blobs")
+
+    # Exact reconstruction from the referenced blob
+    stored = logger.get_inputs(ids[3])
+    original = platform.engines["irrigation"].parse_inputs(inputs).to_dict(platform.engines["irrigation"].INPUTS)
+    print(f"2. Reconstructed inputs equal originals: {stored['raw_inputs'] == original}")
+
+    # Batch members share blobs with identical per-domain inputs
+    batch = platform.get_all_recommendations({"irrigation": inputs, "planting": {"soil_temp": 10}})
+    member = batch["irrigation"]["audit_log_id"]
+    print(f"3. Batch member {member} resolves: {logger.get_inputs(member)['raw_inputs'] == original}")
+
+    digest = logger.refcounts()
+    shared = max(digest.values())
+    print(f"4. Highest reference count: {shared}")
+
+    # Retention: releasing entries drops references; purge removes only unreferenced blobs
+    before = blob_count(logger)
+    logger.release(changed)
+    removed = logger.purge_unreferenced()
+    for audit_id in ids:
+        logger.release(audit_id)
+    kept_by_batch = logger.purge_unreferenced() == 0 and logger.get_inputs(member)["raw_inputs"] == original
+    print(f"5. Blobs before {before}, removed after release {removed}, batch still resolves: {kept_by_batch}")
+
+    # Reference counts survive a restart through refs.log
+    reopened = AuditLogger(logger.log_dir)
+    reloaded_match = dict(reopened.refcounts()) == dict(logger.refcounts())
+    print(f"6. Reloaded refcounts match: {reloaded_match}")
+
+    # A second worker references the shared blob after this one cached its counts; releasing
+    # the last reference this worker knows about must not let its purge delete the blob
+    platform.audit_logger = reopened
+    other = platform.get_recommendation("irrigation", inputs)["audit_log_id"]
+    logger.release(member)
+    purged_shared = logger.purge_unreferenced()
+    other_resolves = reopened.get_inputs(other) is not None and reopened.get_inputs(other)["raw_inputs"] == original
+    print(f"7. Purge after another worker's reference removed {purged_shared}, its entry resolves: {other_resolves}")
+
+    if (blob_count(logger) + removed == before and stored["raw_inputs"] == original and shared == 11
+            and removed == 1 and kept_by_batch and logger.get_inputs(ids[0]) is None
+            and reloaded_match and purged_shared == 0 and other_resolves):
+        print("\nPASS: Raw inputs are stored once per content hash and reference counted.")
+    else:
+        print("\nFAIL: Audit input dedup incorrect.")
+
+if __name__ == "__main__":
+    test_audit_dedup()
@@ -0,0 +1,110 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import json
+import tempfile
+from datetime import date, datetime, timedelta
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+
+def test_audit_partitions():
+    platform = FarmSensePlatform(state_dir=tempfile.mkdtemp())
+    logger = platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+    opened = []
+    open_segment = logger._open_segment
+    logger._open_segment = lambda path: opened.append(os.path.relpath(path, logger.log_dir)) or open_segment(path)
+
+    print("--- Partitioned Audit Store Test ---")
+
+    # Five days of irrigation and planting decisions, written in time order
+    ids = {}
+    for day in range(1, 6):
+        issued_at = datetime(2026, 10, day, 12)
+        for domain, inputs in (("irrigation", {"awc": 40 + day}), ("planting", {"soil_temp": 9})):
+            engine = platform.engines[domain]
+            record = engine.parse_inputs(inputs)
+            rec = engine.evaluate(record, raw_inputs=record.to_dict(engine.INPUTS), issued_at=issued_at)
+            logger.log_recommendation(rec)
+            ids[(day, domain)] = rec.audit_log_id
+    # Writes never close segments; days before yesterday are closed by maintenance
+    written = sorted(os.listdir(os.path.join(logger.partitions_dir, "2026-10-01")))
+    closed = logger.close_partitions(before=date(2026, 10, 4))
+    layout = sorted(os.path.relpath(os.path.join(root, f), logger.partitions_dir)
+                    for root, _, files in os.walk(logger.partitions_dir) for f in files)
+    print(f"1. Written: {written}; closed {closed} segments: {layout[:2]} ... {layout[-2:]}")
+
+    # Time-bounded query opens only overlapping day/domain segments
+    opened.clear()
+    window = list(logger.iter_logs(datetime(2026, 10, 2), datetime(2026, 10, 4), "irrigation"))
+    print(f"2. Oct 2-3 irrigation: {len(window)} logs from {opened}")
+    bounded = len(window) == 2 and opened == ["partitions/2026-10-02/irrigation.jsonl.gz", "partitions/2026-10-03/irrigation.jsonl.gz"]
+
+    # Lookups open one day; updates to closed segments append and win
+    opened.clear()
+    audit_id = ids[(1, "irrigation")]
+    log = logger.get_log(audit_id)
+    log["confirmed_at"] = "2026-10-01T13:00:00"
+    logger.update_log(audit_id, log)
+    confirmed = logger.get_log(audit_id)["confirmed_at"] == "2026-10-01T13:00:00"
+    single_day = all(path.startswith("partitions/2026-10-01/") for path in opened)
+    print(f"3. Confirmation persisted: {confirmed}, segments opened: {sorted(set(opened))}")
+
+    reconstructed = logger.get_inputs(ids[(3, "irrigation")])["raw_inputs"]["awc"]
+    kpis = platform.aggregate_kpis("irrigation", datetime(2026, 10, 4), datetime(2026, 10, 6))
+    print(f"4. Reconstructed awc {reconstructed}; water_efficiency Oct 4-5: {kpis.get('water_efficiency')}")
+
+    # A segment another worker is already closing is skipped
+    claim = os.path.join(logger.partitions_dir, "2026-10-04", "irrigation.jsonl.gz.tmp")
+    open(claim, "wb").close()
+    claimed_skipped = logger.close_partitions(before=date(2026, 10, 5)) == 1
+    os.remove(claim)
+    print(f"5. Claimed segment skipped: {claimed_skipped}")
+
+    # Retention: days older than two move cold, cold days older than three expire
+    result = logger.apply_retention(hot_days=2, cold_days=3, today=date(2026, 10, 6))
+    cold = sorted(os.listdir(logger.cold_dir))
+    print(f"6. Retention {result}; cold tier: {cold}")
+    still_readable = logger.get_log(ids[(3, "planting")]) is not None and logger.get_log(ids[(1, "planting")]) is None
+    purged = logger.purge_unreferenced()
+    all_days = sorted({log["issued_at"][:10] for log in logger.iter_logs()})
+    print(f"7. Days still queryable: {all_days}, input blobs purged: {purged}")
+
+    # Flat entries written before partitioning are still read
+    legacy_id = "0b7f4c4e-legacy"
+    with open(os.path.join(logger.log_dir, f"{legacy_id}.json"), "w") as f:
+        json.dump({**logger.get_log(ids[(5, "planting")]), "audit_log_id": legacy_id}, f)
+    with open(os.path.join(logger.log_dir, f"{legacy_id}_inputs.json"), "w") as f:
+        json.dump({**logger.get_inputs(ids[(5, "planting")]), "raw_inputs": {"soil_temp": 9}}, f)
+    legacy = (logger.get_log(legacy_id) is not None and len(list(logger.iter_logs(domain="planting"))) == 4
+              and logger.get_inputs(legacy_id)["raw_inputs"] == {"soil_temp": 9})
+    legacy_released = logger.release(legacy_id) and logger.get_log(legacy_id) is None and not logger.release(legacy_id)
+    print(f"8. Per-record legacy entry read: {legacy}, released: {legacy_released}")
+
+    # Live writes look each segment up once; closing today's segments redirects later writes
+    scans = []
+    segments = logger._segments
+    logger._segments = lambda day, domain=None, include_cold=True: scans.append(domain) or segments(day, domain, include_cold)
+    batch_inputs = {"irrigation": {"awc": 50}, "planting": {"soil_temp": 10}, "harvest": {}}
+    platform.get_all_recommendations(batch_inputs)
+    first_scans = len(scans)
+    platform.get_all_recommendations(batch_inputs)
+    cached = len(scans) == first_scans
+    logger.close_partitions(before=date.today() + timedelta(days=1))
+    member = platform.get_all_recommendations(batch_inputs)["planting"]["audit_log_id"]
+    redirected = logger.get_log(member) is not None and not any(
+        name.endswith(".jsonl") for name in os.listdir(os.path.join(logger.partitions_dir, date.today().isoformat())))
+    print(f"9. Segment lookups: {first_scans} for the first batch, cached after: {cached}, "
+          f"writes after close go to the closed segment: {redirected}")
+
+    if (written == ["irrigation.jsonl", "planting.jsonl"] and closed == 6 and layout[0] == "2026-10-01/irrigation.jsonl.gz" and layout[-1] == "2026-10-05/planting.jsonl"
+            and bounded and confirmed and single_day and reconstructed == 43 and kpis.get("water_efficiency") == 44.5
+            and claimed_skipped and result == {"closed": 1, "moved": 3, "expired": 2} and cold == ["2026-10-03"]
+            and still_readable and all_days == ["2026-10-03", "2026-10-04", "2026-10-05"] and purged == 2 and legacy
+            and legacy_released and cached and redirected):
+        print("\nPASS: Audit entries are partitioned by day and domain with compressed, tiered retention.")
+    else:
+        print("\nFAIL: Partitioned audit store incorrect.")
+
+if __name__ == "__main__":
+    test_audit_partitions()
@@ -0,0 +1,82 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import time
+import tempfile
+import numpy as np
+from datetime import datetime
+from farmsense.data.weather_store import WeatherStore, hour_to_iso, to_hour
+from farmsense.core.backtest import run_backtest, INACTIVE
+
+SEASON_START = datetime(2025, 4, 1)
+SEASON_END = datetime(2025, 10, 1)
+
+def synthetic_season(store, lat, lon, warmth):
+    """Seasonal temperature curve with a diurnal cycle, hot dry spells and a storm every ten days."""
+    first = to_hour(SEASON_START)
+    hours = np.arange(first, to_hour(SEASON_END))
+    day = (hours - first) / 24
+    hour_of_day = (hours - first) % 24
+    seasonal = 4 + warmth * np.sin(np.pi * np.clip(day / 183, 0, 1))
+    diurnal = 6 * np.sin((hour_of_day - 9) / 24 * 2 * np.pi)
+    et0 = np.where((hour_of_day >= 7) & (hour_of_day <= 19), 0.06 + seasonal / 150, 0.0)
+    precip = np.where((day.astype(int) % 10 == 0) & (hour_of_day == 15), 12.0, 0.0)
+    store.write(lat, lon, [hour_to_iso(h) for h in hours], {
+        "temperature_2m": (seasonal + diurnal).tolist(),
+        "relative_humidity_2m": [60.0] * hours.size,
+        "precipitation": precip.tolist(),
+        "soil_temperature_6cm": (seasonal + diurnal / 3).tolist(),
+        "soil_moisture_3_to_9cm": [0.3] * hours.size,
+        "et0_fao_evapotranspiration": et0.tolist(),
+    })
+
+def test_backtest():
+    store = WeatherStore(tempfile.mkdtemp())
+    cells = [(43.6, -116.2, 22.0), (43.9, -116.5, 20.0), (44.2, -116.8, 18.0), (44.5, -117.1, 24.0)]
+    for lat, lon, warmth in cells:
+        synthetic_season(store, lat, lon, warmth)
+
+    rng = np.random.default_rng(7)
+    fields = []
+    for i in range(1000):
+        lat, lon, _ = cells[i % len(cells)]
+        field = {"field_id": f"F{i:04d}", "lat": lat + rng.uniform(-0.04, 0.04), "lon": lon + rng.uniform(-0.04, 0.04),
+                 "awc": float(rng.uniform(70, 100))}
+        if i % 5 == 0:
+            field["planted_at"] = datetime(2025, 5, 1)
+        fields.append(field)
+
+    print("--- Season Backtest Test ---")
+    started = time.perf_counter()
+    result = run_backtest(store, fields, SEASON_START, SEASON_END)
+    elapsed = time.perf_counter() - started
+    summary = result.summary()
+    print(f"1. {len(fields)} fields x {result.steps} hourly steps in {elapsed:.1f}s")
+    print(f"2. Planted: {summary['planting']['fields_planted']}, harvested: {summary['harvest']['fields_harvested']}, "
+          f"median season {summary['harvest']['median_season_days']} days")
+    print(f"3. Irrigation events: {summary['irrigation']['irrigation_events']}, "
+          f"lowest AWC {summary['irrigation']['lowest_awc']}, emergency steps {summary['irrigation']['emergency_steps']}")
+
+    scheduled = result.fields()["F0000"]
+    segments = result.timeline("F0001", "irrigation")
+    print(f"4. F0000 planted at {scheduled['planted_at']}; F0001 irrigation timeline has {len(segments)} segments, "
+          f"first {segments[0]['recommendation']}")
+
+    # Open loop: without applying irrigation, fields dry out further
+    open_loop = run_backtest(store, fields[:40], SEASON_START, SEASON_END, step_hours=6, irrigation_mm=None).summary()
+    print(f"5. Open-loop (6h steps) lowest AWC {open_loop['irrigation']['lowest_awc']}, "
+          f"emergency steps {open_loop['irrigation']['emergency_steps']}")
+
+    planting_after_sowing = result.decisions["planting"][0, result.planted_step[0]:]
+    if (summary["planting"]["fields_planted"] == 1000 and summary["harvest"]["fields_harvested"] > 0
+            and summary["irrigation"]["irrigation_events"] > 0 and scheduled["planted_at"] == "2025-05-01T00:00"
+            and (planting_after_sowing == INACTIVE).all() and segments[0]["recommendation"] == "INACTIVE"
+            and summary["irrigation"]["lowest_awc"] > open_loop["irrigation"]["lowest_awc"]
+            and elapsed < 120):
+        print("\nPASS: Season backtest carries field state forward and summarizes decisions.")
+    else:
+        print("\nFAIL: Season backtest behaviour incorrect.")
+
+if __name__ == "__main__":
+    test_backtest()
@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from datetime import timedelta
+from farmsense.core.platform import FarmSensePlatform
+
+def test_active_cache():
+    platform = FarmSensePlatform()
+    logged = []
+    log_recommendation = platform.audit_logger.log_recommendation
+    platform.audit_logger.log_recommendation = lambda rec: logged.append(rec.audit_log_id) or log_recommendation(rec)
+
+    print("--- Active Recommendation Cache Test ---")
+
+    inputs = {"awc": 45, "prev_awc": 50, "crop_stage": "TUBER_BULKING", "humidity": 95}
+    first = platform.get_recommendation("irrigation", inputs, field_id="north-pivot")
+    # Keys the irrigation engine does not read are not a material change
+    repeat = platform.get_recommendation("irrigation", {**inputs, "humidity": 40}, field_id="north-pivot")
+    print(f"1. Repeat read served from cache: {repeat['audit_log_id'] == first['audit_log_id']}")
+
+    changed = platform.get_recommendation("irrigation", {**inputs, "awc": 20}, field_id="north-pivot")
+    print(f"2. Input change re-evaluates: {changed['audit_log_id'] != first['audit_log_id']}")
+
+    refreshed = platform.get_recommendation("irrigation", {**inputs, "awc": 20}, field_id="north-pivot", refresh=True)
+    print(f"3. Explicit refresh re-evaluates: {refreshed['audit_log_id'] != changed['audit_log_id']}")
+
+    cached = platform.recommendation_cache.entries[("north-pivot", "irrigation")]
+    evicted = platform.recommendation_cache.evict_expired(cached.valid_until + timedelta(seconds=1))
+    print(f"4. Expiry heap evicts: {evicted}")
+
+    # Fused path reuses the per-domain entries and only evaluates the rest
+    single = platform.get_recommendation("warehousing", {"storage_temp": 6}, field_id="north-pivot")
+    batch = platform.get_all_recommendations({"warehousing": {"storage_temp": 6}}, field_id="north-pivot")
+    again = platform.get_all_recommendations({"warehousing": {"storage_temp": 6}}, field_id="north-pivot")
+    same = batch["warehousing"]["audit_log_id"] == single["audit_log_id"] and all(
+        again[d]["audit_log_id"] == batch[d]["audit_log_id"] for d in batch)
+    print(f"5. Batch served from cache: {same} ({len(platform.recommendation_cache)} entries)")
+
+    if (repeat["audit_log_id"] == first["audit_log_id"] and changed["audit_log_id"] != first["audit_log_id"]
+            and refreshed["audit_log_id"] != changed["audit_log_id"] and evicted == [("north-pivot", "irrigation")]
+            and same and len(logged) == 4):
+        print("\nPASS: Active recommendations are reused until expiry, input change or refresh.")
+    else:
+        print(f"\nFAIL: Cache behaviour incorrect ({len(logged)} single-domain audit entries).")
+
+if __name__ == "__main__":
+    test_active_cache()
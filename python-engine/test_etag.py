@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.data.thresholds import POTATO_THRESHOLDS
+
+def test_conditional_recommendation():
+    platform = FarmSensePlatform()
+    audited = []
+    log_recommendation = platform.audit_logger.log_recommendation
+    platform.audit_logger.log_recommendation = lambda rec: audited.append(rec.audit_log_id) or log_recommendation(rec)
+
+    print("--- Conditional Recommendation (ETag) Test ---")
+
+    inputs = {"nitrogen": 80, "crop_stage": "TUBER_BULKING"}
+    etag, body = platform.get_conditional_recommendation("nutrient", inputs)
+    print(f"1. First request: ETag {etag}, body returned: {body is not None}")
+
+    # Key order and ignored keys do not change the canonical inputs
+    same_etag, not_modified = platform.get_conditional_recommendation(
+        "nutrient", {"crop_stage": "TUBER_BULKING", "nitrogen": 80, "humidity": 50}, [etag])
+    print(f"2. Repeat with If-None-Match: 304 = {not_modified is None}, audit entries = {len(audited)}")
+
+    changed_etag, changed = platform.get_conditional_recommendation("nutrient", {**inputs, "nitrogen": 200}, [etag])
+    print(f"3. Changed inputs: new ETag = {changed_etag != etag}, body returned: {changed is not None}")
+
+    # Editing a threshold invalidates every ETag
+    targets = POTATO_THRESHOLDS["nutrient"]["nitrogen_targets"]
+    original = targets["TUBER_BULKING"]
+    targets["TUBER_BULKING"] = original + 1
+    try:
+        unrefreshed, _ = platform.get_conditional_recommendation("nutrient", inputs, [etag])
+        platform.refresh_thresholds()
+        threshold_etag, threshold_body = platform.get_conditional_recommendation("nutrient", inputs, [etag])
+    finally:
+        targets["TUBER_BULKING"] = original
+        platform.refresh_thresholds()
+    print(f"4. Threshold edit: same ETag until refreshed = {unrefreshed == etag}, then new ETag = {threshold_etag != etag}, "
+          f"body returned: {threshold_body is not None}")
+
+    if (body is not None and same_etag == etag and not_modified is None and changed_etag != etag and changed is not None
+            and unrefreshed == etag and threshold_etag != etag and threshold_body is not None and len(audited) == 3):
+        print("\nPASS: Unchanged inputs are answered with 304 without re-evaluation or audit.")
+    else:
+        print("\nFAIL: Conditional recommendation behaviour incorrect.")
+
+if __name__ == "__main__":
+    test_conditional_recommendation()
@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import asyncio
+from datetime import timedelta
+from farmsense.core.platform import FarmSensePlatform
+
+async def drain(subscription):
+    events = []
+    while True:
+        event = await subscription.next_event(timeout=0.05)
+        if event is None:
+            return events
+        events.append(event)
+
+async def run_events_test():
+    platform = FarmSensePlatform()
+    bus = platform.event_bus
+
+    print("--- Recommendation Event Stream Test ---")
+
+    field_sub = bus.subscribe("north-pivot")
+    pest_sub = bus.subscribe(domains=["pest_weed"])
+
+    # Engines run in worker threads, as they do behind the API
+    await asyncio.to_thread(platform.get_recommendation, "irrigation", {"awc": 60}, "north-pivot")
+    await asyncio.to_thread(platform.get_recommendation, "irrigation", {"awc": 60}, "north-pivot", True)
+    await asyncio.to_thread(platform.get_recommendation, "irrigation", {"awc": 20, "precipitation_forecast": 0}, "north-pivot")
+    await asyncio.to_thread(platform.get_recommendation, "pest_weed", {"pest_count": 60, "humidity": 90}, "south-field")
+
+    events = await drain(field_sub)
+    kinds = [e["event"] for e in events]
+    print(f"1. Field subscriber: {kinds}")
+
+    pest_events = await drain(pest_sub)
+    print(f"2. Domain subscriber: {[(e['event'], e['field_id']) for e in pest_events]}")
+
+    cached = platform.recommendation_cache.entries[("north-pivot", "irrigation")]
+    platform.recommendation_cache.evict_expired(cached.valid_until + timedelta(seconds=1))
+    expired = await drain(field_sub)
+    print(f"3. Expiry: {[e['event'] for e in expired]}")
+
+    # A slow client keeps only the newest events and is told how many it missed
+    bus.buffer_size = 3
+    slow_sub = bus.subscribe()
+    for awc in range(10, 100, 10):
+        await asyncio.to_thread(platform.get_recommendation, "field_prep", {"awc": awc, "compaction_level": awc}, f"field-{awc}")
+    slow = await drain(slow_sub)
+    print(f"4. Bounded buffer: {[e['event'] for e in slow]}")
+
+    bus.unsubscribe(field_sub)
+    bus.unsubscribe(pest_sub)
+    bus.unsubscribe(slow_sub)
+
+    ok = (kinds == ["recommendation_changed", "recommendation_changed", "emergency"]
+          and [e["event"] for e in pest_events] == ["recommendation_changed", "emergency"]
+          and [e["event"] for e in expired] == ["expired"]
+          and slow[0]["event"] == "overflow" and len(slow) == 4 and not bus.subscribers)
+    return ok
+
+def test_event_stream():
+    if asyncio.run(run_events_test()):
+        print("\nPASS: Recommendation changes, emergencies and expirations are pushed to subscribers.")
+    else:
+        print("\nFAIL: Event stream did not deliver the expected events.")
+
+if __name__ == "__main__":
+    test_event_stream()
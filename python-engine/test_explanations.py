@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import json
+import tempfile
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger, Reconstructor
+from farmsense.core.explanations import Explanation, render, render_log
+
+def test_explanations():
+    platform = FarmSensePlatform(state_dir=tempfile.mkdtemp())
+    logger = platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+
+    print("--- Templated Explainability Test ---")
+
+    # Clients still receive rendered sentences
+    inputs = {"awc": 38, "prev_awc": 45, "precipitation_forecast": 0, "crop_stage": "TUBER_BULKING"}
+    response = platform.get_recommendation("irrigation", inputs)
+    crossed = response["explainability"]["thresholds_crossed"]
+    expected = "Available Water Content (38%) has dropped below the critical threshold (65%)."
+    print(f"1. Rendered: {crossed[0]}")
+
+    # The audit log keeps template IDs and parameters only
+    stored = logger.get_log(response["audit_log_id"])
+    compact_item = stored["explainability"]["thresholds_crossed"][0]
+    print(f"2. Stored: {compact_item}")
+
+    # Rendering the stored form reproduces the response text
+    rendered_log = render_log(stored)
+    same_text = rendered_log["explainability"] == response["explainability"]
+    print(f"3. Rendered audit record matches response: {same_text}")
+
+    # Compact form is smaller than the text it replaces
+    compact_size = len(json.dumps(stored["explainability"]))
+    text_size = len(json.dumps(response["explainability"]))
+    print(f"4. Explainability size: {compact_size} bytes compact vs {text_size} bytes rendered")
+
+    # Reconstruction compares compact forms and does not write another audit entry
+    reconstructor = Reconstructor(platform)
+    reconstructor.audit_logger = logger
+    entries_before = sum(1 for _ in logger.iter_entries())
+    result = reconstructor.reconstruct(response["audit_log_id"])
+    entries_after = sum(1 for _ in logger.iter_entries())
+    print(f"5. Reconstructed match: {result['match']}, explanation match: {result['explanation_match']}, "
+          f"new entries: {entries_after - entries_before}")
+
+    # Records written before templating (plain strings) still render and compare
+    legacy = {**stored, "explainability": rendered_log["explainability"]}
+    legacy_text = render_log(legacy)["explainability"] == response["explainability"]
+    print(f"6. Legacy string record renders unchanged: {legacy_text}")
+
+    unknown_rejected = False
+    try:
+        Explanation("irrigation.no_such_template")
+    except KeyError:
+        unknown_rejected = True
+    print(f"7. Unknown template rejected: {unknown_rejected}")
+
+    if (crossed[0] == expected and compact_item == ["irrigation.below_critical", {"awc": 38, "critical_awc": 65}]
+            and render(compact_item) == expected and same_text and compact_size < text_size
+            and result["match"] and result["explanation_match"] and entries_after == entries_before
+            and legacy_text and unknown_rejected):
+        print("\nPASS: Explainability is stored as templates and rendered on demand.")
+    else:
+        print("\nFAIL: Templated explainability incorrect.")
+
+if __name__ == "__main__":
+    test_explanations()
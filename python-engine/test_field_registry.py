@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import time
+import tempfile
+import numpy as np
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+from farmsense.core.fields import FieldRegistry, haversine_km
+
+def test_field_registry():
+    print("--- Field Registry Test ---")
+
+    # 100k fields across a 10° x 10° region
+    rng = np.random.default_rng(11)
+    n = 100000
+    lats, lons = rng.uniform(40, 50, n), rng.uniform(-100, -90, n)
+    ids = [f"field-{i}" for i in range(n)]
+    registry = FieldRegistry()
+    t0 = time.perf_counter()
+    registry.register_many(ids, lats, lons)
+    print(f"1. Registered {len(registry)} fields in {len(registry.cells)} cells in {time.perf_counter() - t0:.2f} s")
+
+    # Viewport queries agree with a brute-force scan
+    boxes = [(s, w, s + 0.25, w + 0.4) for s, w in zip(rng.uniform(40, 49.7, 200), rng.uniform(-100, -90.5, 200))]
+    t0 = time.perf_counter()
+    results = [registry.viewport(*box) for box in boxes]
+    viewport_ms = (time.perf_counter() - t0) * 1000 / len(boxes)
+    viewport_ok = all(
+        {f["field_id"] for f in result["fields"]} == {ids[i] for i in np.nonzero((lats >= s) & (lats <= nn) & (lons >= w) & (lons <= e))[0]}
+        for result, (s, w, nn, e) in zip(results, boxes))
+    print(f"2. Viewports average {np.mean([r['count'] for r in results]):.0f} fields in {viewport_ms:.3f} ms, match brute force: {viewport_ok}")
+
+    # Nearest neighbours agree with a brute-force scan
+    points = list(zip(rng.uniform(40, 50, 200), rng.uniform(-100, -90, 200)))
+    t0 = time.perf_counter()
+    nearest = [registry.nearest(lat, lon, k=5) for lat, lon in points]
+    nearest_ms = (time.perf_counter() - t0) * 1000 / len(points)
+    nearest_ok = all([f["field_id"] for f in found] == [ids[i] for i in np.argsort(haversine_km(lat, lon, lats, lons), kind="stable")[:5]]
+                     for found, (lat, lon) in zip(nearest, points))
+    print(f"3. 5-nearest in {nearest_ms:.3f} ms, match brute force: {nearest_ok}")
+
+    # Moves, removals, antimeridian viewports and far neighbours in a sparse registry
+    sparse = FieldRegistry()
+    sparse.register("fiji", -17.8, 179.95)
+    sparse.register("samoa", -13.8, -179.9)
+    sparse.register("idaho", 43.5, -112.0)
+    sparse.register("idaho", 43.6, -112.1)
+    wrapped = {f["field_id"] for f in sparse.viewport(-20, 179, -10, -179)["fields"]}
+    far = [f["field_id"] for f in sparse.nearest(0.0, 0.0, k=3)]
+    sparse.remove("fiji")
+    after_remove = ([f["field_id"] for f in sparse.nearest(-17.8, 179.95, k=2)], sparse.location("idaho"))
+    print(f"4. Antimeridian viewport {sorted(wrapped)}, nearest to (0, 0) {far}, after removal {after_remove}")
+
+    # A move or removal that empties a weather cell drops the cell
+    moving = FieldRegistry()
+    moving.register("a", 10.0, 10.0)
+    moving.register("a", 20.0, 20.0)
+    after_move = moving.weather_cells()
+    moving.remove("a")
+    emptied = after_move == {(20.0, 20.0): ["a"]} and moving.weather_cells() == {} and not moving.cells
+    print(f"   Cells after moving 'a': {after_move}; after removing it: {moving.weather_cells()}")
+
+    # Nearest search wraps at the antimeridian: the closest field is across the seam
+    seam = FieldRegistry()
+    seam.register_many([f"filler-{i}" for i in range(400)], rng.uniform(40, 50, 400), rng.uniform(-100, -90, 400))
+    seam.register("east-of-seam", 10.0, -179.9)
+    seam.register("west-of-seam", 10.0, 179.5)
+    seam.register("on-seam", 10.3, 180.0)
+    across = [f["field_id"] for f in seam.nearest(10.0, 179.92)]
+    from_west = [f["field_id"] for f in seam.nearest(10.25, -179.98)]
+    print(f"5. Nearest to (10, 179.92): {across}; to (10.25, -179.98): {from_west}")
+
+    # Platform: fields share weather fetches per cell and the map shows their latest recommendations
+    state_dir = tempfile.mkdtemp()
+    platform = FarmSensePlatform(state_dir=state_dir)
+    platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+    for i, (lat, lon) in enumerate([(43.501, -112.004), (43.512, -111.996), (43.49, -112.03), (44.2, -111.5)]):
+        platform.register_field(f"farm-{i}", lat, lon)
+    cells = platform.field_registry.weather_cells()
+    platform.get_recommendation("irrigation", {"awc": 30, "precipitation_forecast": 0}, field_id="farm-0")
+    platform.get_all_recommendations({"planting": {"soil_temp": 10}}, field_id="farm-1")
+    view = platform.fields_in_viewport(43.4, -112.1, 43.6, -111.9, domains=["irrigation", "planting"])
+    shown = {f["field_id"]: {d: r["base_recommendation"] for d, r in f["recommendations"].items()} for f in view["fields"]}
+    print(f"6. Weather cells {sorted(cells)}, viewport: {shown}")
+
+    reloaded = FarmSensePlatform(state_dir=state_dir)
+    print(f"7. Reloaded {len(reloaded.field_registry)} fields, prefetch locations {len(reloaded.weather_prefetcher.locations)}")
+    reloaded_locations = len(reloaded.weather_prefetcher.locations)
+    # Moving the only field out of a cell stops prefetching it
+    reloaded.register_field("farm-3", 43.5, -112.0)
+    abandoned = list(reloaded.weather_prefetcher.locations) == [reloaded.weather_prefetcher.location_key(43.5, -112.0)]
+    print(f"8. After moving farm-3 into the shared cell, prefetch locations: {list(reloaded.weather_prefetcher.locations)}")
+
+    if (viewport_ok and viewport_ms < 1.0 and nearest_ok and nearest_ms < 1.0
+            and wrapped == {"fiji", "samoa"} and far[0] == "idaho" and len(far) == 3
+            and after_remove == (["samoa", "idaho"], (43.6, -112.1)) and emptied
+            and across == ["east-of-seam"] and from_west == ["on-seam"]
+            and len(cells) == 2 and set(shown) == {"farm-0", "farm-1", "farm-2"} and shown["farm-0"]["irrigation"] == "NOW"
+            and "planting" in shown["farm-1"] and shown["farm-2"] == {}
+            and len(reloaded.field_registry) == 4 and reloaded_locations == 2 and abandoned):
+        print("\nPASS: Field registry answers viewport and nearest queries and groups weather by cell.")
+    else:
+        print("\nFAIL: Field registry incorrect.")
+
+if __name__ == "__main__":
+    test_field_registry()
@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import Reconstructor
+
+VOLATILE_KEYS = ("issued_at", "valid_until", "remaining_time", "audit_log_id")
+
+def comparable(rec):
+    return {k: v for k, v in rec.items() if k not in VOLATILE_KEYS}
+
+def test_fused_evaluator():
+    platform = FarmSensePlatform()
+
+    print("--- Fused Evaluator Test ---")
+
+    field_inputs = {
+        "awc": 30, "prev_awc": 35, "precipitation_forecast": 0, "soil_temp": 12, "prev_soil_temp": 11,
+        "nitrogen": 90, "crop_stage": "TUBER_INITIATION", "pest_count": 60, "humidity": 90,
+        "skin_set": True, "queue_size": 30, "inventory_level": 1500, "storage_temp": 10,
+        "orders_pending": 8, "market_data_ready": True, "compaction_level": 80
+    }
+    fused = platform.get_field_recommendations(field_inputs)
+
+    all_match = True
+    for domain, rec in fused.items():
+        single = platform.get_recommendation(domain, field_inputs)
+        match = comparable(rec) == comparable(single)
+        all_match = all_match and match
+        print(f"   - {domain}: {rec['base_recommendation']} (match: {match})")
+
+    timestamps = {rec["issued_at"] for rec in fused.values()}
+    print(f"\nShared timestamp: {len(timestamps) == 1}")
+
+    # Per-domain inputs go through the same fused pass
+    domain_inputs = {"irrigation": {"awc": 45, "crop_stage": "TUBER_BULKING"}, "warehousing": {"storage_temp": 12}}
+    batch = platform.get_all_recommendations(domain_inputs)
+    for domain, inputs in domain_inputs.items():
+        match = comparable(batch[domain]) == comparable(platform.get_recommendation(domain, inputs))
+        all_match = all_match and match
+
+    # Batch audit entries still reconstruct and confirm per domain
+    audit_id = fused["irrigation"]["audit_log_id"]
+    result = Reconstructor(platform).reconstruct(audit_id)
+    confirmed = platform.confirm_emergency(audit_id)
+    print(f"Reconstructed {audit_id}: {result['match']}, emergency {confirmed['status']}")
+
+    # Malformed batches are rejected before anything is evaluated or audited
+    rejected = 0
+    for bad in ({"irrigation": {"awc": "low"}}, {"nutrient": {"crop_stage": "FLOWERING"}},
+                {"harvest": {"skin_set": 1}}, {"orchard": {}}):
+        try:
+            platform.get_all_recommendations(bad)
+        except ValueError as e:
+            rejected += 1
+            print(f"   - Rejected: {e}")
+    try:
+        platform.get_all_recommendations({"irrigation": {"awc": 40, "acw": 40}}, strict=True)
+    except ValueError as e:
+        rejected += 1
+        print(f"   - Rejected (strict): {e}")
+
+    if all_match and len(timestamps) == 1 and result["match"] and confirmed["status"] == "CONFIRMED" and rejected == 5:
+        print("\nPASS: Fused evaluation matches per-domain evaluation with one batch audit entry.")
+    else:
+        print("\nFAIL: Fused evaluation differs from per-domain evaluation.")
+
+if __name__ == "__main__":
+    test_fused_evaluator()
@@ -0,0 +1,120 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import tempfile
+import threading
+import numpy as np
+from datetime import datetime, timedelta
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+from farmsense.data.ingestion import OpenMeteoIngestor
+from farmsense.data.gdd import GrowingDegreeDays
+
+def payload(start, temps, current_hour):
+    times = [(start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(len(temps))]
+    return {"current": {"time": times[current_hour]}, "hourly": {"time": times, "temperature_2m": temps}}
+
+class OfflineIngestor(OpenMeteoIngestor):
+    """Serves one day of 17°C from `start`, observed up to 11:00."""
+    def __init__(self, start):
+        self.start = start
+
+    def fetch(self, lat, lon, forecast_days=1):
+        data = payload(self.start, [17.0] * 24, current_hour=11)
+        data["hourly"].update({"soil_moisture_3_to_9cm": [0.3] * 24, "precipitation": [0.0] * 24,
+                               "et0_fao_evapotranspiration": [0.1] * 24})
+        return data
+
+def test_gdd_accumulator():
+    state_dir = tempfile.mkdtemp()
+    platform = FarmSensePlatform(state_dir=state_dir)
+
+    print("--- Growing Degree Day Test ---")
+
+    start = datetime(2026, 5, 1)
+    platform.register_planting("north-pivot", start - timedelta(hours=1))
+    platform.register_planting("south-field", start - timedelta(hours=1), gdd=440)
+
+    # 17°C for 48 h = 10 degree-days per day above the 7°C base; only the first 24 h are observed
+    warm = payload(start, [17.0] * 48, current_hour=23)
+    result = platform.gdd.heartbeat({"north-pivot": warm, "south-field": warm})
+    print(f"1. After one day: {result}")
+
+    # A later payload overlapping the counted hours adds only the new ones
+    later = payload(start, [17.0] * 48, current_hour=47)
+    again = platform.gdd.heartbeat({"north-pivot": later})
+    print(f"2. Overlapping payload: {again}")
+
+    # Hour-by-hour observation agrees with the vectorized block update
+    single = GrowingDegreeDays()
+    single.register("f", -1)
+    for hour, temp in enumerate([17.0] * 24):
+        single.observe("f", hour, temp)
+    print(f"3. Single observations: {single.gdd[0]:.2f} GDD")
+
+    # Derived stage feeds the nutrient target when no crop_stage is supplied
+    rec = platform.get_recommendation("nutrient", {"nitrogen": 130}, field_id="south-field")
+    print(f"4. South field: {rec['explainability']['crop_stage']} -> {rec['base_recommendation']}")
+
+    platform.gdd.save()
+    restored = GrowingDegreeDays(os.path.join(state_dir, "gdd.npz"))
+    print(f"5. Restored: {restored.field_index}, gdd {np.round(restored.gdd, 1).tolist()}")
+
+    # Rows grow geometrically rather than one np.append per planting
+    growing = GrowingDegreeDays()
+    capacities = set()
+    for i in range(1000):
+        growing.register(f"field-{i}", i, gdd=i)
+        capacities.add(growing.gdd.size)
+    grown = sorted(capacities) == [64, 128, 256, 512, 1024] and len(growing.stage_codes()) == 1000
+    print(f"6. Capacities while registering 1000 plantings: {sorted(capacities)}")
+
+    # Concurrent plantings and heartbeats never share or lose a row
+    shared = GrowingDegreeDays()
+    def plant_and_beat(worker):
+        for i in range(50):
+            field_id = f"w{worker}-{i}"
+            shared.register(field_id, -1)
+            shared.heartbeat({field_id: payload(start, [17.0] * 24, current_hour=23)})
+    threads = [threading.Thread(target=plant_and_beat, args=(w,)) for w in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    concurrent = (sorted(shared.field_index.values()) == list(range(400))
+                  and np.allclose(shared.gdd[:len(shared)], 10.0))
+    print(f"7. 8 threads x 50 plantings: {len(shared)} rows, each at 10 GDD: {concurrent}")
+
+    # Planted two days before the first payload hour: the stored 36 h are backfilled (15 GDD),
+    # the 12 h the store lacks are flagged, then the payload adds 12 observed hours (5 GDD)
+    day = datetime(2026, 5, 10)
+    live = FarmSensePlatform(state_dir=tempfile.mkdtemp())
+    live.audit_logger = AuditLogger(tempfile.mkdtemp())
+    live.weather_prefetcher.ingestor = OfflineIngestor(day)
+    cell = live.register_field("east", 43.6, -116.2)["weather_cell"]
+    history = [(day - timedelta(hours=48 - h)).strftime("%Y-%m-%dT%H:%M") for h in range(36)]
+    live.weather_store.write(*cell, history, {"temperature_2m": [17.0] * 36})
+    live.register_planting("east", day - timedelta(hours=49))
+    live_rec = live.get_recommendation_with_real_data("nutrient", 43.6, -116.2, field_id="east")
+    backfilled = abs(live.gdd.gdd[live.gdd.field_index["east"]] - 20.0) < 1e-6 and live_rec["weather"].get("gdd_missing_hours") == 12
+    print(f"8. Backfilled GDD {live.gdd.gdd[0]:.2f}, weather {live_rec['weather']}")
+
+    # Heartbeats save at most every save_interval; the snapshotter flushes the rest
+    gdd_path = live.gdd.state_path
+    unsaved = GrowingDegreeDays(gdd_path).gdd[0] == 0.0
+    live.save_snapshot()
+    flushed = abs(GrowingDegreeDays(gdd_path).gdd[0] - 20.0) < 1e-6
+    print(f"9. Not saved by the request: {unsaved}; saved by the snapshot: {flushed}")
+
+    if (result["north-pivot"]["gdd"] == 10.0 and result["south-field"]["crop_stage"] == "TUBER_INITIATION"
+            and again["north-pivot"]["gdd"] == 20.0 and abs(single.gdd[0] - 10.0) < 1e-9
+            and rec["explainability"]["crop_stage"] == "TUBER_INITIATION"
+            and np.allclose(restored.gdd, platform.gdd.gdd[:len(platform.gdd)]) and restored.stage("north-pivot") == "SPROUT_DEVELOPMENT"
+            and grown and concurrent and backfilled and unsaved and flushed):
+        print("\nPASS: Degree days accumulate incrementally and derive crop_stage.")
+    else:
+        print("\nFAIL: Growing degree day accumulation incorrect.")
+
+if __name__ == "__main__":
+    test_gdd_accumulator()
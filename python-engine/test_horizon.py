@@ -0,0 +1,73 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import numpy as np
+from datetime import datetime, timedelta
+from farmsense.core.horizon import evaluate_horizon, hourly_inputs
+
+def payload(start, moisture, precipitation, current_hour):
+    times = [(start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(len(moisture))]
+    n = len(times)
+    return {
+        "current": {"time": times[current_hour]},
+        "hourly": {"time": times, "soil_moisture_3_to_9cm": moisture, "precipitation": precipitation,
+                   "soil_temperature_6cm": [12.0] * n, "relative_humidity_2m": [60] * n,
+                   "et0_fao_evapotranspiration": [0.2] * n},
+    }
+
+def test_forecast_horizon():
+    print("--- Forecast Horizon Test ---")
+
+    # Hourly data from midnight; the timeline starts at the current hour (02:00).
+    # AWC: 90% until 10:00, 70% (approaching) until 20:00, then 60% (critical).
+    # 6 mm of rain at 24:00 delays irrigation for the six hours that can see it.
+    start = datetime(2026, 7, 1)
+    n = 48
+    moisture = [0.36] * 10 + [0.28] * 10 + [0.24] * (n - 20)
+    precipitation = [0.0] * n
+    precipitation[24] = 6.0
+    precipitation[47] = 2.0
+    data = payload(start, moisture, precipitation, current_hour=2)
+
+    times, inputs = hourly_inputs(data)
+    forecast = inputs["precipitation_forecast"]
+    expected_forecast = np.zeros(n - 2)
+    expected_forecast[17:23] = 6.0  # hours 19..24 look ahead to 24:00
+    expected_forecast[40:] = 2.0    # the window is cut off at the end of the forecast
+    window_ok = np.array_equal(forecast, expected_forecast)
+    trimmed = times[0] == "2026-07-01T02:00" and len(times) == n - 2 and inputs["prev_awc"][0] == 90.0
+    print(f"1. Timeline starts {times[0]} ({len(times)} hours); 6 h rain window correct: {window_ok}")
+
+    result = evaluate_horizon(data, domains=["irrigation"])
+    irrigation = result["domains"]["irrigation"]
+    print(f"2. Current {irrigation['current']}, first change at hour {irrigation['first_change_hour']} "
+          f"({irrigation['first_change_time']}) to {irrigation['next_recommendation']}, "
+          f"first NOW at hour {irrigation['first_now_hour']} ({irrigation['first_now_time']})")
+
+    segments = [(s["start_hour"], s["hours"], s["base_recommendation"], s["context_flags"]) for s in irrigation["segments"]]
+    expected_segments = [
+        (0, 8, "WAIT", []),                  # 02:00-09:00 well watered
+        (8, 1, "SOON", []),                  # 10:00 drops to 70% and is falling
+        (9, 9, "LATER", []),                 # 11:00-19:00 approaching, steady
+        (18, 5, "WAIT", ["WEATHER_DELAY"]),  # 20:00-24:00 critical, rain within 6 h
+        (23, 23, "NOW", []),                 # 25:00 onward the rain has passed
+    ]
+    print(f"3. Segments: {segments}")
+
+    # Manual inputs override every hour: no equipment means no change over the horizon
+    constrained = evaluate_horizon(data, {"equipment_available": False}, domains=["irrigation"])["domains"]["irrigation"]
+    print(f"4. Without equipment: first change {constrained['first_change_hour']}, first NOW {constrained['first_now_hour']}")
+
+    if (window_ok and trimmed and result["hours"] == n - 2 and result["start_time"] == times[0]
+            and irrigation["current"] == "WAIT" and irrigation["first_change_hour"] == 8
+            and irrigation["first_change_time"] == "2026-07-01T10:00" and irrigation["next_recommendation"] == "SOON"
+            and irrigation["first_now_hour"] == 23 and irrigation["first_now_time"] == "2026-07-02T01:00"
+            and segments == expected_segments and sum(s["hours"] for s in irrigation["segments"]) == n - 2
+            and constrained["first_change_hour"] is None and constrained["first_now_hour"] is None):
+        print("\nPASS: Forecast horizon reports first change, first NOW and segments per domain.")
+    else:
+        print("\nFAIL: Forecast horizon incorrect.")
+
+if __name__ == "__main__":
+    test_forecast_horizon()
@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import time
+import tempfile
+from datetime import datetime, timedelta
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+from farmsense.core.engine import Recommendation, BaseRecommendation
+from farmsense.core.rollups import KPIRollups
+
+def test_kpi_rollups():
+    state_dir = tempfile.mkdtemp()
+    platform = FarmSensePlatform(state_dir=state_dir)
+    logger = platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+
+    print("--- KPI Rollup Test ---")
+
+    # Live recommendations update the buckets as they are logged
+    for awc in (30, 55, 80):
+        platform.get_recommendation("irrigation", {"awc": awc, "precipitation_forecast": 0})
+    platform.get_all_recommendations({"irrigation": {"awc": 60}, "planting": {"soil_temp": 10}})
+    now = datetime.now()
+    live = platform.kpi_series(now - timedelta(hours=1), now + timedelta(hours=1), domain="irrigation")
+    points = live["series"]["irrigation"]
+    mean_matches = all(round(sum(s["sum"]) / sum(s["count"]), 2) == platform.aggregate_kpis("irrigation")[kpi]
+                       for kpi, s in points.items())
+    print(f"1. Live series ({live['resolution']}): {sorted(points)}, means match aggregate_kpis: {mean_matches}")
+
+    # Ninety days of hourly history for one KPI
+    rollups = KPIRollups(hourly_days=14)
+    start = datetime(2026, 5, 1)
+    recs = [Recommendation("IRRIGATION", BaseRecommendation.WAIT, explainability={}, issued_at=start + timedelta(hours=h),
+                           kpis={"water_efficiency": h % 24}) for h in range(90 * 24)]
+    rollups.observe(recs)
+    daily = rollups.query(start, start + timedelta(days=90), resolution="day")["series"]["irrigation"]["water_efficiency"]
+    day_ok = (len(daily["timestamps"]) == 90 and set(daily["count"]) == {24} and set(daily["min"]) == {0}
+              and set(daily["max"]) == {23} and set(daily["last"]) == {23} and set(daily["mean"]) == {11.5})
+    print(f"2. Daily buckets: {len(daily['timestamps'])}, first {daily['timestamps'][0]}, stats correct: {day_ok}")
+
+    # Downsampled for display: 90 days into at most 10 points
+    coarse = rollups.query(start, start + timedelta(days=90), resolution="day", max_points=10)
+    series = coarse["series"]["irrigation"]["water_efficiency"]
+    print(f"3. max_points=10: {len(series['timestamps'])} points of {coarse['bucket_seconds'] // 86400} days, total count {sum(series['count'])}")
+
+    # Hourly buckets older than the hourly window are dropped; daily buckets keep the history
+    end = start + timedelta(days=90)
+    hourly_before = len(rollups.series["hour"][("irrigation", "water_efficiency")].keys)
+    dropped = rollups.downsample(now=end)
+    hourly_after = len(rollups.series["hour"][("irrigation", "water_efficiency")].keys)
+    auto = rollups.resolution_for(end - timedelta(days=1), end, now=end), rollups.resolution_for(start, end, now=end)
+    print(f"4. Hourly buckets {hourly_before} -> {hourly_after} (dropped {dropped}), auto resolution: {auto}")
+
+    # Range queries stay fast with years of history
+    big = KPIRollups(hourly_days=10000)
+    big.observe(Recommendation("IRRIGATION", BaseRecommendation.WAIT, explainability={}, issued_at=start + timedelta(hours=h),
+                               kpis={"water_efficiency": 1, "stress_avoidance_potential": 2}) for h in range(3 * 365 * 24))
+    t0 = time.perf_counter()
+    week = big.query(start + timedelta(days=400), start + timedelta(days=407), resolution="hour")
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    print(f"5. One week of hourly points from 3 years of history in {elapsed_ms:.2f} ms")
+
+    # Snapshot plus catch-up from the audit log after a restart
+    platform.kpi_rollups.save()
+    platform.get_recommendation("irrigation", {"awc": 20, "precipitation_forecast": 0})
+    restarted = KPIRollups(os.path.join(state_dir, "kpi_rollups.json"))
+    added = restarted.catch_up(logger.iter_logs(start=restarted.through))
+    again = restarted.catch_up(logger.iter_logs(start=restarted.through))
+    total = sum(s.count[-1] for (d, k), s in restarted.series["day"].items() if d == "irrigation" and k == "water_efficiency")
+    print(f"6. Restart caught up {added} new record(s) (second pass {again}); irrigation water_efficiency count today: {total}")
+
+    rejected = 0
+    for bad in ({"resolution": "minute"}, {"max_points": 0}, {"domain": "orchard"}):
+        try:
+            platform.kpi_series(now - timedelta(hours=1), now, **bad)
+        except ValueError:
+            rejected += 1
+    print(f"7. Invalid queries rejected: {rejected}/3")
+
+    if (mean_matches and live["resolution"] == "hour" and day_ok and len(series["timestamps"]) == 10
+            and sum(series["count"]) == 90 * 24 and hourly_after == 14 * 24 and dropped == hourly_before - hourly_after
+            and auto == ("hour", "day") and len(week["series"]["irrigation"]["water_efficiency"]["timestamps"]) == 168
+            and elapsed_ms < 50 and added == 1 and again == 0 and total == 5 and rejected == 3):
+        print("\nPASS: KPI rollups are maintained incrementally and served as chart-ready series.")
+    else:
+        print("\nFAIL: KPI rollups incorrect.")
+
+if __name__ == "__main__":
+    test_kpi_rollups()
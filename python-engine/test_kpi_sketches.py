@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import json
+import tempfile
+import numpy as np
+from datetime import datetime, timedelta
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+from farmsense.core.engine import Recommendation, BaseRecommendation
+from farmsense.core.rollups import KPIRollups
+from farmsense.core.sketches import QuantileSketch
+
+def test_kpi_sketches():
+    print("--- KPI Quantile Sketch Test ---")
+
+    # Relative accuracy against exact percentiles
+    rng = np.random.default_rng(7)
+    values = np.clip(rng.normal(75, 12, 100000), 0, 100)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for v in values:
+        sketch.add(float(v))
+    errors = {q: abs(sketch.quantile(q) - np.quantile(values, q)) / np.quantile(values, q) for q in (0.05, 0.5, 0.95)}
+    print(f"1. Sketch {sketch.quantiles((0.05, 0.5, 0.95))}, max relative error {max(errors.values()):.4f}")
+
+    # Sketches of four shards merge into exactly the sketch of the whole stream
+    shards = [QuantileSketch() for _ in range(4)]
+    for i, v in enumerate(values):
+        shards[i % 4].add(float(v))
+    merged = shards[0]
+    for shard in shards[1:]:
+        merged.merge(QuantileSketch.from_dict(json.loads(json.dumps(shard.to_dict()))))
+    same_bins = merged.positive == sketch.positive and merged.zero == sketch.zero and merged.count == sketch.count
+    print(f"2. Merged shard sketches equal the single-stream sketch: {same_bins}")
+
+    # Memory stays bounded for wide ranges; upper quantiles keep their accuracy
+    wide = rng.lognormal(0, 1, 200000)
+    bounded = QuantileSketch(max_bins=256)
+    for v in wide:
+        bounded.add(float(v))
+    p95_error = abs(bounded.quantile(0.95) - np.quantile(wide, 0.95)) / np.quantile(wide, 0.95)
+    print(f"3. Bins kept: {len(bounded.positive)} (max 256), p95 relative error {p95_error:.4f}")
+
+    histogram = sketch.histogram(bins=10)
+    print(f"4. Histogram counts: {histogram['counts']}")
+
+    # Rollups from two worker processes merge into the single-process result
+    start = datetime(2026, 5, 1)
+    recs = [Recommendation("IRRIGATION", BaseRecommendation.WAIT, explainability={}, issued_at=start + timedelta(minutes=10 * i),
+                           kpis={"water_efficiency": float(values[i])}) for i in range(20000)]
+    single, worker_a, worker_b = KPIRollups(), KPIRollups(), KPIRollups()
+    single.observe(recs)
+    worker_a.observe(recs[0::2])
+    worker_b.observe(recs[1::2])
+    combined = worker_a.merge(worker_b)
+    span = (start, start + timedelta(days=200))
+    same_distribution = single.distribution(*span) == combined.distribution(*span)
+    dist = combined.distribution(*span)["kpis"]["irrigation"]["water_efficiency"]
+    print(f"5. Worker merge matches single process: {same_distribution}; p5/p50/p95 = {dist['p5']}/{dist['p50']}/{dist['p95']}")
+
+    # Per-bucket quantiles in the chart series and the platform endpoint
+    series = combined.query(start, start + timedelta(days=7), resolution="day")["series"]["irrigation"]["water_efficiency"]
+    platform = FarmSensePlatform(state_dir=tempfile.mkdtemp())
+    platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+    for awc in (20, 30, 55, 70, 90):
+        platform.get_recommendation("irrigation", {"awc": awc, "precipitation_forecast": 0})
+    now = datetime.now()
+    live = platform.kpi_distribution(now - timedelta(hours=1), now + timedelta(hours=1), "irrigation")["kpis"]["irrigation"]
+    print(f"6. Daily p50 series {series['p50'][:3]}..., live KPIs: {sorted(live)}")
+
+    if (max(errors.values()) <= 0.01 and same_bins and len(bounded.positive) + len(bounded.negative) <= 256
+            and p95_error <= 0.01 and sum(histogram["counts"]) == len(values) and same_distribution
+            and dist["count"] == 20000 and len(series["p50"]) == 7 and all(s["count"] == 5 for s in live.values())):
+        print("\nPASS: Mergeable quantile sketches answer KPI percentiles per bucket and across workers.")
+    else:
+        print("\nFAIL: KPI quantile sketches incorrect.")
+
+if __name__ == "__main__":
+    test_kpi_sketches()
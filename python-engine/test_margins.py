@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from farmsense.core.platform import FarmSensePlatform
+
+def test_decision_margins():
+    platform = FarmSensePlatform()
+
+    print("--- Decision Margin Test ---")
+
+    # AWC 80% drying at 0.5 points/hour: 5 points (10 h) above the SOON boundary at 75%
+    drying = platform.get_recommendation("irrigation", {"awc": 80, "depletion_rate": 0.5}, field_id="north-pivot")
+    margin = drying["decision_margin"]
+    print(f"1. Irrigation: {margin}")
+
+    # Warehouse cooling away from the 8°C limit: the boundary is never reached on this trend
+    cooling = platform.get_recommendation("warehousing", {"storage_temp": 5, "prev_storage_temp": 6}, field_id="store-1")
+    print(f"2. Warehousing: {cooling['decision_margin']}")
+
+    # Nitrogen just above the SOON band with no previous reading: a plausible swing can cross it
+    nutrient = platform.get_recommendation("nutrient", {"nitrogen": 112, "crop_stage": "VEGETATIVE"}, field_id="north-pivot")
+    print(f"3. Nutrient: {nutrient['decision_margin']}")
+
+    # AWC flat 0.5 points above the critical threshold (65%): no trend crossing, but a plausible change can cross it
+    flat = platform.get_recommendation("irrigation", {"awc": 65.5, "prev_awc": 65.5}, field_id="flat-pivot")
+    print(f"4. Flat irrigation: {flat['decision_margin']}")
+
+    short = platform.heartbeat_plan(horizon_hours=1)
+    long = platform.heartbeat_plan(horizon_hours=12)
+    print(f"5. 1 h plan: {short}")
+    print(f"6. 12 h plan: {long}")
+
+    planning = platform.get_recommendation("planning", {"market_data_ready": True})
+
+    if (margin["input"] == "awc" and margin["threshold"] == 75 and margin["hours_to_boundary"] == 10.0
+            and cooling["decision_margin"]["hours_to_boundary"] is None
+            and nutrient["decision_margin"]["rate_per_hour"] is None
+            and {"field_id": "north-pivot", "domain": "irrigation"} in short["skip"]
+            and {"field_id": "store-1", "domain": "warehousing"} in short["skip"]
+            and {"field_id": "north-pivot", "domain": "nutrient"} in short["due"]
+            and flat["decision_margin"]["rate_per_hour"] == 0 and {"field_id": "flat-pivot", "domain": "irrigation"} in short["due"]
+            and {"field_id": "north-pivot", "domain": "irrigation"} in long["due"]
+            and planning["decision_margin"] is None):
+        print("\nPASS: Margins and time-to-boundary drive which evaluations can be skipped.")
+    else:
+        print("\nFAIL: Decision margins incorrect.")
+
+if __name__ == "__main__":
+    test_decision_margins()
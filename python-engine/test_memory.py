@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import tempfile
+from datetime import datetime, timedelta
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+from farmsense.core.memory import deep_sizeof, container_bytes
+
+def allocate_leak(n):
+    return [{"field": f"leak-{i}", "values": [float(i)] * 8} for i in range(n)]
+
+def test_memory_guard():
+    platform = FarmSensePlatform(state_dir=tempfile.mkdtemp())
+    platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+    guard = platform.memory_guard
+
+    print("--- Memory Guard Test ---")
+
+    # Fill the caches: one irrigation recommendation per field, an ETag per distinct input and the audit index
+    n = 2000
+    for i in range(n):
+        platform.get_recommendation("irrigation", {"awc": 20 + i % 60, "prev_awc": 36}, field_id=f"field-{i}")
+    platform.audit_logger.refcounts()
+    report = platform.memory_report()
+    caches = report["caches"]
+    print(f"1. RSS {report['rss_bytes']} bytes; caches: "
+          f"{ {name: (c['entries'], c['bytes']) for name, c in caches.items() if c['entries']} }")
+
+    # Sampled estimates track an exact deep size
+    cache = platform.recommendation_cache
+    exact = deep_sizeof(cache.entries)
+    estimate = container_bytes(cache.entries)
+    print(f"2. Recommendation cache estimate {estimate} vs exact {exact} bytes")
+
+    # Superseded expiry-heap items no longer pile up when inputs keep changing
+    for round_ in range(20):
+        platform.get_recommendation("irrigation", {"awc": 20 + round_, "prev_awc": 36}, field_id="field-0")
+    heap_bounded = len(cache.expiry_heap) <= 2 * len(cache) + cache.HEAP_SLACK
+    print(f"3. Expiry heap: {len(cache.expiry_heap)} items for {len(cache)} entries")
+
+    # A cache budget evicts the entries closest to expiry, without expiry events
+    soonest = min(cache.entries.values(), key=lambda rec: rec.valid_until).valid_until
+    cache.entries[("field-1", "irrigation")].valid_until = datetime.now() + timedelta(days=2)
+    budget = caches["recommendation_cache"]["bytes"] // 2
+    expected_refs = dict(platform.audit_logger.refcounts())
+    result = platform.set_memory_budgets({"recommendation_cache": budget, "audit_index": 0})
+    after = platform.memory_report()["caches"]
+    kept_latest = ("field-1", "irrigation") in cache.entries
+    no_expiry = not any(rec.valid_until <= soonest for rec in cache.entries.values()) and len(platform.event_bus.last_state) == n
+    print(f"4. Budget {budget} bytes evicted {result['evicted']}: {after['recommendation_cache']['entries']} entries, "
+          f"{after['recommendation_cache']['bytes']} bytes left; longest-lived kept: {kept_latest}")
+
+    # The audit index is rebuilt from refs.log when next needed
+    platform.get_recommendation("planting", {"soil_temp": 11}, field_id="field-0")
+    rebuilt = dict(platform.audit_logger.refcounts())
+    index_ok = after["audit_index"]["entries"] == 0 and len(rebuilt) == len(expected_refs) + 1
+    print(f"5. Audit index dropped and replayed: {index_ok}")
+
+    # Over the process budget, every shrinkable cache gives up entries
+    process = platform.set_memory_budgets({}, rss_budget=1)
+    print(f"6. Process budget pass: evicted {process['evicted']}")
+    platform.set_memory_budgets({}, None)
+
+    # Allocation sites: growth since the previous tracemalloc snapshot points at the leak
+    first = platform.memory_allocations(limit=5)
+    leaked = allocate_leak(20000)
+    second = platform.memory_allocations(limit=10)
+    top = second["top"][0]
+    print(f"7. Tracing started: {first['started']}; top site {top['site']} +{top['bytes_diff']} bytes in {top['count_diff']} blocks")
+    guard.stop_tracing()
+
+    errors = 0
+    for budgets in ({"unknown": 1}, {"water_balance": 1}, {"etag_index": -1}):
+        try:
+            platform.set_memory_budgets(budgets)
+        except ValueError:
+            errors += 1
+    print(f"8. Invalid budgets rejected: {errors}/3")
+
+    if (all(name in caches for name in ("recommendation_cache", "etag_index", "audit_index", "weather_prefetcher"))
+            and caches["recommendation_cache"]["entries"] == n and caches["etag_index"]["entries"] == 60
+            and 0.5 < estimate / exact < 2 and heap_bounded
+            and after["recommendation_cache"]["bytes"] <= budget and kept_latest and no_expiry and index_ok
+            and all(process["evicted"].get(name) for name in ("etag_index", "recommendation_cache"))
+            and first["started"] and os.path.basename(__file__) in top["site"] and top["bytes_diff"] > 1_000_000
+            and len(leaked) == 20000 and errors == 3):
+        print("\nPASS: Caches report their size and memory budgets evict before the process outgrows them.")
+    else:
+        print("\nFAIL: Memory guard incorrect.")
+
+if __name__ == "__main__":
+    test_memory_guard()
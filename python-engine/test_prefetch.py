@@ -0,0 +1,124 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+from farmsense.data.ingestion import OpenMeteoIngestor
+from farmsense.data.prefetch import WeatherUnavailableError
+
+def synthetic_payload(hours=48):
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    times = [(start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(hours)]
+    return {
+        "current": {"time": times[0], "soil_moisture_3_to_9cm": 0.22, "soil_temperature_6cm": 14.0,
+                    "relative_humidity_2m": 70, "temperature_2m": 18.0, "precipitation": 0.0},
+        "hourly": {"time": times, "soil_moisture_3_to_9cm": [0.23] * hours, "soil_temperature_6cm": [13.5] * hours,
+                   "precipitation": [0.0] * hours, "et0_fao_evapotranspiration": [0.2] * hours,
+                   "temperature_2m": [18.0] * hours, "relative_humidity_2m": [70] * hours},
+    }
+
+class FlakyIngestor(OpenMeteoIngestor):
+    """Open-Meteo stand-in that can be switched offline."""
+    def __init__(self):
+        self.online = True
+        self.calls = 0
+        self.delay = 0.0
+
+    def fetch(self, lat, lon, forecast_days=1):
+        self.calls += 1
+        time.sleep(self.delay)
+        if not self.online:
+            raise ConnectionError("Open-Meteo unreachable")
+        return synthetic_payload(forecast_days * 24)
+
+def test_weather_prefetcher():
+    platform = FarmSensePlatform(state_dir=tempfile.mkdtemp())
+    platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+    ingestor = FlakyIngestor()
+    prefetcher = platform.weather_prefetcher
+    prefetcher.ingestor = ingestor
+    prefetcher.max_adhoc = 8
+
+    print("--- Weather Prefetcher Test ---")
+
+    cell = platform.register_field("north-pivot", 43.6, -116.2)["weather_cell"]
+    first = platform.get_recommendation_with_real_data("irrigation", 43.6, -116.2, field_id="north-pivot")
+    print(f"1. Cold read fetched: {first['base_recommendation']}, weather {first['weather']}")
+
+    # Upstream goes down; the last-known payload is still served, with its age
+    ingestor.online = False
+    key = prefetcher.location_key(*cell)
+    prefetcher.snapshots[key].fetched_at -= timedelta(hours=2)
+    calls = ingestor.calls
+    stale = platform.get_recommendation_with_real_data("irrigation", 43.6, -116.2, field_id="north-pivot")
+    print(f"2. Offline read served: {stale['weather']} (no blocking fetch: {ingestor.calls == calls})")
+
+    # A background pass keeps the old payload when the refresh fails
+    errors = prefetcher.refresh_due()
+    print(f"3. Failed prefetch pass: {list(errors.values())}")
+
+    # Past the irrigation staleness limit the payload is refused; planting tolerates it
+    prefetcher.snapshots[key].fetched_at -= timedelta(hours=2)
+    try:
+        platform.get_recommendation_with_real_data("irrigation", 43.6, -116.2, field_id="north-pivot")
+        refused = False
+    except WeatherUnavailableError as e:
+        refused = True
+        print(f"4. Irrigation refused: {e}")
+    planting = platform.get_recommendation_with_real_data("planting", 43.6, -116.2, field_id="north-pivot")
+    print(f"5. Planting still served: {planting['weather']}")
+
+    # Back online: the prefetch pass refreshes every registered location
+    ingestor.online = True
+    errors = prefetcher.refresh_due()
+    fresh = prefetcher.get(*cell, "irrigation")[1]
+    print(f"6. Back online: {errors}")
+
+    # Ad-hoc coordinates are never prefetched; they live in a bounded LRU
+    for i in range(20):
+        platform.get_recommendation_with_real_data("irrigation", 40.0 + i, -100.0)
+    adhoc_calls = ingestor.calls
+    platform.get_recommendation_with_real_data("irrigation", 59.0, -100.0)
+    reused = ingestor.calls == adhoc_calls
+    adhoc_ok = list(prefetcher.locations) == [key] and len(prefetcher.adhoc) == 8 and prefetcher.refresh_due() == {}
+    # An ad-hoc payload older than the refresh interval is refetched on the next read
+    prefetcher.adhoc[prefetcher.location_key(59.0, -100.0)].fetched_at -= timedelta(hours=1)
+    platform.get_recommendation_with_real_data("irrigation", 59.0, -100.0)
+    refetched = ingestor.calls == adhoc_calls + 1
+    print(f"7. After 20 ad-hoc locations: {len(prefetcher.locations)} prefetched, {len(prefetcher.adhoc)} cached; "
+          f"reused: {reused}, refetched when old: {refetched}")
+
+    # Memory budgets evict ad-hoc payloads only
+    evicted = prefetcher.shrink(0)
+    emptied = not prefetcher.adhoc and key in prefetcher.snapshots
+    print(f"8. Shrink evicted {evicted}; left {prefetcher.memory_usage()}")
+
+    # A new field wakes the background thread; concurrent cold reads share one upstream fetch
+    prefetcher._wake.clear()
+    platform.register_field("south-pivot", 44.1, -115.9)
+    woken = prefetcher._wake.is_set()
+    ingestor.delay, cold_calls = 0.2, ingestor.calls
+    readers = [threading.Thread(target=prefetcher.get, args=(lat, -115.9, "irrigation"))
+               for lat in [44.1] * 4 + [45.5] * 4]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    shared = ingestor.calls - cold_calls
+    print(f"9. Registration woke prefetcher: {woken}; 8 cold reads over 2 locations fetched {shared} times")
+
+    if (stale["weather"]["stale"] and ingestor.calls > calls and refused and planting["weather"]["age_seconds"] >= 4 * 3600
+            and errors == {key: None} and fresh < timedelta(minutes=1) and reused and adhoc_ok and refetched
+            and evicted == 8 and emptied
+            and woken and shared == 2 and not prefetcher._inflight):
+        print("\nPASS: Weather is served stale-while-revalidate within per-domain limits.")
+    else:
+        print("\nFAIL: Prefetcher behaviour incorrect.")
+
+if __name__ == "__main__":
+    test_weather_prefetcher()
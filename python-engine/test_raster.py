@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import zlib
+import struct
+import numpy as np
+from farmsense.core.raster import (evaluate_raster, downsample, render_rgba, build_tile_pyramid,
+                                   NODATA, RASTER_DOMAINS)
+
+def read_png(png):
+    """(width, height, (depth, colour type, interlace), RGBA array, CRCs valid) from an RGBA PNG."""
+    pos, chunks, crc_ok = 8, {}, True
+    while pos < len(png):
+        length, tag = struct.unpack(">I4s", png[pos:pos + 8])
+        data = png[pos + 8:pos + 8 + length]
+        crc_ok &= struct.unpack(">I", png[pos + 8 + length:pos + 12 + length])[0] == zlib.crc32(tag + data) & 0xFFFFFFFF
+        chunks[tag] = data
+        pos += 12 + length
+    width, height, depth, colour, _, _, interlace = struct.unpack(">IIBBBBB", chunks[b"IHDR"])
+    scanlines = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8).reshape(height, 1 + width * 4)
+    return width, height, (depth, colour, interlace), scanlines[:, 1:].reshape(height, width, 4), crc_ok
+
+def test_raster():
+    print("--- Sub-field Raster Test ---")
+
+    rng = np.random.default_rng(7)
+    rows, cols = 600, 500
+    inputs = {
+        "awc": np.clip(np.linspace(20, 95, cols)[None, :] + rng.normal(0, 5, (rows, cols)), 0, 100),
+        "prev_awc": np.full((rows, cols), 60.0),
+        "nitrogen": rng.uniform(60, 140, (rows, cols)),
+        "pest_count": rng.integers(0, 30, (rows, cols)).astype(float),
+        "humidity": rng.uniform(40, 100, (rows, cols)),
+        "precipitation_forecast": 0.0,
+    }
+    yy, xx = np.mgrid[:rows, :cols]
+    mask = (yy - rows / 2) ** 2 + (xx - cols / 2) ** 2 <= (min(rows, cols) / 2) ** 2
+
+    # Band-by-band evaluation gives the same rasters as one pass over the whole grid
+    chunked = evaluate_raster(inputs, mask=mask, chunk_rows=37)
+    whole = evaluate_raster(inputs, mask=mask, chunk_rows=rows)
+    identical = all(np.array_equal(chunked[d]["base"], whole[d]["base"]) and np.array_equal(chunked[d]["emergency"], whole[d]["emergency"])
+                    and chunked[d]["stats"] == whole[d]["stats"] for d in RASTER_DOMAINS)
+    print(f"1. Chunked (37 rows) and unchunked rasters identical: {identical}")
+
+    irrigation = chunked["irrigation"]
+    masked_nodata = bool((irrigation["base"][~mask] == NODATA).all() and not irrigation["emergency"][~mask].any()
+                         and (irrigation["base"][mask] != NODATA).all())
+    stats = irrigation["stats"]
+    counted = stats["nodata_cells"] == int((~mask).sum()) and stats["cells"] == int(mask.sum()) == sum(stats["counts"].values())
+    print(f"2. Masked cells NODATA: {masked_nodata}; stats {stats['cells']} cells, {stats['nodata_cells']} NODATA, dominant {stats['dominant']}")
+
+    # 2x2 downsample keeps the most urgent code; NODATA only where the whole block is NODATA
+    base = np.array([[0, 4, NODATA, NODATA, 1],
+                     [1, 2, NODATA, NODATA, 3],
+                     [NODATA, 2, 3, 3, 0]], dtype=np.int8)
+    emergency = np.zeros(base.shape, dtype=bool)
+    emergency[2, 4] = True
+    small_base, small_emergency = downsample(base, emergency)
+    max_ok = (small_base.tolist() == [[4, NODATA, 3], [2, 3, 0]]
+              and small_emergency.tolist() == [[False, False, False], [False, False, True]])
+    print(f"3. Downsampled {base.shape} -> {small_base.shape}: {small_base.tolist()}")
+
+    # Pyramid: 600x500 -> 300x250 -> 150x125 -> 75x63, z=0 coarsest
+    tiles = build_tile_pyramid(irrigation["base"], irrigation["emergency"], tile_size=128)
+    levels = {}
+    for key, png in tiles.items():
+        z, x, y = map(int, key.split("/"))
+        width, height, _, _, _ = read_png(png)
+        levels.setdefault(z, {"tiles": 0, "width": 0, "height": 0})
+        levels[z]["tiles"] += 1
+        if y == 0:
+            levels[z]["width"] += width
+        if x == 0:
+            levels[z]["height"] += height
+    shapes = {z: (level["height"], level["width"]) for z, level in sorted(levels.items())}
+    pyramid_ok = (shapes == {0: (75, 63), 1: (150, 125), 2: (300, 250), 3: (600, 500)}
+                  and levels[0]["tiles"] == 1 and levels[3]["tiles"] == 5 * 4)
+    # Each coarse pixel is the max over its 2x2 children at the next level
+    coarse, _ = downsample(irrigation["base"], irrigation["emergency"])
+    children = irrigation["base"][:300 * 2, :250 * 2].reshape(300, 2, 250, 2)
+    pyramid_max = np.array_equal(coarse, children.max(axis=(1, 3)))
+    print(f"4. Pyramid level shapes {shapes}, tiles per level { {z: l['tiles'] for z, l in sorted(levels.items())} }")
+
+    # Tiles decode as PNGs with the rendered colours
+    width, height, format_, pixels, crc_ok = read_png(tiles["3/0/0"])
+    expected = render_rgba(irrigation["base"][:128, :128], irrigation["emergency"][:128, :128])
+    png_ok = (tiles["3/0/0"][:8] == b"\x89PNG\r\n\x1a\n" and (width, height) == (128, 128) and format_ == (8, 6, 0)
+              and crc_ok and np.array_equal(pixels, expected) and (pixels[~mask[:128, :128]] == 0).all())
+    print(f"5. PNG: signature, IHDR {width}x{height} RGBA8, CRCs valid and pixels match: {png_ok}")
+
+    if identical and masked_nodata and counted and max_ok and pyramid_ok and pyramid_max and png_ok:
+        print("\nPASS: Rasters are chunk-independent, masked, downsampled by max and tiled as valid PNGs.")
+    else:
+        print("\nFAIL: Raster evaluation or tiling incorrect.")
+
+if __name__ == "__main__":
+    test_raster()
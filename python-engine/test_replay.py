@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import time
+import tempfile
+import numpy as np
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+from farmsense.core.replay import ThresholdReplay
+
+def audit_snapshot(log_dir):
+    return sorted((os.path.join(root, f), os.path.getsize(os.path.join(root, f))) for root, _, files in os.walk(log_dir) for f in files)
+
+def test_replay():
+    platform = FarmSensePlatform(state_dir=tempfile.mkdtemp())
+    platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+
+    print("--- Counterfactual Threshold Replay Test ---")
+
+    # Audited history: irrigation across the AWC range plus one fused batch
+    for awc in range(50, 90, 2):
+        platform.get_recommendation("irrigation", {"awc": awc, "precipitation_forecast": 0})
+    platform.get_all_recommendations({"irrigation": {"awc": 62}, "planting": {"soil_temp": 10}})
+    audit_files = audit_snapshot(platform.audit_logger.log_dir)
+
+    report = platform.replay_thresholds({"critical_awc_60": {"irrigation": {"critical_awc": 60}}})
+    irrigation = report["scenarios"]["critical_awc_60"]["domains"]["irrigation"]
+    labels = report["labels"]
+    now, later = labels.index("NOW"), labels.index("LATER")
+    print(f"1. Irrigation records: {irrigation['records']}, flipped: {irrigation['flipped']}")
+    print(f"2. NOW -> LATER: {irrigation['confusion'][now][later]}, domains replayed: {sorted(report['scenarios']['critical_awc_60']['domains'])}")
+    print(f"3. Audit files unchanged by replay: {audit_files == audit_snapshot(platform.audit_logger.log_dir)}")
+
+    # AWC 60-64 (every 2%) are NOW under 65 and fall to LATER (stable trend) under 60: 60, 62, 64 plus the batch's 62
+    expected_flips = 4
+
+    try:
+        platform.replay_thresholds({"typo": {"irrigation": {"critcal_awc": 60}}})
+        rejected = False
+    except ValueError as e:
+        rejected = True
+        print(f"4. Unknown threshold rejected: {e}")
+
+    # Streaming volume: a million records through bounded chunks
+    rng = np.random.default_rng(1)
+    awc = rng.uniform(0, 100, 1_000_000).round(1)
+    records = (("IRRIGATION", {"awc": float(a), "prev_awc": float(a) + 1, "precipitation_forecast": 0.0}) for a in awc)
+    started = time.perf_counter()
+    bulk = ThresholdReplay({"critical_awc_60": {"irrigation": {"critical_awc": 60}}}, chunk_size=100_000).run(records)
+    elapsed = time.perf_counter() - started
+    bulk_irrigation = bulk["scenarios"]["critical_awc_60"]["domains"]["irrigation"]
+    expected_bulk = int(((awc >= 60) & (awc < 65)).sum())
+    print(f"5. 1,000,000 records in {elapsed:.1f}s: {bulk_irrigation['flipped']} flipped (expected {expected_bulk})")
+
+    if (irrigation["records"] == 21 and irrigation["flipped"] == expected_flips
+            and irrigation["confusion"][now][later] == expected_flips
+            and audit_files == audit_snapshot(platform.audit_logger.log_dir) and rejected
+            and bulk_irrigation["records"] == 1_000_000 and bulk_irrigation["flipped"] == expected_bulk):
+        print("\nPASS: Replay reports decision flips per domain without touching the audit log.")
+    else:
+        print("\nFAIL: Threshold replay incorrect.")
+
+if __name__ == "__main__":
+    test_replay()
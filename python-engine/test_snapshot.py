@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import time
+import shutil
+import tempfile
+import numpy as np
+from datetime import datetime, timedelta
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+from farmsense.data.prefetch import WeatherSnapshot
+
+def entry_count(logger):
+    return sum(1 for _ in logger.iter_entries())
+
+def test_snapshot():
+    state_dir = tempfile.mkdtemp()
+    log_dir = tempfile.mkdtemp()
+    platform = FarmSensePlatform(state_dir=state_dir)
+    platform.audit_logger = AuditLogger(log_dir)
+
+    print("--- Runtime Snapshot Test ---")
+    print(f"1. Cold start: {platform.warm_start}")
+
+    # Runtime state: cached weather, water balance for many fields, active recommendations
+    key = platform.weather_prefetcher.register(43.5, -112.0)
+    payload = {"current": {"time": "2026-06-01T12:00", "soil_moisture_3_to_9cm": 0.21},
+               "hourly": {"time": ["2026-06-01T00:00"], "precipitation": np.zeros(1, dtype=np.float32)}}
+    platform.weather_prefetcher.snapshots[key] = WeatherSnapshot(payload, datetime.now() - timedelta(minutes=5))
+    n = 100000
+    for i in range(n):
+        platform.water_balance.field_index[f"field-{i}"] = i
+    platform.water_balance.depletion_mm = np.linspace(0, 60, n)
+    platform.water_balance.taw_mm = np.full(n, 120.0)
+    platform.water_balance.depletion_rate = np.full(n, 0.25)
+    platform.water_balance.last_hour = np.arange(n, dtype=np.int64)
+    platform.water_balance.pending_irrigation_mm = np.zeros(n)
+    platform.register_field("north-pivot", 43.5, -112.0)
+    inputs = {"awc": 30, "prev_awc": 36, "precipitation_forecast": 0}
+    first = platform.get_recommendation("irrigation", inputs, field_id="north-pivot")
+    platform.get_all_recommendations({"planting": {"soil_temp": 10}}, field_id="south-field")
+    etag, _ = platform.get_conditional_recommendation("planting", {"soil_temp": 12}, field_id=None)
+
+    t0 = time.perf_counter()
+    saved = platform.save_snapshot()
+    save_ms = (time.perf_counter() - t0) * 1000
+    print(f"2. Snapshot {saved['bytes']} bytes written in {save_ms:.1f} ms")
+
+    # Restart: everything is back without refetching or re-evaluating
+    t0 = time.perf_counter()
+    restarted = FarmSensePlatform(state_dir=state_dir)
+    restart_s = time.perf_counter() - t0
+    restarted.audit_logger = AuditLogger(log_dir)
+    print(f"3. Warm start in {restart_s:.2f} s: {restarted.warm_start['components']}")
+
+    before = entry_count(restarted.audit_logger)
+    again = restarted.get_recommendation("irrigation", inputs, field_id="north-pivot")
+    cached = again["audit_log_id"] == first["audit_log_id"] and entry_count(restarted.audit_logger) == before
+    weather, age = restarted.weather_prefetcher.get(43.5, -112.0, "irrigation")
+    series = weather["hourly"]["precipitation"] == [0.0] and saved["array_bytes"]["weather_prefetcher"] > 0
+    balance = restarted.water_balance
+    mapped = isinstance(balance.depletion_mm.base, np.memmap) or isinstance(balance.depletion_mm, np.memmap)
+    same_balance = (np.array_equal(balance.awc(), platform.water_balance.awc()) and balance.field_index["field-99999"] == 99999)
+    balance.pending_irrigation_mm[5] += 10
+    print(f"4. Cached recommendation reused: {cached}; weather age {int(age.total_seconds())} s; "
+          f"hourly series as arrays: {series}; water balance memory-mapped: {mapped}, identical: {same_balance}")
+
+    unchanged = restarted.event_bus.last_state == platform.event_bus.last_state
+    conditional, body = restarted.get_conditional_recommendation("planting", {"soil_temp": 12}, [etag])
+    latest = restarted.fields_in_viewport(43.4, -112.1, 43.6, -111.9)["fields"][0]["recommendations"]
+    print(f"5. Event state restored: {unchanged}; ETag answered with 304: {body is None}; map latest: {sorted(latest)}")
+
+    # A torn or corrupted snapshot is refused and the platform starts cold
+    reloaded_after_write = FarmSensePlatform(state_dir=state_dir).warm_start["restored"]
+    damaged_dir = tempfile.mkdtemp()
+    shutil.copy(os.path.join(state_dir, "runtime.snap"), os.path.join(damaged_dir, "runtime.snap"))
+    with open(os.path.join(damaged_dir, "runtime.snap"), "r+b") as f:
+        f.seek(-100, os.SEEK_END)
+        f.write(b"\xff" * 8)
+    corrupted = FarmSensePlatform(state_dir=damaged_dir).warm_start
+    with open(os.path.join(damaged_dir, "runtime.snap"), "r+b") as f:
+        f.truncate(30)
+    truncated = FarmSensePlatform(state_dir=damaged_dir).warm_start
+    print(f"6. Corrupted: {corrupted}; truncated: {truncated}")
+
+    if (platform.warm_start["restored"] is False and restarted.warm_start["restored"] and restart_s < 5 and cached
+            and weather["current"]["soil_moisture_3_to_9cm"] == 0.21 and series and mapped and same_balance and unchanged
+            and body is None and sorted(latest) == ["irrigation"] and reloaded_after_write
+            and not corrupted["restored"] and "checksum" in corrupted["reason"]
+            and not truncated["restored"] and "truncated" in truncated["reason"]):
+        print("\nPASS: Runtime state is snapshotted atomically and restored memory-mapped on restart.")
+    else:
+        print("\nFAIL: Runtime snapshot incorrect.")
+
+if __name__ == "__main__":
+    test_snapshot()
@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import json
+import tempfile
+from fastapi.testclient import TestClient
+from farmsense.core import server
+from farmsense.core.audit import AuditLogger
+from farmsense.core.streaming import MAX_LINE_BYTES
+
+def ndjson(*records):
+    return b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in records)
+
+def parse(body):
+    return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+def test_batch_stream():
+    server.platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+    client = TestClient(server.app)
+    domains = len(server.platform.engines)
+
+    print("--- Streaming Batch Endpoint Test ---")
+
+    body = ndjson({"field_id": "north", "all_inputs": {"irrigation": {"awc": 30}}},
+                  {"field_id": "south", "all_inputs": {"planting": {"soil_temp": 12}}})
+    plain = client.post("/recommendations/batch/stream", content=body)
+    lines = parse(plain.content)
+    per_field = {f: sum(1 for l in lines if l.get("field_id") == f) for f in ("north", "south")}
+    print(f"1. Plain: {plain.status_code}, {len(lines)} lines, per field {per_field}")
+
+    # gzip output decodes to the same records (the client decodes Content-Encoding: gzip)
+    zipped = client.post("/recommendations/batch/stream?gzip=true", content=body)
+    unzipped = parse(zipped.content)
+    same = [(l["field_id"], l["domain"], l["recommendation"]["base_recommendation"]) for l in unzipped] == \
+           [(l["field_id"], l["domain"], l["recommendation"]["base_recommendation"]) for l in lines]
+    print(f"2. Gzip: encoding {zipped.headers.get('content-encoding')}, matches plain output: {same}")
+
+    # A malformed line reports an error and the stream carries on
+    malformed = parse(client.post("/recommendations/batch/stream",
+                                  content=b"{not json\n" + ndjson({"field_id": "east", "all_inputs": {}})).content)
+    print(f"3. Malformed line: {malformed[0]}, then {len(malformed) - 1} lines")
+
+    # An oversized line ends the body with an error line after the 200 headers, plain and gzipped
+    oversized = ndjson({"field_id": "west", "all_inputs": {}}) + b'{"pad": "' + b"x" * (MAX_LINE_BYTES + 10) + b'"}\n' \
+        + ndjson({"field_id": "never", "all_inputs": {}})
+    cut = client.post("/recommendations/batch/stream", content=oversized)
+    cut_lines = parse(cut.content)
+    cut_zipped = client.post("/recommendations/batch/stream?gzip=true", content=oversized)
+    cut_unzipped = parse(cut_zipped.content)
+    print(f"4. Oversized line: {cut.status_code}, last line {cut_lines[-1]}; gzipped last line {cut_unzipped[-1]}")
+
+    if (plain.status_code == 200 and per_field == {"north": domains, "south": domains} and len(lines) == 2 * domains
+            and zipped.headers.get("content-encoding") == "gzip" and same
+            and "Malformed batch line" in malformed[0]["error"] and len(malformed) == 1 + domains
+            and cut.status_code == 200 and len(cut_lines) == domains + 1 and "exceeds" in cut_lines[-1]["error"]
+            and not any(l.get("field_id") == "never" for l in cut_lines) and cut_unzipped == cut_lines):
+        print("\nPASS: Streaming batch emits plain or gzip NDJSON and ends with an error line on bad input.")
+    else:
+        print("\nFAIL: Streaming batch endpoint incorrect.")
+
+if __name__ == "__main__":
+    test_batch_stream()
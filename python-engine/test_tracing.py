@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+from farmsense.core.tracing import Tracer, current_trace, read_trace_file
+from farmsense.data.ingestion import OpenMeteoIngestor
+
+def synthetic_payload(hours=48):
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    times = [(start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(hours)]
+    return {
+        "current": {"time": times[0], "soil_moisture_3_to_9cm": 0.22, "soil_temperature_6cm": 14.0,
+                    "relative_humidity_2m": 70, "temperature_2m": 18.0, "precipitation": 0.0},
+        "hourly": {"time": times, "soil_moisture_3_to_9cm": [0.23] * hours, "soil_temperature_6cm": [13.5] * hours,
+                   "precipitation": [0.0] * hours, "et0_fao_evapotranspiration": [0.2] * hours,
+                   "temperature_2m": [18.0] * hours, "relative_humidity_2m": [70] * hours},
+    }
+
+class OfflineIngestor(OpenMeteoIngestor):
+    def fetch(self, lat, lon, forecast_days=1):
+        return synthetic_payload(forecast_days * 24)
+
+def span_names(trace):
+    return [event["name"] for event in trace.events]
+
+def test_tracing():
+    platform = FarmSensePlatform(state_dir=tempfile.mkdtemp())
+    platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+    platform.weather_prefetcher.ingestor = OfflineIngestor()
+    trace_path = os.path.join(tempfile.mkdtemp(), "trace.json")
+    tracer = Tracer(path=trace_path)
+    writers = []
+    append = tracer._append
+    tracer._append = lambda lines: writers.append(threading.current_thread().name) or append(lines)
+
+    print("--- Request Tracing Test ---")
+
+    # Untraced calls record nothing
+    platform.get_recommendation("irrigation", {"awc": 30, "prev_awc": 36}, field_id="f1")
+    untraced = current_trace() is None and not os.path.exists(trace_path)
+    print(f"1. Untraced request left no trace: {untraced}")
+
+    with tracer.trace("POST /recommendation") as trace:
+        platform.get_recommendation("irrigation", {"awc": 28, "prev_awc": 36}, field_id="f2")
+    names = span_names(trace)
+    depths = {event["name"]: event["args"]["depth"] for event in trace.events}
+    print(f"2. Spans: {names}")
+    nested = (depths["POST /recommendation"] == 0 and depths["engine.evaluate"] == 1
+              and depths["audit.store_inputs"] == depths["audit.log_recommendation"] + 1)
+    timing = trace.server_timing()
+    print(f"3. Server-Timing: {timing}")
+
+    with tracer.trace("GET /recommendation/real-data") as real:
+        platform.get_recommendation_with_real_data("irrigation", 43.6, -116.2, field_id="north-pivot")
+    real_names = span_names(real)
+    print(f"4. Real-data spans: {real_names}")
+
+    tracer.flush()
+    events = read_trace_file(trace_path)
+    chrome = all(e["ph"] == "X" and isinstance(e["ts"], int) and e["dur"] >= 0 for e in events)
+    ids = {e["args"]["trace_id"] for e in events}
+    print(f"5. Trace file: {len(events)} events from {len(ids)} traces, Chrome format: {chrome}")
+
+    # Past max_bytes the file rotates, keeping `backups` older files
+    rotating = Tracer(path=os.path.join(tempfile.mkdtemp(), "trace.json"), max_bytes=4096, backups=2)
+    for i in range(40):
+        with rotating.trace(f"GET /fields/{i}"):
+            platform.get_recommendation("planting", {"soil_temp": 9 + i % 5}, field_id=f"r{i}")
+    rotating.close()
+    files = sorted(os.listdir(os.path.dirname(rotating.path)))
+    sizes = [os.path.getsize(os.path.join(os.path.dirname(rotating.path), f)) for f in files]
+    rotated_events = [read_trace_file(os.path.join(os.path.dirname(rotating.path), f)) for f in files]
+    rotated = (files == ["trace.json", "trace.json.1", "trace.json.2"] and max(sizes) <= 4096
+               and all(events_ and events_[0]["args"]["depth"] == 0 for events_ in rotated_events))
+    print(f"6. Rotated files {files}, sizes {sizes}, written from: {sorted(set(writers))}")
+
+    forced = Tracer(sample_rate=0.0).should_trace("1")
+    suppressed = Tracer(sample_rate=1.0).should_trace("0")
+    sampled = Tracer(sample_rate=1.0).should_trace(None) and not Tracer(sample_rate=0.0).should_trace(None)
+    print(f"7. Header forces: {forced}, header suppresses: {not suppressed}, sample rate honoured: {sampled}")
+
+    expected = {"engine.parse_inputs", "cache.lookup", "engine.evaluate", "audit.log_recommendation",
+                "audit.store_inputs", "recommendation.to_dict"}
+    if (untraced and expected <= set(names) and nested and timing.startswith("total;dur=")
+            and {"weather.prefetched", "data_validator.irrigation_inputs", "water_balance.heartbeat"} <= set(real_names)
+            and chrome and ids == {trace.trace_id, real.trace_id} and len(events) == len(names) + len(real_names)
+            and rotated and writers == ["trace-writer", "trace-writer"] and tracer.dropped == 0
+            and forced and not suppressed and sampled):
+        print("\nPASS: Sampled requests are traced as nested spans in Chrome trace format.")
+    else:
+        print("\nFAIL: Request tracing incorrect.")
+
+if __name__ == "__main__":
+    test_tracing()
@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import random
+import numpy as np
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.domains.vectorized import evaluate, DECISION_CODES, FLAG_BITS
+
+def random_inputs(rng):
+    return {
+        "awc": rng.uniform(0, 100), "prev_awc": rng.choice([None, rng.uniform(0, 100)]),
+        "projected_awc": rng.choice([None, rng.uniform(0, 100)]), "depletion_rate": rng.choice([None, 0.0, rng.uniform(-1, 1)]),
+        "precipitation_forecast": rng.choice([0, 3, 5, 8, 20]), "equipment_available": rng.random() > 0.1,
+        "compaction_level": rng.uniform(0, 100), "soil_temp": rng.uniform(0, 25),
+        "prev_soil_temp": rng.choice([None, rng.uniform(0, 25)]), "seed_ready": rng.random() > 0.2,
+        "labor_available": rng.random() > 0.1, "nitrogen": rng.uniform(0, 200),
+        "crop_stage": rng.choice(["SPROUT_DEVELOPMENT", "VEGETATIVE", "TUBER_INITIATION", "TUBER_BULKING", "MATURITY"]),
+        "materials_available": rng.random() > 0.1, "pest_count": rng.randint(0, 80),
+        "prev_pest_count": rng.choice([None, rng.randint(0, 80)]), "humidity": rng.uniform(40, 100),
+        "skin_set": rng.random() > 0.5, "queue_size": rng.randint(0, 80), "capacity_available": rng.random() > 0.1,
+        "inventory_level": rng.randint(0, 2000), "storage_temp": rng.uniform(0, 12),
+        "prev_storage_temp": rng.choice([None, rng.uniform(0, 12)]), "orders_pending": rng.randint(0, 20),
+        "trucks_available": rng.random() > 0.1, "plan_finalized": rng.random() > 0.5, "market_data_ready": rng.random() > 0.5,
+    }
+
+def test_vectorized_parity():
+    platform = FarmSensePlatform()
+    rng = random.Random(7)
+    samples = [random_inputs(rng) for _ in range(300)]
+
+    print("--- Vectorized Engine Parity Test ---")
+
+    mismatches = 0
+    for domain, engine in platform.engines.items():
+        columns = {key: np.asarray([s[key] if s[key] is not None else np.nan for s in samples]) for key in samples[0]}
+        decision = evaluate(domain, columns)
+        for i, sample in enumerate(samples):
+            rec = engine.generate_recommendation({k: v for k, v in sample.items() if v is not None})
+            flags = sum(FLAG_BITS[f] for f in rec.context_flags)
+            if (decision.base[i] != DECISION_CODES[rec.base_recommendation]
+                    or bool(decision.emergency[i]) != ("EMERGENCY" in rec.severity_overlays)
+                    or int(decision.flags[i]) != flags):
+                mismatches += 1
+        print(f"   - {domain}: checked {len(samples)} samples")
+
+    print("\n--- Sweep Test ---")
+    result = platform.sweep_decisions("irrigation", {
+        "awc": {"start": 0, "stop": 100, "num": 101},
+        "precipitation_forecast": [0, 10, 30],
+        "awc_trend": [-1, 0, 1],
+    })
+    print(f"   - Grid shape: {result['shape']} ({len(result['base'])} decision codes)")
+
+    # Bad or oversized axes are rejected before any grid is allocated
+    rejected = 0
+    for axis in ({"start": 0, "stop": 1, "num": 10**10}, {"start": 0, "stop": 1, "step": 0}, {"stop": 1, "num": 5},
+                 {"start": 0, "stop": 1, "num": 0}, {"start": 0, "stop": 1e12, "step": 1}, {"start": 5, "stop": 0}):
+        try:
+            platform.sweep_decisions("irrigation", {"awc": axis})
+        except ValueError:
+            rejected += 1
+    print(f"   - Invalid axes rejected: {rejected}/6")
+
+    if mismatches == 0 and len(result["base"]) == 101 * 3 * 3 and rejected == 6:
+        print("\nPASS: Vectorized evaluators match the scalar engines.")
+    else:
+        print(f"\nFAIL: {mismatches} vectorized decisions differ from the scalar engines.")
+
+if __name__ == "__main__":
+    test_vectorized_parity()
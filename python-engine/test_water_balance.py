@@ -0,0 +1,121 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import tempfile
+import threading
+import numpy as np
+from datetime import datetime, timedelta
+from farmsense.core.platform import FarmSensePlatform
+from farmsense.core.audit import AuditLogger
+from farmsense.data.ingestion import OpenMeteoIngestor
+from farmsense.data.water_balance import SoilWaterBalance, hour_index
+
+def payload(start, current_hour, hours=48, moisture=0.2, et0=0.5):
+    times = [(start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(hours)]
+    return {
+        "current": {"time": times[current_hour], "soil_moisture_3_to_9cm": moisture},
+        "hourly": {"time": times, "soil_moisture_3_to_9cm": [moisture] * hours, "precipitation": [0.0] * hours,
+                   "et0_fao_evapotranspiration": [et0] * hours},
+    }
+
+class OfflineIngestor(OpenMeteoIngestor):
+    def fetch(self, lat, lon, forecast_days=1):
+        return payload(datetime.now().replace(minute=0, second=0, microsecond=0), 0)
+
+def close(a, b):
+    return abs(a - b) < 1e-6
+
+def test_water_balance():
+    print("--- Soil Water Balance Test ---")
+
+    # TAW 60 mm at 50% AWC: 30 mm depleted. Kc 1, ET0 1 mm/h, no rain for three hours.
+    balance = SoilWaterBalance()
+    row = balance.register("north", 50, at_hour=0)
+    rows = np.asarray([row])
+    kc = np.asarray([1.0])
+    balance.advance(rows, np.ones((1, 3)), np.zeros((1, 3)), kc, np.ones((1, 3), dtype=bool), np.asarray([3]))
+    # Each hour depletes 1/60 of TAW (1.667 points); the rate is smoothed 0.3 new / 0.7 old
+    rate = 0.0
+    for _ in range(3):
+        rate = 0.3 * (100 / 60) + 0.7 * rate
+    advanced = close(balance.depletion_mm[row], 33) and close(balance.awc(rows)[0], 45) and close(balance.depletion_rate[row], rate)
+    print(f"1. After 3 h: depletion {balance.depletion_mm[row]:.2f} mm, AWC {balance.awc(rows)[0]:.2f}%, rate {balance.depletion_rate[row]:.4f}")
+
+    # Projection integrates the forecast without touching state
+    projected = balance.project(rows, np.full((1, 5), 2.0), np.zeros((1, 5)), kc)[0]
+    untouched = close(balance.depletion_mm[row], 33)
+    print(f"2. Projected AWC after 10 mm ET: {projected:.3f}% (state unchanged: {untouched})")
+
+    # 20 mm irrigation is credited at the next advance; a dry, ET-free hour leaves 13 mm
+    balance.log_irrigation("north", 20)
+    balance.advance(rows, np.zeros((1, 1)), np.zeros((1, 1)), kc, np.ones((1, 1), dtype=bool), np.asarray([4]))
+    rate = 0.7 * rate
+    irrigated = (close(balance.depletion_mm[row], 13) and close(balance.pending_irrigation_mm[row], 0)
+                 and close(balance.depletion_rate[row], rate) and balance.last_hour[row] == 4)
+    # 6 mm of rain refills 10 points of AWC: the rate turns negative
+    balance.advance(rows, np.zeros((1, 1)), np.full((1, 1), 6.0), kc, np.ones((1, 1), dtype=bool), np.asarray([5]))
+    rate = 0.3 * -10 + 0.7 * rate
+    wetting = close(balance.depletion_mm[row], 7) and close(balance.depletion_rate[row], rate)
+    # Rain beyond field capacity saturates rather than going negative
+    balance.advance(rows, np.zeros((1, 1)), np.full((1, 1), 50.0), kc, np.ones((1, 1), dtype=bool), np.asarray([6]))
+    saturated = close(balance.depletion_mm[row], 0) and close(balance.awc(rows)[0], 100)
+    print(f"3. Irrigation credited: {irrigated}; rain refills: {wetting} (rate {balance.depletion_rate[row]:.4f}); saturates: {saturated}")
+
+    # Heartbeat: registers from the measured reading (0.2 / 0.4 = 50%), projects 24 h of
+    # Kc 0.8 x ET0 0.5 = 9.6 mm, then integrates only the two new hours on the next beat
+    start = datetime(2026, 6, 1)
+    first = SoilWaterBalance().heartbeat({"south": payload(start, 10)})["south"]
+    beats = SoilWaterBalance()
+    beats.heartbeat({"south": payload(start, 10)})
+    second = beats.heartbeat({"south": payload(start, 12)})["south"]
+    heartbeat_ok = (first["modeled_awc"] == 50.0 and first["projected_awc"] == 34.0
+                    and second["modeled_awc"] == round(100 * (1 - 30.8 / 60), 2)
+                    and beats.last_hour[0] == hour_index(["2026-06-01T12:00"])[0])
+    print(f"4. Heartbeat: first {first}, two hours later {second}")
+
+    # Rows grow geometrically; snapshots carry only live rows
+    growing = SoilWaterBalance()
+    capacities = set()
+    for i in range(1000):
+        growing.register(f"field-{i}", i % 100, at_hour=i)
+        capacities.add(growing.depletion_mm.size)
+    arrays, meta = growing.snapshot_state()
+    grown = (sorted(capacities) == [64, 128, 256, 512, 1024] and len(arrays["last_hour"]) == 1000
+             and growing.last_hour[999] == 999 and len(growing.awc()) == 1000 and len(meta["field_ids"]) == 1000)
+    print(f"5. Capacities while registering 1000 fields: {sorted(capacities)}")
+
+    # Concurrent first heartbeats each get their own row
+    shared = SoilWaterBalance()
+    def beat(worker):
+        for i in range(50):
+            shared.heartbeat({f"w{worker}-{i}": payload(start, 10)})
+    threads = [threading.Thread(target=beat, args=(w,)) for w in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    concurrent = (len(shared) == 400 and sorted(shared.field_index.values()) == list(range(400))
+                  and bool((shared.awc() == 50.0).all()))
+    print(f"6. 8 threads x 50 new fields: {len(shared)} rows, distinct and intact: {concurrent}")
+
+    # Only registered fields keep state on the platform; ad-hoc locations are stateless
+    platform = FarmSensePlatform(state_dir=tempfile.mkdtemp())
+    platform.audit_logger = AuditLogger(tempfile.mkdtemp())
+    platform.weather_prefetcher.ingestor = OfflineIngestor()
+    for i in range(20):
+        platform.get_recommendation_with_real_data("irrigation", 43.0 + i / 10, -116.0)
+    platform.get_recommendation_with_real_data("irrigation", 43.5, -116.0, field_id="unregistered")
+    adhoc_rows = len(platform.water_balance)
+    platform.register_field("north-pivot", 43.6, -116.2)
+    platform.get_recommendation_with_real_data("irrigation", 43.6, -116.2, field_id="north-pivot")
+    print(f"7. Rows after 21 ad-hoc requests: {adhoc_rows}; after a registered field: {list(platform.water_balance.field_index)}")
+
+    if (advanced and close(projected, 100 * (1 - 43 / 60)) and untouched and irrigated and wetting and saturated
+            and heartbeat_ok and grown and concurrent and adhoc_rows == 0 and list(platform.water_balance.field_index) == ["north-pivot"]):
+        print("\nPASS: Water balance matches hand-computed depletion, projection, irrigation and rates.")
+    else:
+        print("\nFAIL: Water balance incorrect.")
+
+if __name__ == "__main__":
+    test_water_balance()
@@ -1,3 +1,5 @@
+import hashlib
+import json
 from typing import Dict, Any
 
 POTATO_THRESHOLDS = {
@@ -14,6 +16,46 @@ POTATO_THRESHOLDS = {
         "soon_awc": 75,
         "weather_delay_precip": 5.0  # mm
     },
+    "water_balance": {
+        "root_zone_taw_mm": 60,  # Total available water in the potato root zone
+        "projection_hours": 24,
+        "crop_coefficients": {  # FAO-56 Kc
+            "SPROUT_DEVELOPMENT": 0.5,
+            "VEGETATIVE": 0.8,
+            "TUBER_INITIATION": 1.1,
+            "TUBER_BULKING": 1.15,
+            "MATURITY": 0.75
+        }
+    },
+    "margins": {
+        "trend_interval_hours": 1,  # Time between a reading and its prev_* value
+        # Largest plausible hourly change for inputs without a trend; inputs not listed never skip
+        "max_rate_per_hour": {
+            "awc": 2,
+            "projected_awc": 2,
+            "precipitation_forecast": 3,  # mm per hour of forecast revision
+            "humidity": 15,
+            "soil_temp": 1,
+            "storage_temp": 0.5,
+            "nitrogen": 5,
+            "pest_count": 5,
+            "compaction_level": 1,
+            "queue_size": 10,
+            "inventory_level": 100,
+            "orders_pending": 3
+        }
+    },
+    "gdd": {
+        "base_temp_c": 7,  # Potato base temperature
+        "upper_temp_c": 30,  # No additional development above this
+        "stage_start_gdd": {  # Accumulated GDD since planting at which each stage begins
+            "SPROUT_DEVELOPMENT": 0,
+            "VEGETATIVE": 250,
+            "TUBER_INITIATION": 450,
+            "TUBER_BULKING": 700,
+            "MATURITY": 1350
+        }
+    },
     "planting": {
         "min_soil_temp": 7,  # Celsius
         "max_soil_temp": 15,
@@ -43,3 +85,26 @@ POTATO_THRESHOLDS = {
         "max_temp": 8
     }
 }
+
+def thresholds_version(thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> str:
+    """Content hash of the threshold table; changes whenever any threshold is edited."""
+    canonical = json.dumps(thresholds, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+def with_overrides(overrides: Dict[str, Any], base: Dict[str, Any] = POTATO_THRESHOLDS) -> Dict[str, Any]:
+    """
+    A copy of a threshold table with nested overrides applied, e.g.
+    {"irrigation": {"critical_awc": 60}}. Unknown keys are rejected so a typo cannot
+    silently leave a threshold unchanged.
+    """
+    merged = dict(base)
+    for key, value in overrides.items():
+        if key not in base:
+            raise ValueError(f"Unknown threshold: {key}")
+        if isinstance(base[key], dict):
+            if not isinstance(value, dict):
+                raise ValueError(f"Threshold group '{key}' must be overridden with an object.")
+            merged[key] = with_overrides(value, base[key])
+        else:
+            merged[key] = value
+    return merged
@@ -0,0 +1,201 @@
+"""
+Opt-in request tracing with nested timed spans.
+
+A request is traced when the tracer samples it or the client forces it with the
+X-FarmSense-Trace header ("1" to force, "0" to suppress). The active trace lives in a
+context variable, so `span()` blocks and `@traced` functions anywhere in the platform
+attach to it, including code running in the server's thread pool, and cost one context
+variable lookup when nothing is being traced.
+
+Finished traces are handed to a writer thread, which appends them to a local file in the
+Chrome trace-event JSON array format (complete "X" events, microseconds) that
+chrome://tracing and Perfetto open directly; the format allows the array to be left
+unterminated, so the file is append-only. Past `max_bytes` the file is rotated like a log
+(trace.json.1, .2, ...). `Trace.server_timing()` summarises the spans for a Server-Timing
+response header.
+
+A trace ends when its root block exits. For a streamed response that is when the headers
+are sent, so the root span and Server-Timing cover time to first byte only, and spans from
+producing the body are not recorded.
+"""
+import os
+import re
+import json
+import queue
+import time
+import uuid
+import random
+import threading
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+TRACE_HEADER = "X-FarmSense-Trace"
+
+class Trace:
+    """Spans recorded for one request, as Chrome trace events."""
+    __slots__ = ("trace_id", "name", "events", "_lock")
+
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start_us: int, duration_us: float, depth: int, args: Dict[str, Any]):
+        event = {
+            "name": name, "cat": "farmsense", "ph": "X", "ts": start_us, "dur": round(duration_us, 1),
+            "pid": os.getpid(), "tid": threading.get_ident(),
+            "args": {"trace_id": self.trace_id, "depth": depth, **args},
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def server_timing(self) -> str:
+        """Total time per span name (repeated spans summed), root first as "total"."""
+        totals: Dict[str, float] = {}
+        for event in self.events:
+            name = "total" if event["args"]["depth"] == 0 else re.sub(r"[^A-Za-z0-9_.-]", "_", event["name"])
+            totals[name] = totals.get(name, 0.0) + event["dur"]
+        ordered = sorted(totals.items(), key=lambda item: (item[0] != "total", -item[1]))
+        return ", ".join(f"{name};dur={duration / 1000:.2f}" for name, duration in ordered)
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("farmsense_trace", default=None)
+_depth: ContextVar[int] = ContextVar("farmsense_trace_depth", default=0)
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    """Time a block as a child of the current span; does nothing outside a trace."""
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    start_us = time.time_ns() // 1000
+    started = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        _depth.reset(token)
+        trace.add(name, start_us, (time.perf_counter_ns() - started) / 1000, depth, args)
+
+def traced(name: str) -> Callable:
+    """Decorator form of span() for functions and methods."""
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _trace.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class Tracer:
+    """
+    Samples requests, runs them under a Trace and appends finished traces to `path` from a
+    background thread. Requests never wait on the file: when `queue_size` traces are already
+    waiting, further ones are dropped and counted in `dropped`.
+    """
+    def __init__(self, path: str = "/home/ubuntu/farmsense/traces/trace.json", sample_rate: float = 0.0,
+                 max_bytes: int = 64 * 1024 * 1024, backups: int = 3, queue_size: int = 1024):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1.")
+        if max_bytes < 1 or backups < 0:
+            raise ValueError("max_bytes must be positive and backups non-negative.")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def should_trace(self, header: Optional[str] = None) -> bool:
+        if header is not None and header.strip().lower() in ("1", "true", "on"):
+            return True
+        if header is not None and header.strip().lower() in ("0", "false", "off"):
+            return False
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextmanager
+    def trace(self, name: str, **args: Any) -> Iterator[Trace]:
+        """Run a block as the root span of a new trace, written out when it finishes."""
+        trace = Trace(name)
+        trace_token, depth_token = _trace.set(trace), _depth.set(0)
+        try:
+            with span(name, **args):
+                yield trace
+        finally:
+            _trace.reset(trace_token)
+            _depth.reset(depth_token)
+            self.write(trace)
+
+    def write(self, trace: Trace):
+        """Queue a finished trace for the writer thread."""
+        events = sorted(trace.events, key=lambda e: e["ts"])
+        lines = "".join(json.dumps(event, separators=(",", ":")) + ",\n" for event in events)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(lines)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self):
+        """Block until every queued trace is on disk."""
+        self._queue.join()
+
+    def close(self, timeout: Optional[float] = None):
+        """Write out queued traces and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            lines = self._queue.get()
+            try:
+                if lines is None:
+                    return
+                self._append(lines)
+            except OSError:
+                with self._lock:
+                    self.dropped += 1
+            finally:
+                self._queue.task_done()
+
+    def _append(self, lines: str):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size and size + len(lines) > self.max_bytes:
+            self._rotate()
+            size = 0
+        with open(self.path, "a") as f:
+            f.write(("[\n" if size == 0 else "") + lines)
+
+    def _rotate(self):
+        """trace.json -> trace.json.1 -> ... -> trace.json.<backups>; the oldest is deleted."""
+        if self.backups == 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+def read_trace_file(path: str) -> List[Dict[str, Any]]:
+    """Events from a trace file (closing the array the writer leaves open)."""
+    with open(path, "r") as f:
+        text = f.read().rstrip().rstrip(",")
+    return json.loads(text + "]") if text else []
@@ -0,0 +1,291 @@
+"""
+Array-form counterparts of the deterministic domain engines.
+
+Each evaluator mirrors the branch order of its engine in potato_logic.py but operates on
+NumPy arrays (any broadcastable shapes), so a grid, a raster or a time series of inputs is
+decided in a handful of array operations. No Recommendation objects are built and nothing
+is written to the audit log.
+"""
+import numpy as np
+from typing import Dict, Any, Mapping, Optional, Callable
+from farmsense.core.engine import BaseRecommendation, ContextFlag
+from farmsense.data.thresholds import POTATO_THRESHOLDS
+
+# Decision codes rise with urgency so heatmaps and max-pooling read naturally.
+DECISION_ORDER = [
+    BaseRecommendation.WAIT,
+    BaseRecommendation.MONITOR,
+    BaseRecommendation.LATER,
+    BaseRecommendation.SOON,
+    BaseRecommendation.NOW,
+]
+DECISION_CODES = {rec.value: code for code, rec in enumerate(DECISION_ORDER)}
+DECISION_LABELS = {code: rec.value for code, rec in enumerate(DECISION_ORDER)}
+WAIT, MONITOR, LATER, SOON, NOW = range(len(DECISION_ORDER))
+
+# One bit per context flag, in enum order.
+FLAG_BITS = {flag.value: 1 << i for i, flag in enumerate(ContextFlag)}
+
+class VectorDecision:
+    """Decision arrays for one domain: base codes, EMERGENCY mask and context-flag bitmask."""
+    __slots__ = ("domain", "base", "emergency", "flags")
+
+    def __init__(self, domain: str, base: np.ndarray, emergency: np.ndarray, flags: np.ndarray):
+        self.domain = domain
+        self.base = base
+        self.emergency = emergency
+        self.flags = flags
+
+    @property
+    def shape(self):
+        return self.base.shape
+
+    def labels(self) -> np.ndarray:
+        return np.asarray([rec.value for rec in DECISION_ORDER])[self.base]
+
+def decode_flags(bits: int) -> list:
+    return [name for name, bit in FLAG_BITS.items() if bits & bit]
+
+def _col(inputs: Mapping[str, Any], key: str, default: Any, dtype=float) -> np.ndarray:
+    value = inputs.get(key)
+    if value is None:
+        value = default
+    return np.asarray(value, dtype=dtype)
+
+def _flag_col(inputs: Mapping[str, Any], key: str) -> np.ndarray:
+    """Availability flags default to True, matching inputs.get(key, True) in the engines."""
+    return _col(inputs, key, True, dtype=bool)
+
+def _trend(inputs: Mapping[str, Any], current: np.ndarray, key: str, prev_key: str, rate_of_change: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Vectorized DeterministicEngine.calculate_trend: -1 DECREASING, 0 STABLE, 1 INCREASING.
+    An explicit "<key>_trend" array takes precedence so sweeps can use trend as an axis.
+    """
+    explicit = inputs.get(f"{key}_trend")
+    if explicit is not None:
+        return np.sign(np.asarray(explicit, dtype=float)).astype(np.int8)
+    previous = inputs.get(prev_key)
+    if previous is None:
+        trend = np.zeros(current.shape, dtype=np.int8)
+    else:
+        previous = np.asarray(previous, dtype=float)
+        trend = np.where(np.isnan(previous), 0, np.sign(current - previous)).astype(np.int8)
+    if rate_of_change is not None:
+        rate_sign = np.sign(np.nan_to_num(rate_of_change)).astype(np.int8)
+        trend = np.where(rate_sign != 0, rate_sign, trend).astype(np.int8)
+    return trend
+
+def _decide(domain: str, conditions: list, choices: list, emergency=None, flags=None, arrays=()) -> VectorDecision:
+    shape = np.broadcast_shapes(*[np.shape(a) for a in arrays]) if arrays else ()
+    base = np.select([np.broadcast_to(c, shape) for c in conditions], choices, default=WAIT).astype(np.int8)
+    if emergency is None:
+        emergency = np.zeros(shape, dtype=bool)
+    if flags is None:
+        flags = np.zeros(shape, dtype=np.uint8)
+    return VectorDecision(
+        domain,
+        base,
+        np.broadcast_to(emergency, shape).copy(),
+        np.broadcast_to(flags, shape).astype(np.uint8),
+    )
+
+def _flag(mask: np.ndarray, flag: ContextFlag) -> np.ndarray:
+    return np.where(mask, FLAG_BITS[flag.value], 0).astype(np.uint8)
+
+def evaluate_planning(inputs: Mapping[str, Any], thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> VectorDecision:
+    plan_finalized = _col(inputs, "plan_finalized", False, dtype=bool)
+    market_data_ready = _col(inputs, "market_data_ready", False, dtype=bool)
+    no_labor = ~_flag_col(inputs, "labor_available")
+
+    return _decide(
+        "PLANNING",
+        [no_labor, ~plan_finalized & market_data_ready],
+        [WAIT, NOW],
+        flags=_flag(no_labor, ContextFlag.LABOR_CONSTRAINT),
+        arrays=(plan_finalized, market_data_ready, no_labor),
+    )
+
+def evaluate_field_prep(inputs: Mapping[str, Any], thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> VectorDecision:
+    awc = _col(inputs, "awc", 100)
+    compaction = _col(inputs, "compaction_level", 0)
+    precip_forecast = _col(inputs, "precipitation_forecast", 0)
+    no_equipment = ~_flag_col(inputs, "equipment_available")
+
+    weather_delay = ~no_equipment & (precip_forecast > 5)
+    return _decide(
+        "FIELD_PREP",
+        [no_equipment, weather_delay, (awc < 30) & (compaction > 70)],
+        [WAIT, WAIT, NOW],
+        flags=_flag(no_equipment, ContextFlag.EQUIPMENT_CONSTRAINT) | _flag(weather_delay, ContextFlag.WEATHER_DELAY),
+        arrays=(awc, compaction, precip_forecast, no_equipment),
+    )
+
+def evaluate_planting(inputs: Mapping[str, Any], thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> VectorDecision:
+    soil_temp = _col(inputs, "soil_temp", 0)
+    seed_ready = _col(inputs, "seed_ready", True, dtype=bool)
+    no_labor = ~_flag_col(inputs, "labor_available")
+    thresh = thresholds["planting"]
+
+    trend = _trend(inputs, soil_temp, "soil_temp", "prev_soil_temp")
+    in_window = seed_ready & (thresh["min_soil_temp"] <= soil_temp) & (soil_temp <= thresh["max_soil_temp"])
+    too_cold = seed_ready & (soil_temp < thresh["min_soil_temp"])
+    return _decide(
+        "PLANTING",
+        [no_labor, in_window, too_cold & (trend > 0), too_cold],
+        [WAIT, NOW, SOON, MONITOR],
+        flags=_flag(no_labor, ContextFlag.LABOR_CONSTRAINT),
+        arrays=(soil_temp, seed_ready, no_labor, trend),
+    )
+
+def evaluate_irrigation(inputs: Mapping[str, Any], thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> VectorDecision:
+    awc = _col(inputs, "awc", 100)
+    precip_forecast = _col(inputs, "precipitation_forecast", 0)
+    no_equipment = ~_flag_col(inputs, "equipment_available")
+    thresh = thresholds["irrigation"]
+
+    # Water-balance outputs are optional; NaN (absent) never crosses a threshold.
+    projected_awc = _col(inputs, "projected_awc", np.nan)
+    depletion_rate = inputs.get("depletion_rate")
+    rate_of_change = None if depletion_rate is None else -np.asarray(depletion_rate, dtype=float)
+
+    trend = _trend(inputs, awc, "awc", "prev_awc", rate_of_change)
+    critical = ~no_equipment & (awc < thresh["critical_awc"])
+    weather_delay = critical & (precip_forecast > thresh["weather_delay_precip"])
+    irrigate = critical & ~weather_delay
+    projected_critical = projected_awc < thresh["critical_awc"]
+    approaching = ~no_equipment & ~critical & (awc < thresh["soon_awc"])
+    return _decide(
+        "IRRIGATION",
+        [no_equipment, weather_delay, irrigate, approaching & ((trend < 0) | projected_critical), approaching, ~no_equipment & ~critical & projected_critical],
+        [WAIT, WAIT, NOW, SOON, LATER, SOON],
+        emergency=irrigate & (awc < thresh["emergency_awc"]),
+        flags=_flag(no_equipment, ContextFlag.EQUIPMENT_CONSTRAINT) | _flag(weather_delay, ContextFlag.WEATHER_DELAY),
+        arrays=(awc, precip_forecast, no_equipment, trend, projected_awc),
+    )
+
+def nitrogen_targets(stages: Any, thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> np.ndarray:
+    """Map an array of crop-stage names onto nitrogen targets (unknown stages use 100)."""
+    stages = np.asarray(stages)
+    targets = thresholds["nutrient"]["nitrogen_targets"]
+    unique, inverse = np.unique(stages, return_inverse=True)
+    lookup = np.asarray([targets.get(str(stage), 100) for stage in unique], dtype=float)
+    return lookup[inverse].reshape(stages.shape)
+
+def evaluate_nutrient(inputs: Mapping[str, Any], thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> VectorDecision:
+    n_level = _col(inputs, "nitrogen", 100)
+    stage = inputs.get("crop_stage")
+    target = nitrogen_targets("VEGETATIVE" if stage is None else stage, thresholds)
+    no_materials = ~_flag_col(inputs, "materials_available")
+
+    return _decide(
+        "NUTRIENT",
+        [no_materials, n_level < target, n_level < target * 1.1],
+        [WAIT, NOW, SOON],
+        flags=_flag(no_materials, ContextFlag.MATERIALS_CONSTRAINT),
+        arrays=(n_level, target, no_materials),
+    )
+
+def evaluate_pest_weed(inputs: Mapping[str, Any], thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> VectorDecision:
+    pest_count = _col(inputs, "pest_count", 0)
+    humidity = _col(inputs, "humidity", 0)
+    no_equipment = ~_flag_col(inputs, "equipment_available")
+    thresh = thresholds["pest_weed"]
+
+    trend = _trend(inputs, pest_count, "pest_count", "prev_pest_count")
+    treat = ~no_equipment & ((pest_count > thresh["pest_count_threshold"]) | (humidity > thresh["humidity_threshold"]))
+    return _decide(
+        "PEST_WEED",
+        [no_equipment, treat, trend > 0],
+        [WAIT, NOW, MONITOR],
+        emergency=treat & (pest_count > thresh["emergency_pest_count"]),
+        flags=_flag(no_equipment, ContextFlag.EQUIPMENT_CONSTRAINT),
+        arrays=(pest_count, humidity, no_equipment, trend),
+    )
+
+def evaluate_harvest(inputs: Mapping[str, Any], thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> VectorDecision:
+    skin_set = _col(inputs, "skin_set", False, dtype=bool)
+    soil_temp = _col(inputs, "soil_temp", 0)
+    no_labor = ~_flag_col(inputs, "labor_available")
+    no_equipment = ~_flag_col(inputs, "equipment_available")
+    thresh = thresholds["harvest"]
+
+    in_window = skin_set & (thresh["min_soil_temp"] <= soil_temp) & (soil_temp <= thresh["max_soil_temp"])
+    return _decide(
+        "HARVEST",
+        [no_labor, no_equipment, in_window, skin_set],
+        [WAIT, WAIT, NOW, MONITOR],
+        flags=_flag(no_labor, ContextFlag.LABOR_CONSTRAINT) | _flag(~no_labor & no_equipment, ContextFlag.EQUIPMENT_CONSTRAINT),
+        arrays=(skin_set, soil_temp, no_labor, no_equipment),
+    )
+
+def evaluate_processing(inputs: Mapping[str, Any], thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> VectorDecision:
+    queue = _col(inputs, "queue_size", 0)
+    no_capacity = ~_flag_col(inputs, "capacity_available")
+
+    return _decide(
+        "PROCESSING",
+        [no_capacity, queue > 50, queue > 20],
+        [WAIT, NOW, SOON],
+        flags=_flag(no_capacity, ContextFlag.CAPACITY_CONSTRAINT),
+        arrays=(queue, no_capacity),
+    )
+
+def evaluate_packaging(inputs: Mapping[str, Any], thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> VectorDecision:
+    inventory = _col(inputs, "inventory_level", 0)
+    no_materials = ~_flag_col(inputs, "materials_available")
+
+    return _decide(
+        "PACKAGING",
+        [no_materials, inventory > 1000],
+        [WAIT, NOW],
+        flags=_flag(no_materials, ContextFlag.MATERIALS_CONSTRAINT),
+        arrays=(inventory, no_materials),
+    )
+
+def evaluate_warehousing(inputs: Mapping[str, Any], thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> VectorDecision:
+    temp = _col(inputs, "storage_temp", 4)
+    no_capacity = ~_flag_col(inputs, "capacity_available")
+    thresh = thresholds["warehousing"]
+
+    trend = _trend(inputs, temp, "storage_temp", "prev_storage_temp")
+    too_warm = ~no_capacity & (temp > thresh["max_temp"])
+    return _decide(
+        "WAREHOUSING",
+        [no_capacity, too_warm, trend > 0],
+        [WAIT, NOW, MONITOR],
+        emergency=too_warm,
+        flags=_flag(no_capacity, ContextFlag.CAPACITY_CONSTRAINT),
+        arrays=(temp, no_capacity, trend),
+    )
+
+def evaluate_logistics(inputs: Mapping[str, Any], thresholds: Dict[str, Any] = POTATO_THRESHOLDS) -> VectorDecision:
+    orders = _col(inputs, "orders_pending", 0)
+    no_trucks = ~_flag_col(inputs, "trucks_available")
+
+    return _decide(
+        "LOGISTICS",
+        [no_trucks, orders > 10, orders > 5],
+        [WAIT, NOW, SOON],
+        flags=_flag(no_trucks, ContextFlag.EQUIPMENT_CONSTRAINT),
+        arrays=(orders, no_trucks),
+    )
+
+VECTOR_EVALUATORS: Dict[str, Callable[..., VectorDecision]] = {
+    "planning": evaluate_planning,
+    "field_prep": evaluate_field_prep,
+    "planting": evaluate_planting,
+    "irrigation": evaluate_irrigation,
+    "nutrient": evaluate_nutrient,
+    "pest_weed": evaluate_pest_weed,
+    "harvest": evaluate_harvest,
+    "processing": evaluate_processing,
+    "packaging": evaluate_packaging,
+    "warehousing": evaluate_warehousing,
+    "logistics": evaluate_logistics,
+}
+
+def evaluate(domain: str, inputs: Mapping[str, Any], thresholds: Optional[Dict[str, Any]] = None) -> VectorDecision:
+    domain = domain.lower()
+    if domain not in VECTOR_EVALUATORS:
+        raise ValueError(f"Unknown domain: {domain}")
+    return VECTOR_EVALUATORS[domain](inputs, thresholds or POTATO_THRESHOLDS)
@@ -0,0 +1,196 @@
+import threading
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from farmsense.data.thresholds import POTATO_THRESHOLDS
+from farmsense.data.ingestion import DataValidator
+from farmsense.core.memory import container_bytes
+
+def hour_index(times: Sequence[str]) -> np.ndarray:
+    """ISO hour strings (as returned by Open-Meteo) to integer hours since the epoch."""
+    return np.asarray(times, dtype="datetime64[h]").astype(np.int64)
+
+class SoilWaterBalance:
+    """
+    Root-zone soil water balance (FAO-56 style) for every registered field at once.
+
+    State is one row per field: depletion (mm) against total available water, the last
+    integrated hour and a smoothed depletion rate. Each heartbeat integrates only the hours
+    since that field's previous heartbeat, vectorized across fields, so nothing is ever
+    recomputed from the start of the season. Rows live in arrays with spare capacity that
+    double when full. Locations that should not keep state are modeled with `estimate`.
+    Request threads share one instance, so every change to the rows holds `_lock`.
+    """
+    # Weight of the newest hour in the smoothed depletion rate.
+    RATE_SMOOTHING = 0.3
+    STATE_ARRAYS = ("depletion_mm", "taw_mm", "depletion_rate", "last_hour", "pending_irrigation_mm")
+
+    def __init__(self, thresholds: Dict[str, Any] = POTATO_THRESHOLDS):
+        self.params = thresholds["water_balance"]
+        self.field_index: Dict[str, int] = {}
+        self.depletion_mm = np.zeros(0)
+        self.taw_mm = np.zeros(0)
+        self.depletion_rate = np.zeros(0)  # AWC percentage points per hour, positive while drying
+        self.last_hour = np.zeros(0, dtype=np.int64)
+        self.pending_irrigation_mm = np.zeros(0)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.field_index)
+
+    def _grow(self, size: int):
+        if size > self.depletion_mm.size:
+            capacity = max(size, 2 * self.depletion_mm.size, 64)
+            for name in self.STATE_ARRAYS:
+                setattr(self, name, np.resize(getattr(self, name), capacity))
+
+    def register(self, field_id: str, awc: float, at_hour: int, taw_mm: Optional[float] = None) -> int:
+        """Start tracking a field from a measured AWC (%) at the given hour."""
+        with self._lock:
+            if field_id in self.field_index:
+                return self.field_index[field_id]
+            taw = float(taw_mm or self.params["root_zone_taw_mm"])
+            row = len(self.field_index)
+            self._grow(row + 1)
+            self.field_index[field_id] = row
+            self.depletion_mm[row] = taw * (1 - min(100, max(0, awc)) / 100)
+            self.taw_mm[row] = taw
+            self.depletion_rate[row] = 0.0
+            self.last_hour[row] = at_hour
+            self.pending_irrigation_mm[row] = 0.0
+            return row
+
+    def snapshot_state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Copies of the live rows, so a heartbeat after the lock is released cannot tear them."""
+        with self._lock:
+            arrays = {name: getattr(self, name)[:len(self.field_index)].copy() for name in self.STATE_ARRAYS}
+            return arrays, {"field_ids": sorted(self.field_index, key=self.field_index.get)}
+
+    def memory_usage(self) -> Dict[str, int]:
+        with self._lock:
+            arrays = sum(getattr(self, name).nbytes for name in self.STATE_ARRAYS)
+            return {"entries": len(self.field_index), "bytes": arrays + container_bytes(self.field_index)}
+
+    def restore_state(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        with self._lock:
+            self.field_index = {field_id: row for row, field_id in enumerate(meta["field_ids"])}
+            for name in self.STATE_ARRAYS:
+                setattr(self, name, arrays[name])
+
+    def rows(self, field_ids: Sequence[str]) -> np.ndarray:
+        return np.asarray([self.field_index[f] for f in field_ids], dtype=np.int64)
+
+    def awc(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        rows = slice(0, len(self.field_index)) if rows is None else rows
+        return 100 * (1 - self.depletion_mm[rows] / self.taw_mm[rows])
+
+    def log_irrigation(self, field_id: str, depth_mm: float):
+        """Record an applied irrigation; it refills the root zone at the next heartbeat."""
+        with self._lock:
+            if field_id not in self.field_index:
+                raise ValueError(f"Field {field_id} is not registered with the water balance.")
+            self.pending_irrigation_mm[self.field_index[field_id]] += depth_mm
+
+    def crop_coefficients(self, stages: Sequence[str]) -> np.ndarray:
+        kc = self.params["crop_coefficients"]
+        return np.asarray([kc.get(stage, kc["VEGETATIVE"]) for stage in stages], dtype=float)
+
+    def advance(self, rows: np.ndarray, et0_mm: np.ndarray, precip_mm: np.ndarray, kc: np.ndarray, mask: np.ndarray, until_hour: np.ndarray):
+        """
+        Integrate a [fields, hours] block of observed ET0 and precipitation. Hours are sequential
+        (the root zone saturates and empties), fields are vectorized. Masked-out cells are
+        padding for fields with fewer new hours and leave state untouched.
+        """
+        taw = self.taw_mm[rows]
+        depletion = np.clip(self.depletion_mm[rows] - self.pending_irrigation_mm[rows], 0, taw)
+        rate = self.depletion_rate[rows]
+        for h in range(et0_mm.shape[1]):
+            active = mask[:, h]
+            updated = np.clip(depletion + kc * et0_mm[:, h] - precip_mm[:, h], 0, taw)
+            observed_rate = (updated - depletion) / taw * 100
+            depletion = np.where(active, updated, depletion)
+            rate = np.where(active, self.RATE_SMOOTHING * observed_rate + (1 - self.RATE_SMOOTHING) * rate, rate)
+
+        self.depletion_mm[rows] = depletion
+        self.depletion_rate[rows] = rate
+        self.pending_irrigation_mm[rows] = 0.0
+        self.last_hour[rows] = np.maximum(self.last_hour[rows], until_hour)
+
+    def project(self, rows: np.ndarray, et0_mm: np.ndarray, precip_mm: np.ndarray, kc: np.ndarray) -> np.ndarray:
+        """AWC (%) at the end of a [fields, hours] forecast block, without changing state."""
+        taw = self.taw_mm[rows]
+        depletion = self.depletion_mm[rows].copy()
+        for h in range(et0_mm.shape[1]):
+            depletion = np.clip(depletion + kc * et0_mm[:, h] - precip_mm[:, h], 0, taw)
+        return 100 * (1 - depletion / taw)
+
+    def estimate(self, payloads: Dict[str, Dict[str, Any]], crop_stages: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, float]]:
+        """heartbeat() for locations without state: modeled from the current reading, nothing kept."""
+        return type(self)({"water_balance": self.params}).heartbeat(payloads, crop_stages)
+
+    def heartbeat(self, payloads: Dict[str, Dict[str, Any]], crop_stages: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Update every field from its latest Open-Meteo payload in one vectorized step and
+        return the modeled AWC, projected AWC and depletion rate for each.
+        Unknown fields are registered from the payload's soil-moisture reading.
+        """
+        with self._lock:
+            return self._heartbeat(payloads, crop_stages)
+
+    def _heartbeat(self, payloads: Dict[str, Dict[str, Any]], crop_stages: Optional[Dict[str, str]]) -> Dict[str, Dict[str, float]]:
+        crop_stages = crop_stages or {}
+        horizon = int(self.params["projection_hours"])
+        field_ids = list(payloads)
+        observed: List[tuple] = []
+        forecast: List[tuple] = []
+        now_hours = []
+
+        for field_id in field_ids:
+            payload = payloads[field_id]
+            hourly = payload.get("hourly", {})
+            hours = hour_index(hourly.get("time", []))
+            current_time = payload.get("current", {}).get("time")
+            if current_time:
+                now = int(hour_index([current_time[:13]])[0])
+            else:
+                now = int(hours[0]) if hours.size else 0
+            now_hours.append(now)
+            if field_id not in self.field_index:
+                measured = DataValidator.validate_irrigation_inputs(payload)["awc"]
+                self.register(field_id, measured, now)
+            since = self.last_hour[self.field_index[field_id]]
+
+            et0 = np.nan_to_num(np.asarray(hourly.get("et0_fao_evapotranspiration", [0.0] * hours.size), dtype=float))
+            precip = np.nan_to_num(np.asarray(hourly.get("precipitation", [0.0] * hours.size), dtype=float))
+            new = (hours > since) & (hours <= now)
+            ahead = (hours > now) & (hours <= now + horizon)
+            observed.append((et0[new], precip[new]))
+            forecast.append((et0[ahead], precip[ahead]))
+
+        rows = self.rows(field_ids)
+        kc = self.crop_coefficients([crop_stages.get(f, "VEGETATIVE") for f in field_ids])
+        et0_new, precip_new, mask = self._pad(observed)
+        self.advance(rows, et0_new, precip_new, kc, mask, np.asarray(now_hours, dtype=np.int64))
+        et0_ahead, precip_ahead, _ = self._pad(forecast)
+        projected = self.project(rows, et0_ahead, precip_ahead, kc)
+        modeled = self.awc(rows)
+
+        return {
+            field_id: {
+                "modeled_awc": round(float(modeled[i]), 2),
+                "projected_awc": round(float(projected[i]), 2),
+                "depletion_rate": round(float(self.depletion_rate[rows[i]]), 3),
+            }
+            for i, field_id in enumerate(field_ids)
+        }
+
+    @staticmethod
+    def _pad(blocks: List[tuple]):
+        width = max((len(et0) for et0, _ in blocks), default=0)
+        et0 = np.zeros((len(blocks), width))
+        precip = np.zeros((len(blocks), width))
+        mask = np.zeros((len(blocks), width), dtype=bool)
+        for i, (e, p) in enumerate(blocks):
+            et0[i, :len(e)] = e
+            precip[i, :len(p)] = p
+            mask[i, :len(e)] = True
+        return et0, precip, mask
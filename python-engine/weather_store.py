@@ -0,0 +1,237 @@
+import os
+import json
+import numpy as np
+import requests
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+from farmsense.data.ingestion import DataIngestor
+from farmsense.core.tracing import traced
+
+# Hourly variables kept per grid cell, named as in the forecast API payloads.
+STORE_VARIABLES = (
+    "temperature_2m", "relative_humidity_2m", "precipitation",
+    "soil_temperature_6cm", "soil_moisture_3_to_9cm", "et0_fao_evapotranspiration",
+)
+
+def to_hour(value: Any) -> int:
+    """datetime / ISO string to integer hours since the epoch (naive local time, as Open-Meteo returns with timezone=auto)."""
+    return int(np.datetime64(value, "h").astype(np.int64))
+
+def hour_to_iso(hour: int) -> str:
+    return str(np.datetime64(int(hour), "h").astype("datetime64[m]"))
+
+class WeatherStore:
+    """
+    Local columnar store of hourly weather per grid cell.
+
+    Each cell is a directory holding one raw little-endian float32 file per variable
+    (index = hours since the cell's first hour, NaN where missing) and a manifest.json with
+    the start hour, length and the hour ranges backfills have completed. Reads are np.memmap
+    slices, so any past window is a zero-copy view regardless of how much history is stored.
+    """
+    DTYPE = np.dtype("<f4")
+    CELL_DEGREES = 0.1  # Open-Meteo's native grid is roughly 0.1°
+
+    def __init__(self, root: str = "/home/ubuntu/farmsense/weather"):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def cell_id(self, lat: float, lon: float) -> str:
+        step = self.CELL_DEGREES
+        return f"{round(round(lat / step) * step, 4)}_{round(round(lon / step) * step, 4)}"
+
+    def _cell_dir(self, cell: str) -> str:
+        return os.path.join(self.root, cell)
+
+    def manifest(self, cell: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self._cell_dir(cell), "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _write_manifest(self, cell: str, manifest: Dict[str, Any]):
+        path = os.path.join(self._cell_dir(cell), "manifest.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(tmp_path, path)
+
+    def write(self, lat: float, lon: float, times: Sequence[str], hourly: Dict[str, Sequence[Optional[float]]],
+              completed: Optional[Tuple[int, int]] = None) -> str:
+        """
+        Write an hourly block into a cell, extending its files as needed (gaps stay NaN).
+        `completed` records an hour range as fully backfilled. Returns the cell id.
+        """
+        cell = self.cell_id(lat, lon)
+        hours = np.asarray([to_hour(t) for t in times], dtype=np.int64)
+        if hours.size == 0:
+            return cell
+        os.makedirs(self._cell_dir(cell), exist_ok=True)
+        manifest = self.manifest(cell) or {"lat": lat, "lon": lon, "start_hour": int(hours.min()), "hours": 0,
+                                           "variables": list(STORE_VARIABLES), "completed": []}
+        if hours.min() < manifest["start_hour"]:
+            self._prepend(cell, manifest, int(hours.min()))
+        start = manifest["start_hour"]
+        length = max(manifest["hours"], int(hours.max()) - start + 1)
+
+        for variable in manifest["variables"]:
+            path = os.path.join(self._cell_dir(cell), f"{variable}.f32")
+            self._extend(path, length)
+            values = np.asarray([np.nan if v is None else v for v in hourly.get(variable, [None] * hours.size)], dtype=self.DTYPE)
+            column = np.memmap(path, dtype=self.DTYPE, mode="r+", shape=(length,))
+            column[hours - start] = values
+            column.flush()
+            del column
+
+        manifest["hours"] = length
+        if completed is not None:
+            manifest["completed"] = _merge_ranges(manifest["completed"] + [list(completed)])
+        self._write_manifest(cell, manifest)
+        return cell
+
+    def is_completed(self, lat: float, lon: float, first_hour: int, last_hour: int) -> bool:
+        manifest = self.manifest(self.cell_id(lat, lon))
+        return bool(manifest) and any(a <= first_hour and last_hour <= b for a, b in manifest["completed"])
+
+    def _extend(self, path: str, length: int):
+        """Grow a column file to `length` values, padding with NaN."""
+        current = os.path.getsize(path) // self.DTYPE.itemsize if os.path.exists(path) else 0
+        if current < length:
+            with open(path, "ab") as f:
+                f.write(np.full(length - current, np.nan, dtype=self.DTYPE).tobytes())
+
+    def _prepend(self, cell: str, manifest: Dict[str, Any], new_start: int):
+        """Move a cell's first hour earlier by rewriting its columns behind NaN padding (rare)."""
+        pad = np.full(manifest["start_hour"] - new_start, np.nan, dtype=self.DTYPE).tobytes()
+        for variable in manifest["variables"]:
+            path = os.path.join(self._cell_dir(cell), f"{variable}.f32")
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as out:
+                out.write(pad)
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        while True:
+                            block = f.read(1 << 20)
+                            if not block:
+                                break
+                            out.write(block)
+            os.replace(tmp_path, path)
+        manifest["hours"] += manifest["start_hour"] - new_start
+        manifest["start_hour"] = new_start
+
+    def coverage(self, lat: float, lon: float) -> Optional[Tuple[int, int]]:
+        """(first hour, last hour) stored for the cell, or None."""
+        manifest = self.manifest(self.cell_id(lat, lon))
+        if not manifest or not manifest["hours"]:
+            return None
+        return manifest["start_hour"], manifest["start_hour"] + manifest["hours"] - 1
+
+    def read(self, lat: float, lon: float, start_hour: int, end_hour: int,
+             variables: Sequence[str] = STORE_VARIABLES) -> Dict[str, np.ndarray]:
+        """Zero-copy views of [start_hour, end_hour) for each variable; raises if not covered."""
+        cell = self.cell_id(lat, lon)
+        manifest = self.manifest(cell)
+        if manifest is None:
+            raise ValueError(f"No stored weather for cell {cell}.")
+        first, length = manifest["start_hour"], manifest["hours"]
+        if start_hour < first or end_hour > first + length:
+            raise ValueError(f"Stored weather for cell {cell} covers {hour_to_iso(first)} to "
+                             f"{hour_to_iso(first + length - 1)}; {hour_to_iso(start_hour)} to {hour_to_iso(end_hour - 1)} requested.")
+        out = {}
+        for variable in variables:
+            path = os.path.join(self._cell_dir(cell), f"{variable}.f32")
+            out[variable] = np.memmap(path, dtype=self.DTYPE, mode="r", shape=(length,))[start_hour - first:end_hour - first]
+        return out
+
+    @traced("weather_store.payload_at")
+    def payload_at(self, lat: float, lon: float, at: datetime, forecast_days: int = 1) -> Dict[str, Any]:
+        """
+        An Open-Meteo forecast-shaped payload as it would have looked at `at`: "current" holds
+        the values at that hour and "hourly" runs from local midnight for `forecast_days` days
+        (as hindcast). Hourly series are memmap views, not lists.
+        """
+        now = to_hour(at)
+        midnight = to_hour(np.datetime64(at, "D"))
+        hourly = self.read(lat, lon, midnight, midnight + 24 * forecast_days)
+        offset = now - midnight
+        current = {variable: _scalar(values[offset]) for variable, values in hourly.items()}
+        current["time"] = hour_to_iso(now)
+        return {
+            "latitude": lat,
+            "longitude": lon,
+            "source": "weather_store",
+            "current": current,
+            "hourly": {"time": [hour_to_iso(h) for h in range(midnight, midnight + 24 * forecast_days)], **hourly},
+        }
+
+def _merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    merged: List[List[int]] = []
+    for a, b in sorted(ranges):
+        if merged and a <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], b)
+        else:
+            merged.append([a, b])
+    return merged
+
+def _scalar(value: Any) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else value
+
+class ArchiveBackfillIngestor(DataIngestor):
+    """
+    Streams Open-Meteo historical (archive) data into a WeatherStore one date chunk at a time.
+
+    Each chunk is fetched, written and recorded in the cell manifest before the next one is
+    requested, so memory stays bounded by the chunk size and an interrupted backfill resumes
+    after the last completed chunk.
+    """
+    BASE_URL = "https://archive-api.open-meteo.com/v1/archive"
+    TIMEOUT_SECONDS = 30
+    # The archive (reanalysis) reports soil at different depths than the forecast API.
+    ARCHIVE_VARIABLES = {
+        "soil_temperature_6cm": "soil_temperature_0_to_7cm",
+        "soil_moisture_3_to_9cm": "soil_moisture_0_to_7cm",
+    }
+
+    def __init__(self, store: WeatherStore, chunk_days: int = 31):
+        if chunk_days < 1:
+            raise ValueError("chunk_days must be at least 1.")
+        self.store = store
+        self.chunk_days = chunk_days
+
+    @traced("open_meteo.archive_fetch")
+    def fetch(self, lat: float, lon: float, start: date, end: date) -> Dict[str, Any]:
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "hourly": [self.ARCHIVE_VARIABLES.get(v, v) for v in STORE_VARIABLES],
+            "timezone": "auto",
+        }
+        response = requests.get(self.BASE_URL, params=params, timeout=self.TIMEOUT_SECONDS)
+        response.raise_for_status()
+        data = response.json()
+        hourly = data.get("hourly", {})
+        data["hourly"] = {"time": hourly.get("time", []),
+                          **{v: hourly.get(self.ARCHIVE_VARIABLES.get(v, v), []) for v in STORE_VARIABLES}}
+        return data
+
+    def chunks(self, start: date, end: date) -> Iterator[Tuple[date, date]]:
+        while start <= end:
+            chunk_end = min(start + timedelta(days=self.chunk_days - 1), end)
+            yield start, chunk_end
+            start = chunk_end + timedelta(days=1)
+
+    def backfill(self, lat: float, lon: float, start: date, end: date) -> List[Tuple[date, date]]:
+        """Fill [start, end] (inclusive dates), skipping chunks already completed; returns the chunks fetched."""
+        fetched = []
+        for chunk_start, chunk_end in self.chunks(start, end):
+            first_hour, last_hour = to_hour(chunk_start), to_hour(chunk_end) + 23
+            if self.store.is_completed(lat, lon, first_hour, last_hour):
+                continue
+            data = self.fetch(lat, lon, chunk_start, chunk_end)
+            self.store.write(lat, lon, data["hourly"]["time"], data["hourly"], completed=(first_hour, last_hour))
+            fetched.append((chunk_start, chunk_end))
+        return fetched